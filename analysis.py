@@ -0,0 +1,148 @@
+#!/usr/bin/python
+'''Vectorised analysis of board positions using NumPy. NumPy is optional - the rest of the game works without it, but the functions in this module raise an ImportError if it is missing.
+
+Positions on rectangular grids (including folded ones) are represented as int8 arrays of shape `(3, width, height)`, with one plane for each of:
+
+	`analysis.EMPTY`
+		1 where the point is empty, otherwise 0. Dead stones are not empty.
+	`analysis.PLAYER`
+		The index of the player whose stone is on the point, or -1 if it is empty.
+	`analysis.DEAD`
+		1 where there is a dead stone, otherwise 0.
+
+Planes are indexed by column and row, in the order of the grid coordinates. Players are identified by their index in a list of players passed to `to_array`. The analysis functions also accept a stack of positions with shape `(n, 3, width, height)`, so thousands of positions can be processed at once (see `stack_boards`).
+'''
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from board import STONE, DEAD_STONE, BoardError
+import multilogger
+
+# Plane indices
+EMPTY = 0
+PLAYER = 1
+DEAD = 2
+
+# Offsets of the neighbours of a point on a rectangular grid
+NEIGHBOURS = ((1,0), (-1,0), (0,1), (0,-1))
+
+def require_numpy():
+	'''Raise an ImportError if NumPy isn't installed.'''
+	if numpy is None:
+		raise ImportError('NumPy is required for board analysis')
+
+def grid_shape(grid):
+	'''Return the number of columns and rows of a rectangular grid. Raises a BoardError if the grid's points don't fill a rectangle.'''
+	positions = grid.topology.positions
+	width = len(set(x for x,y in positions))
+	height = len(set(y for x,y in positions))
+	if width * height != len(positions):
+		raise BoardError('Only rectangular grids can be converted to arrays')
+	return width, height
+
+def to_array(board, players):
+	'''Return the planes for a board. `players` is a list of all the players with stones on the board.'''
+	require_numpy()
+	width, height = grid_shape(board.grid)
+
+	# Grid indices are in sorted coordinate order, i.e. column by column
+	get_index = board.grid.get_index
+	values = [get_index(i) for i in xrange(width * height)]
+	player_index = dict((id(player), n) for n, player in enumerate(players))
+	try:
+		owners = [-1 if value is None else player_index[id(value[0])] for value in values]
+	except KeyError:
+		raise ValueError('The board has stones belonging to an unknown player')
+
+	planes = numpy.array([
+		[value is None for value in values],
+		owners,
+		[value is not None and value[1] == DEAD_STONE for value in values],
+	], dtype=numpy.int8)
+	return planes.reshape((3, width, height))
+
+def array_values(planes, players):
+	'''Iterate over `(index, value)` pairs for the stones in a set of planes, suitable for `board.Board.apply_changes`.'''
+	require_numpy()
+	planes = numpy.asarray(planes)
+	flat = planes.reshape((3, -1))
+	for i in numpy.flatnonzero(flat[EMPTY] == 0):
+		state = DEAD_STONE if flat[DEAD, i] else STONE
+		yield int(i), (players[flat[PLAYER, i]], state)
+
+def legal_array(ruleset, board, history, player):
+	'''Return a boolean array of shape `(width, height)` which is true where a player can play, according to `ruleset` (see `rules.GoRules.legal_indices`).'''
+	require_numpy()
+	width, height = grid_shape(board.grid)
+	legal = numpy.zeros(width * height, dtype=bool)
+	legal[list(ruleset.legal_indices(board, history, player))] = True
+	return legal.reshape((width, height))
+
+def stack_boards(boards, players):
+	'''Return the planes for many boards as one array of shape `(n, 3, width, height)`.'''
+	require_numpy()
+	return numpy.stack([to_array(board, players) for board in boards])
+
+def _neighbour(values, dx, dy, wrap, fill):
+	'''Return an array holding the value of the neighbour at offset `(dx, dy)` of every point, over the last two axes. Points without such a neighbour get `fill`, unless `wrap` is true, in which case the edges wrap around as on a torus.'''
+	if wrap:
+		return numpy.roll(numpy.roll(values, -dx, axis=-2), -dy, axis=-1)
+
+	width, height = values.shape[-2:]
+	result = numpy.full_like(values, fill)
+	result[..., max(-dx,0):width+min(-dx,0), max(-dy,0):height+min(-dy,0)] = \
+		values[..., max(dx,0):width+min(dx,0), max(dy,0):height+min(dy,0)]
+	return result
+
+def stone_counts(planes, players, include_dead=False):
+	'''Count the stones of each player. `players` is the number of players. Returns an array of shape `(..., players)`.'''
+	require_numpy()
+	planes = numpy.asarray(planes)
+	counted = planes[..., EMPTY, :, :] == 0
+	if not include_dead:
+		counted &= planes[..., DEAD, :, :] == 0
+	owner = planes[..., PLAYER, :, :]
+	return numpy.stack([((owner == p) & counted).sum(axis=(-2,-1)) for p in range(players)], axis=-1)
+
+def label_regions(planes, wrap=False):
+	'''Label the connected regions of empty points and dead stones. Returns an int32 array of shape `(..., width, height)`, which is 0 for live stones. Every point of a region has the same label: one more than the flat index of the region's first point. Set `wrap` for a torus (a `geometry.FoldedGrid` joining N to S and E to W).'''
+	require_numpy()
+	planes = numpy.asarray(planes)
+	open_points = (planes[..., EMPTY, :, :] == 1) | (planes[..., DEAD, :, :] == 1)
+	width, height = open_points.shape[-2:]
+	closed = width * height + 1
+
+	# Start with each point labelled by its own index, then spread the smallest label through each region
+	labels = numpy.where(open_points, numpy.arange(1, width*height + 1, dtype=numpy.int32).reshape((width, height)), closed)
+	while True:
+		smallest = labels
+		for dx, dy in NEIGHBOURS:
+			smallest = numpy.minimum(smallest, _neighbour(labels, dx, dy, wrap, closed))
+		smallest = numpy.where(open_points, smallest, closed)
+		if (smallest == labels).all():
+			break
+		labels = smallest
+
+	return numpy.where(open_points, labels, 0).astype(numpy.int32)
+
+def influence(planes, players, decay=0.5, steps=4, wrap=False):
+	'''Estimate how much influence each player has over every point. Each live stone spreads influence to its neighbours, which is multiplied by `decay` at every step, up to `steps` points away. `players` is the number of players. Returns a float32 array of shape `(..., players, width, height)`.'''
+	require_numpy()
+	planes = numpy.asarray(planes)
+	live = (planes[..., EMPTY, :, :] == 0) & (planes[..., DEAD, :, :] == 0)
+	owner = planes[..., PLAYER, :, :]
+	front = numpy.stack([(owner == p) & live for p in range(players)], axis=-3).astype(numpy.float32)
+
+	field = front.copy()
+	for step in range(steps):
+		spread = numpy.zeros_like(front)
+		for dx, dy in NEIGHBOURS:
+			spread += _neighbour(front, dx, dy, wrap, 0)
+		front = spread * decay
+		field += front
+	return field
+
+# Get a logger for this module
+debug,info,warning,error = multilogger.logFunctions(__name__)
@@ -0,0 +1,258 @@
+#!/usr/bin/python
+'''Benchmarks for the board and rules core, on reproducible synthetic games.
+
+Each board is filled by a random game generated from a fixed seed, so every run times exactly the same moves. The benchmarks are:
+
+	place_stone
+		Placing each stone of the game on the board.
+	remove_dead_stones
+		Checking each move of the game for captures.
+	group
+		Building a `board.Group` for every stone on the final board.
+	mark_territory
+		Marking the territory of the final board.
+	toggle_dead
+		Marking each chain of the final board dead and alive again, with territory marked.
+	copy
+		Copying the final board.
+	check_ko
+		Checking each move of the game against the history of the game so far.
+	play_move
+		Playing the whole game through `game.TwoPlayerGame.play_move`.
+
+Times are the best of several runs, in microseconds per operation. Results can be written to a JSON file and compared with an earlier run, to catch regressions.
+
+Run from the top level directory with: python benchmarks/core.py [--output results.json] [--compare old.json]'''
+import os
+import sys
+import json
+import random
+import platform
+import time
+import timeit
+from argparse import ArgumentParser
+from copy import copy
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from geometry import RectangularGrid, FoldedGrid
+from board import Board, Group
+from game import TwoPlayerGame, History, Move
+from rules import AGARules
+from playout import Colour
+
+# Boards to run the benchmarks on, by name
+BOARDS = {
+	'9x9': lambda: RectangularGrid(9, 9),
+	'19x19': lambda: RectangularGrid(19, 19),
+	'50x50': lambda: RectangularGrid(50, 50),
+	'19x19-torus': lambda: FoldedGrid(19, 19, 1, [('N','S'),('E','W')]),
+}
+BOARD_ORDER = ['9x9', '19x19', '50x50', '19x19-torus']
+
+def synthetic_game(make_grid, seed=0, fill=0.6):
+	'''Generate a random game which follows the rules, until `fill` of the board has been played on. Returns the list of moves, as `(position, player number)` pairs.'''
+	rand = random.Random(seed)
+	board = Board(make_grid())
+	players = (Colour('black'), Colour('white'))
+	positions = sorted(board.grid.get_positions())
+	seen = set([board.hash])
+	moves = []
+
+	attempts = 0
+	while len(moves) < fill * len(positions) and attempts < 10 * len(positions):
+		attempts += 1
+		position = rand.choice(positions)
+		if board.get_point(position) is not None:
+			continue
+
+		player = len(moves) % 2
+		move = Move(position, players[player])
+		board.begin()
+		board.place_stone(move)
+		board.remove_dead_stones(move)
+		if not board.liberty_count(position) or board.hash in seen:
+			board.rollback()
+			continue
+		board.commit()
+		seen.add(board.hash)
+		moves.append((position, player))
+	return moves
+
+class Scenario(object):
+	'''A synthetic game on one board, and the benchmarks which use it.'''
+
+	def __init__(self, name, make_grid, seed):
+		self.name = name
+		self.make_grid = make_grid
+		self.moves = synthetic_game(make_grid, seed)
+		self.players = (Colour('black'), Colour('white'))
+		self.final = self.replay()
+
+	def replay(self):
+		'''Return a board with all the moves of the game played on it.'''
+		board = Board(self.make_grid())
+		for position, player in self.moves:
+			move = Move(position, self.players[player])
+			board.place_stone(move)
+			board.remove_dead_stones(move)
+		return board
+
+	def stones(self):
+		'''One position from each chain on the final board.'''
+		seen = set()
+		result = []
+		for position, value in sorted(self.final.points()):
+			if value is not None:
+				index = self.final.grid.index_of(*position)
+				if index not in seen:
+					seen |= self.final.chain(position).stones
+					result.append(position)
+		return result
+
+	def bench_place_stone(self):
+		board = Board(self.make_grid())
+		moves = [Move(position, value[0]) for position, value in sorted(self.final.points()) if value is not None]
+		start = timeit.default_timer()
+		for move in moves:
+			board.place_stone(move)
+		return timeit.default_timer() - start, len(moves)
+
+	def bench_remove_dead_stones(self):
+		board = Board(self.make_grid())
+		elapsed = 0
+		for position, player in self.moves:
+			move = Move(position, self.players[player])
+			board.place_stone(move)
+			start = timeit.default_timer()
+			board.remove_dead_stones(move)
+			elapsed += timeit.default_timer() - start
+		return elapsed, len(self.moves)
+
+	def bench_group(self):
+		board = self.final
+		positions = [position for position, value in board.points() if value is not None]
+		start = timeit.default_timer()
+		for position in positions:
+			Group(board, position)
+		return timeit.default_timer() - start, len(positions)
+
+	def bench_mark_territory(self):
+		board = copy(self.final)
+		start = timeit.default_timer()
+		board.mark_territory()
+		return timeit.default_timer() - start, 1
+
+	def bench_toggle_dead(self):
+		board = copy(self.final)
+		board.mark_territory()
+		positions = self.stones()
+		start = timeit.default_timer()
+		for position in positions:
+			board.toggle_dead(position)
+			board.toggle_dead(position)
+		return timeit.default_timer() - start, 2 * len(positions)
+
+	def bench_copy(self):
+		board = self.final
+		number = 100
+		start = timeit.default_timer()
+		for n in range(number):
+			copy(board)
+		return timeit.default_timer() - start, number
+
+	def bench_check_ko(self):
+		board = Board(self.make_grid())
+		history = History(board)
+		rules = AGARules()
+		elapsed = 0
+		for position, player in self.moves:
+			move = Move(position, self.players[player])
+			board.begin()
+			board.place_stone(move)
+			board.remove_dead_stones(move)
+			start = timeit.default_timer()
+			rules.check_ko(move, board, history)
+			elapsed += timeit.default_timer() - start
+			history.record(board, board.commit())
+		return elapsed, len(self.moves)
+
+	def bench_play_move(self):
+		game = TwoPlayerGame(Board(self.make_grid()))
+		start = timeit.default_timer()
+		for position, player in self.moves:
+			game.play_move(position, game.next_player)
+		return timeit.default_timer() - start, len(self.moves)
+
+	def run(self, benchmarks, repeat):
+		'''Run the benchmarks, returning a list of results. Each benchmark times the interesting part itself, so that setup isn't counted.'''
+		results = []
+		for benchmark in benchmarks:
+			function = getattr(self, 'bench_' + benchmark)
+			runs = [function() for n in range(repeat)]
+			elapsed, ops = min(runs)
+			results.append({
+				'benchmark': benchmark,
+				'board': self.name,
+				'ops': ops,
+				'best_us': 1e6 * elapsed / max(ops, 1),
+				'mean_us': 1e6 * sum(e for e, o in runs) / len(runs) / max(ops, 1),
+			})
+		return results
+
+BENCHMARKS = ['place_stone', 'remove_dead_stones', 'group', 'mark_territory', 'toggle_dead', 'copy', 'check_ko', 'play_move']
+
+def compare(results, baseline, threshold):
+	'''Print how the results changed since a baseline. Returns the results which got slower by more than `threshold` (a fraction).'''
+	old = dict(((r['benchmark'], r['board']), r) for r in baseline['results'])
+	regressions = []
+	for result in results:
+		before = old.get((result['benchmark'], result['board']))
+		if before is None:
+			continue
+		ratio = result['best_us'] / before['best_us'] if before['best_us'] else 1.0
+		flag = ''
+		if ratio > 1 + threshold:
+			regressions.append(result)
+			flag = '  REGRESSION'
+		print '%-20s %-12s %10.2fus -> %10.2fus  x%.2f%s' % (result['benchmark'], result['board'], before['best_us'], result['best_us'], ratio, flag)
+	return regressions
+
+def main(argv=None):
+	parser = ArgumentParser(description='Benchmark the board and rules core.')
+	parser.add_argument('--boards', default=','.join(BOARD_ORDER), help='comma separated boards to use (default: all of %s)' % ', '.join(BOARD_ORDER))
+	parser.add_argument('--benchmarks', default=','.join(BENCHMARKS), help='comma separated benchmarks to run (default: all)')
+	parser.add_argument('--seed', type=int, default=1, help='seed for the synthetic games')
+	parser.add_argument('--repeat', type=int, default=3, help='number of runs of each benchmark')
+	parser.add_argument('--output', help='write the results to this JSON file')
+	parser.add_argument('--compare', help='compare with the results in this JSON file, and fail if anything got slower')
+	parser.add_argument('--threshold', type=float, default=0.2, help='fraction slower which counts as a regression (default: 0.2)')
+	args = parser.parse_args(argv)
+
+	results = []
+	for name in args.boards.split(','):
+		scenario = Scenario(name, BOARDS[name], args.seed)
+		for result in scenario.run(args.benchmarks.split(','), args.repeat):
+			print '%-20s %-12s %8d ops %10.2fus' % (result['benchmark'], result['board'], result['ops'], result['best_us'])
+			results.append(result)
+
+	report = {
+		'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'seed': args.seed,
+		'repeat': args.repeat,
+		'results': results,
+	}
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(report, f, indent=1, sort_keys=True)
+
+	if args.compare:
+		with open(args.compare) as f:
+			baseline = json.load(f)
+		if compare(results, baseline, args.threshold):
+			return 1
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/python
+'''Compare the recursive group search the board used to use with the flood fill engine in `geometry.Topology.flood`, on the worst case chain shape: a single snake filling half of the board.
+
+Run from the top level directory with: python benchmarks/floodfill.py'''
+import os
+import sys
+import timeit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from geometry import RectangularGrid, FoldedGrid
+from board import Board, STONE, is_live
+
+def snake(grid, player):
+	'''Fill every other column and join them at alternate ends'''
+	xmin, ymin, xmax, ymax = grid.size()
+	for x in range(xmin, xmax+1, 2):
+		for y in range(ymin, ymax+1):
+			grid.set_point(x, y, (player, STONE))
+		if x < xmax:
+			grid.set_point(x+1, ymax if (x // 2) % 2 == 0 else ymin, (player, STONE))
+
+def recursive_group(board, position):
+	'''The original recursive Group.find_connected_stones'''
+	owner = board.get_point(position)[0]
+	stones = set([position])
+	liberties = [False]
+	def find(position):
+		for next in board.neighbours(position):
+			if next not in stones:
+				if board.is_empty(next):
+					liberties[0] = True
+				elif board.get_point(next)[0] is owner:
+					stones.add(next)
+					find(next)
+	find(position)
+	return stones
+
+def flood_group(board, position):
+	grid = board.grid
+	get_index = grid.get_index
+	owner = board.get_point(position)[0]
+	stones, border = grid.topology.flood([grid.index_of(*position)], lambda j: is_live(get_index(j)) and get_index(j)[0] is owner)
+	return stones
+
+def bench(name, grid, number=20):
+	snake(grid, 'black')
+	board = Board(grid)
+	try:
+		recursive = '%8.2fms' % (timeit.timeit(lambda: recursive_group(board, (0,0)), number=number) * 1000 / number)
+	except Exception:
+		# Board.get_point turns the RuntimeError into a NonExistentPointError
+		recursive = '  too deep'
+	flood = timeit.timeit(lambda: flood_group(board, (0,0)), number=number) * 1000 / number
+	print '%-20s %6d stones  recursive: %s  flood: %8.2fms' % (name, len(flood_group(board, (0,0))), recursive, flood)
+
+if __name__ == '__main__':
+	bench('9x9', RectangularGrid(9, 9))
+	bench('19x19', RectangularGrid(19, 19))
+	bench('40x40', RectangularGrid(40, 40))
+	bench('50x50', RectangularGrid(50, 50))
+	bench('50x50 torus', FoldedGrid(50, 50, 1, [('N','S'),('E','W')]))
@@ -8,12 +8,13 @@ This module defines some constants which are used to distinguish the nature of t
 	`board.DEAD_STONE`
 		Represents a dead stone
 
-TODO:
-	move the territory counter to a seperate class
+Territory is counted by a separate `Territory` object belonging to each board.
 '''
 from copy import copy,deepcopy
+import random
+import threading
 from observer import Observable
-from geometry import RectangularGrid
+from geometry import RectangularGrid, ArrayGrid, shallow_copy
 import multilogger
 
 # Define constants used for describing the state of a board point.
@@ -38,29 +39,129 @@ class SizeError(BoardError):
 	pass
 
 
+class ZobristTable(object):
+	'''Random 64 bit keys for each value a board point can hold, used to hash board positions. The hash of a position is the XOR of the keys of all its points, so it can be updated incrementally whenever a point changes. Empty points have a key of zero.
+
+	Keys are generated the first time each (index, value) pair is seen, so a table can only be used to compare boards which share it. Boards sharing a table can be used from different threads (like a game and a copy of its board being searched in the background); new keys are generated under a lock, so both threads always see the same key.'''
+
+	def __init__(self, seed=None):
+		self._keys = {}
+		self._random = random.Random(seed)
+		self._lock = threading.Lock()
+
+	def key(self, index, value):
+		'''The key for the point with the given index holding `value`.'''
+		if value is None:
+			return 0
+		try:
+			return self._keys[(index, value)]
+		except KeyError:
+			with self._lock:
+				key = self._keys.get((index, value))
+				if key is None:
+					key = self._keys[(index, value)] = self._random.getrandbits(64)
+			return key
+
+	def keys(self):
+		'''Return a list of `((index, value), key)` pairs for every key generated so far.'''
+		return self._keys.items()
+
+	def add_keys(self, keys):
+		'''Use the given `((index, value), key)` pairs, e.g. from another table's `keys`, instead of generating new keys for those values. Boards using the two tables then hash positions made of those values the same way.'''
+		with self._lock:
+			self._keys.update(keys)
+
+	def hash(self, grid):
+		'''Hash all the points of a grid from scratch.'''
+		result = 0
+		for i in xrange(len(grid)):
+			result ^= self.key(i, grid.get_index(i))
+		return result
+
+
 class Board(Observable):
-	'''A rectangular board. Stones can be added to any square which isnt occupied. Each board object contains a grid of points, which are set to `None` if empty, otherwise contain a tuple of `(player,type)`, where type is either `board.STONE` or `board.DEAD_STONE`.'''
+	'''A rectangular board. Stones can be added to any square which isnt occupied. Each board object contains a grid of points, which are set to `None` if empty, otherwise contain a tuple of `(player,type)`, where type is either `board.STONE` or `board.DEAD_STONE`.
+
+	The board keeps a Zobrist hash of its position in the `hash` attribute, which is updated every time a point is set. Copies of a board share its `ZobristTable`, so their hashes can be compared with each other.
+
+	Changes can be made in a transaction by calling `begin` first. Every point set after that is recorded in an undo journal, which `rollback` replays in reverse to restore the board. `commit` keeps the changes and discards the journal.
 
-	def __init__(self,grid):
+	Connected live stones are tracked as `Chain` objects as the board changes, so the chain at a point and its liberties can be looked up without searching the board (see `chain` and `liberty_count`).'''
+
+	def __init__(self,grid,zobrist=None,position_hash=None):
 		Observable.__init__(self)
 		self.grid = grid
-		self.territory = {}
+		self._territory = None
+		if zobrist is None:
+			zobrist = ZobristTable()
+		self.zobrist = zobrist
+		if position_hash is None:
+			position_hash = zobrist.hash(grid)
+		self.hash = position_hash
+		self.symmetry = None # symmetry.SymmetryKeys kept up to date with the board, if any
+		self._journal = None
+		self._track_stones()
+
+	def _track_stones(self):
+		'''Start tracking the chains of the stones already on the grid.'''
+		# Chains are rebuilt lazily after a stone is removed from them, since that may split the chain in two.
+		# _dirty holds the live stones which are not currently part of a chain.
+		self._writer = object() # chains made with this writer are owned by this board, see _writable
+		self._chains = [None] * len(self.grid)
+		self._dirty = set(i for i in xrange(len(self.grid)) if is_live(self.grid.get_index(i)))
 
 	def __eq__(self, other):
 		'''Two boards are the same if all squares have the same state.'''
+		if self.zobrist is other.zobrist and self.hash != other.hash:
+			return False
 		return self.grid == other.grid
 
-	def __copy__(self):
-		'''Make a copy of this board.'''
-		newgrid = copy(self.grid)
-		newgrid.points = {}
-		newgrid.connections = {}
-		for i,j in self.grid.get_points():
-			newgrid.points[i] = j
-		for i,j in self.grid.get_connections():
-			newgrid.connections[i] = j
+	@property
+	def territory(self):
+		'''The `Territory` of the board, created the first time it is needed.'''
+		if self._territory is None:
+			self._territory = Territory(self)
+		return self._territory
 
-		return Board(newgrid)
+	def __copy__(self):
+		'''Make a copy of this board. The chains are shared with the copy and cloned by whichever board changes them first (see `_writable`), rather than found again, and the territory isn't copied.'''
+		board = shallow_copy(self)
+		Observable.__init__(board)
+		board.grid = copy(self.grid)
+		board._territory = None
+		board.symmetry = None if self.symmetry is None else copy(self.symmetry)
+		board._journal = None
+
+		# Neither board owns the shared chains any more
+		self._writer = object()
+		board._writer = object()
+		board._chains = self._chains[:]
+		board._dirty = set(self._dirty)
+		return board
+
+	def values(self):
+		'''Return a tuple of the value of every point, in index order, which can be given to `restore`.'''
+		get_index = self.grid.get_index
+		return tuple(get_index(i) for i in xrange(len(self.grid)))
+
+	def restore(self, values, position_hash=None):
+		'''Set every point to the values from `values`, and work out the chains, territory and symmetry keys from scratch. `position_hash` is the hash of the new position, if it is already known. The undo journal and listeners of the board are not used.'''
+		grid = self.grid
+		for i, value in enumerate(values):
+			grid.set_index(i, value)
+		if position_hash is None:
+			position_hash = self.zobrist.hash(grid)
+		self.hash = position_hash
+		self._territory = None
+		self._track_stones()
+		if self.symmetry is not None:
+			self.track_symmetry(self.symmetry.players, self.symmetry.colours)
+
+	def track_symmetry(self, players, colours=True):
+		'''Start keeping a `symmetry.SymmetryKeys` for the board up to date in the `symmetry` attribute, so its canonical key can be found at any time. Returns the `SymmetryKeys` object. See `symmetry` for the meaning of the arguments.'''
+		import symmetry
+		self.symmetry = symmetry.SymmetryKeys(self.grid, players, colours)
+		return self.symmetry
 
 	def positions(self):
 		'''Iterate over valid board coordinates.'''
@@ -96,31 +197,26 @@ class Board(Observable):
 
 	def get_territory(self, pos):
 		'''Return the owner of the territory at position `pos`, or `None` if it is neutral.'''
-		if pos in self.territory:
-			return self.territory[pos]
+		i = self.grid.topology.index.get(tuple(pos))
+		if i is not None:
+			return self.territory.owners[i]
 
 	def count_territory(self):
 		'''Return a dictionary containing the points of territory for each player. Assumes the territory has been calculated already.'''
-		result = {}
-		for pos,player in self.territory.iteritems():
-			if player is not None:
-				if player not in result:
-					result[player] = 1
-				else:
-					result[player] += 1
-		return result
+		return self.territory.count()
 
 	def player_territory(self, player):
 		'''Return the territory for a player'''
-		return [pos for pos,owner in self.territory.iteritems() if owner is player]
+		positions = self.grid.topology.positions
+		return [positions[i] for i in self.territory.points(player)]
 
 	def set_territory(self, pos, player=None):
 		'''Mark a particular point as belong to a player.'''
-		self.territory[pos] = player
+		self.territory.set_owner(self.grid.index_of(*pos), player)
 
 	def reset_territory(self):
 		'''Reset previously calculated territories.'''
-		self.territory = {}
+		self.territory.clear()
 
 	def get_point(self, pos):
 		'''Get the value of a board point.'''
@@ -131,11 +227,206 @@ class Board(Observable):
 		return point
 
 	def set_point(self, pos, value):
-		'''Set the value of a board point.'''
+		'''Set the value of a board point, and update the hash of the position.'''
 		try:
-			self.grid.set_point(pos[0],pos[1],value)
+			i = self.grid.index_of(pos[0],pos[1])
 		except:
 			raise NonExistentPointError
+		self._set_index(i, value)
+
+	def _set_index(self, i, value):
+		'''Set the value of the point with index `i`, updating the hash and the undo journal.'''
+		old = self.grid.get_index(i)
+		if self._journal is not None:
+			self._journal.append((i, old))
+		self.hash ^= self.zobrist.key(i, old) ^ self.zobrist.key(i, value)
+		if self.symmetry is not None:
+			self.symmetry.update(i, old, value)
+		self.grid.set_index(i, value)
+		self._point_changed(i, old, value)
+		territory = self._territory
+		if territory is not None and territory.marked:
+			# The regions may have changed, so forget them rather than update them incrementally later
+			territory.clear()
+
+	def _point_changed(self, i, old, value):
+		'''Update the chains after the value of a point has changed from `old` to `value`.'''
+		if is_live(old):
+			self._remove_from_chain(i, value)
+		if is_live(value):
+			self._add_to_chain(i, value[0])
+
+	def _remove_from_chain(self, i, value):
+		'''Update the chains after the live stone at index `i` is replaced with `value`.'''
+		chain = self._chains[i]
+		if chain is not None:
+			# The rest of the chain may have been split, so rebuild it when it's next needed
+			for j in chain.stones:
+				self._chains[j] = None
+			self._dirty.update(chain.stones)
+		self._dirty.discard(i)
+
+		if not is_live(value):
+			for j in self.grid.topology.adjacency[i]:
+				neighbour = self._chains[j]
+				if neighbour is not None:
+					self._writable(neighbour).liberties.add(i)
+
+	def _add_to_chain(self, i, owner):
+		'''Update the chains after a live stone is placed at index `i`, merging it with any neighbouring chains of the same player.'''
+		self._refresh_chains()
+		chain = Chain(owner, self._writer)
+		chain.stones.add(i)
+		self._chains[i] = chain
+
+		for j in self.grid.topology.adjacency[i]:
+			neighbour = self._chains[j]
+			if neighbour is None:
+				if not is_live(self.grid.get_index(j)):
+					chain.liberties.add(j)
+				continue
+
+			neighbour = self._writable(neighbour)
+			neighbour.liberties.discard(i)
+			if neighbour.owner is owner and neighbour is not chain:
+				# Merge the smaller chain into the larger one
+				if len(neighbour.stones) < len(chain.stones):
+					chain, neighbour = neighbour, chain
+				neighbour.stones |= chain.stones
+				neighbour.liberties |= chain.liberties
+				for k in chain.stones:
+					self._chains[k] = neighbour
+				chain = neighbour
+
+		chain.liberties.discard(i)
+
+	def _writable(self, chain):
+		'''Return a version of a chain which the board can change: the chain itself if the board owns it, otherwise a clone which replaces it on this board. Copies of a board share its chains until one of them changes a chain, so copying a board doesn't have to copy every chain.'''
+		if chain.writer is self._writer:
+			return chain
+		clone = Chain(chain.owner, self._writer)
+		clone.stones = set(chain.stones)
+		clone.liberties = set(chain.liberties)
+		chains = self._chains
+		for j in clone.stones:
+			chains[j] = clone
+		return clone
+
+	def _refresh_chains(self):
+		'''Rebuild the chains of any live stones which aren't part of one.'''
+		dirty = self._dirty
+		get_index = self.grid.get_index
+		while dirty:
+			start = dirty.pop()
+			chain = Chain(get_index(start)[0], self._writer)
+			chain.stones, border = self.grid.topology.flood([start], lambda j: is_live(get_index(j)) and get_index(j)[0] is chain.owner)
+			chain.liberties = set(j for j in border if not is_live(get_index(j)))
+
+			for j in chain.stones:
+				self._chains[j] = chain
+			dirty -= chain.stones
+
+	def chain(self, pos):
+		'''Return the `Chain` of live stones at a position, or `None` if there is no live stone there.'''
+		try:
+			i = self.grid.index_of(pos[0],pos[1])
+		except:
+			raise NonExistentPointError
+		self._refresh_chains()
+		return self._chains[i]
+
+	def chain_at(self, i):
+		'''Return the `Chain` of live stones at the point with index `i`, or `None` if there is no live stone there. The index must be valid.'''
+		if self._dirty:
+			self._refresh_chains()
+		return self._chains[i]
+
+	def liberty_count(self, pos):
+		'''Return the number of liberties of the chain at a position, or 0 if there is no live stone there.'''
+		chain = self.chain(pos)
+		if chain is None:
+			return 0
+		return len(chain.liberties)
+
+	def capture_effect(self, i, player):
+		'''Work out what a stone played by `player` on the empty point with index `i` would do, without playing it. Returns a tuple of whether the new stone would have a liberty afterwards, and the set of indices of the stones it would capture.'''
+		has_liberty = False
+		captured = set()
+		for j in self.grid.topology.adjacency[i]:
+			chain = self.chain_at(j)
+			if chain is None:
+				has_liberty = True
+			elif chain.owner is player:
+				# Point i is one of its liberties, so it needs another
+				if len(chain.liberties) > 1:
+					has_liberty = True
+			elif len(chain.liberties) == 1:
+				captured |= chain.stones
+				has_liberty = True
+		return has_liberty, captured
+
+	def begin(self):
+		'''Start recording changes so that they can be rolled back. Listeners of the grid hear about the changes all at once, when the transaction is committed.'''
+		if self._journal is not None:
+			raise BoardError('A transaction is already in progress')
+		self._journal = []
+		self.grid.begin_batch()
+
+	def rollback(self):
+		'''Undo all the changes made since `begin` was called.'''
+		journal = self._journal
+		self._journal = None
+		if journal is None:
+			raise BoardError('No transaction in progress')
+		self.apply_changes(reversed(journal))
+		self.grid.end_batch(discard=True)
+
+	def commit(self):
+		'''Keep the changes made since `begin` was called. Returns the undo journal, a list of `(index, old value)` pairs in the order the points were set.'''
+		journal = self._journal
+		if journal is None:
+			raise BoardError('No transaction in progress')
+		self._journal = None
+		self.grid.end_batch()
+		return journal
+
+	def apply_changes(self, changes):
+		'''Set points by index, from an iterable of `(index, value)` pairs. Listeners of the grid are notified once, after all the points are set.'''
+		grid = self.grid
+		if grid.batching:
+			for i, value in changes:
+				self._set_index(i, value)
+			return
+
+		grid.begin_batch()
+		try:
+			for i, value in changes:
+				self._set_index(i, value)
+		finally:
+			grid.end_batch()
+
+	def to_array(self, players):
+		'''Return the points of the board as NumPy planes, indexing players by their position in the list `players`. Only works for rectangular grids; see the `analysis` module.'''
+		import analysis
+		return analysis.to_array(self, players)
+
+	@classmethod
+	def from_array(cls, planes, players, grid=None):
+		'''Create a board from planes made by `to_array`. If no grid is given, a `geometry.RectangularGrid` of the right size is used.'''
+		import analysis
+		width, height = planes.shape[-2:]
+		if grid is None:
+			grid = RectangularGrid(width, height)
+		elif analysis.grid_shape(grid) != (width, height):
+			raise SizeError()
+		board = cls._on_grid(grid)
+		board.apply_changes(analysis.array_values(planes, players))
+		return board
+
+	@classmethod
+	def _on_grid(cls, grid):
+		'''Create an empty board of this class on a grid.'''
+		return cls(grid)
 
 	def is_empty(self, pos):
 		'''Check if a point is empty.'''
@@ -146,26 +437,27 @@ class Board(Observable):
 
 	def neighbours(self,pos):
 		'''Returns a list of positions of the neighbouring points.'''
-		return self.grid.neighbours(pos[0], pos[1])[::]
+		return list(self.grid.neighbours(pos[0], pos[1]))
 
 	def remove_dead_stones(self,move):
 		'''Remove any stones which are captured by this move.'''
 		captures = 0
-		already_checked = set()
-		for position in self.neighbours(move.position):
-			if (position not in already_checked) and not self.is_empty(position) and (self.get_point(position)[0] is not move.player):
-
-				# Start a new group
-				group = Group(self,position)
+		try:
+			i = self.grid.index_of(*move.position)
+		except:
+			raise NonExistentPointError
+		self._refresh_chains()
 
-				# Save the positions of all the stones in this group to avoid checking the same group multiple times
-				already_checked |= group.stones
+		for j in self.grid.topology.adjacency[i]:
+			chain = self._chains[j]
+			if chain is not None and chain.owner is not move.player and not chain.liberties: # the chain is captured!
 
-				if not group.liberties: # the group is captured!
+				# Update the number of captured stones for this player
+				captures += len(chain.stones)
 
-					# Update the number of captured stones for this player
-					captures += len(group.stones)
-					group.kill() # remove the stones from the board
+				# Remove the stones from the board. Once the first one is gone the chain is discarded, so it won't be found again.
+				for k in list(chain.stones):
+					self._set_index(k, None)
 		return captures
 
 	def size(self):
@@ -174,62 +466,14 @@ class Board(Observable):
 
 	def group(self,position):
 		'''Return the group of stones at a given position.'''
-		debug(position)
 		return Group(self,position)
 
 	def mark_territory(self):
 		'''Find empty space surrounded by a single player, and mark it as that player's territory. Assumes all stones are live unless marked otherwise.'''
-		self.reset_territory()
-		done = [] # points which have been checked already
-
-		# Look for areas of empty spaces
-		for pos in self.positions():
-
-			if not self.is_empty(pos):
-				continue
-
-			# Mark already checked points
-			if pos in done:
-				continue
-			else:
-				done.append(pos)
-
-			surroundingPlayer = None
-			area = [pos]
-
-			# Make a stack of unchecked points in the area
-			unchecked = self.neighbours(pos)
-
-			# Grow the area until we reach the border.
-			# If it touches no players or >1 players it's neutral
-			# Otherwise, mark it as the surrounding player's territory
-			while True:
-
-				# If we've checked all the points in this area, continue looking for more areas
-				if not unchecked:
-					if surroundingPlayer is not None:
-						for pos in area:
-							self.set_territory(pos,surroundingPlayer)
-					break
-	
-				nextPos = unchecked.pop()
-
-				if nextPos in area:
-					continue
-
-				if not self.is_empty(nextPos):
-					player,state = self.get_point(nextPos)
-					if surroundingPlayer is not None and surroundingPlayer is not player:
-						break
-					elif surroundingPlayer is None:
-						surroundingPlayer = player
-				else:
-					area.append(nextPos)
-					done.append(nextPos)
-					unchecked.extend(self.neighbours(nextPos))
+		self.territory.mark()
 
 	def toggle_dead(self,position):
-		'''Toggles whether a group is marked dead or not. Assumes that territory is marked before this method is called, but markings are not guarenteed to be correct afterwards. It would not make sense to have dead stones in your own territory, so we treat any groups that are only seperated by the player's territory as linked here.'''
+		'''Toggles whether a group is marked dead or not. Assumes that territory is marked before this method is called; the regions next to the group are updated afterwards, so the markings stay correct. It would not make sense to have dead stones in your own territory, so we treat any groups that are only seperated by the player's territory as linked here.'''
 
 		here = self.get_point(position)
 		if here is None:
@@ -243,40 +487,132 @@ class Board(Observable):
 		else:
 			return
 
-		self.set_point(position, (player, new_state))
-
-		neighbours = self.neighbours(position)
-		stones = []
-		checked = []
-
-		while True:
-			if not neighbours:
-				break
+		topology = self.grid.topology
+		get_index = self.grid.get_index
+
+		def linked(j):
+			'''The player's stones are linked through empty points in their territory.'''
+			value = get_index(j)
+			if value is None:
+				return self.territory.owners[j] is player
+			return value[0] is player
+
+		area, border = topology.flood([self.grid.index_of(*position)], linked)
+		stones = [j for j in area if get_index(j) is not None]
+		# Only the regions next to the toggled stones need updating, so stop _set_index forgetting them all
+		territory = self.territory
+		marked = territory.marked
+		territory.marked = False
+		self.apply_changes([(j, (player, new_state)) for j in stones])
+
+		if marked:
+			territory.marked = True
+			territory.update(stones)
+
+
+def is_live(value):
+	'''True if a point value is a live stone.'''
+	return value is not None and value[1] == STONE
+
+class Chain(object):
+	'''A set of connected live stones belonging to one player, as tracked by the board. `stones` and `liberties` are sets of point indices (see `geometry.Topology`). Only the board whose `_writer` is `writer` may change the chain; other boards sharing it clone it first.'''
+
+	__slots__ = ('owner', 'stones', 'liberties', 'writer')
+
+	def __init__(self, owner, writer=None):
+		self.owner = owner
+		self.stones = set()
+		self.liberties = set()
+		self.writer = writer
+
+class Region(object):
+	'''A connected area of empty points and dead stones, and the set of players whose live stones border it. The region belongs to its `owner` if there is only one such player.'''
+	def __init__(self, points, players):
+		self.points = points
+		self.players = players
+		if len(players) == 1:
+			self.owner = iter(players).next()
+		else:
+			self.owner = None
 
-			next = neighbours.pop()
+class Territory(object):
+	'''Keeps track of which player owns each point of a board.
 
-			# Don't check the same point twice
-			if next in checked:
-				continue
-			if next in stones:
-				continue
-			checked.append(next)
+	`mark` splits the empty points (including dead stones) into `Region` objects, visiting each point once, and gives each region to its owner. Once the territory has been marked, `update` keeps it correct as stones are marked dead or alive, by searching only the regions next to the stones that changed. `labels` maps each point index to its region, and `owners` to the player who owns it (or `None`). Points can also be given to a player one at a time with `set_owner`. The points owned by each player are kept in sets so they can be counted without scanning the board.'''
 
-			# Empty space signifies the border of the group
-			if self.get_point(next) is None:
+	def __init__(self, board):
+		self.board = board
+		self.clear()
+
+	def clear(self):
+		'''Forget all regions and owners.'''
+		self.labels = [None] * len(self.board.grid)
+		self.owners = [None] * len(self.board.grid)
+		self._points = {} # player -> set of indices
+		self.marked = False
+
+	def mark(self):
+		'''Find the empty regions of the board and mark each one as its owner's territory, replacing any previous markings.'''
+		self.clear()
+		self._label(xrange(len(self.board.grid)))
+		self.marked = True
+
+	def update(self, changed):
+		'''Update the territory after the points with the given indices have changed, e.g. by toggling stones between live and dead. Only the regions touching those points are searched again. If the territory hasn't been marked yet, the whole board is marked instead.'''
+		if not self.marked:
+			self.mark()
+			return
 
-				# Player territory is ok
-				if self.get_territory(next) is player:
-					neighbours.extend(self.neighbours(next))
+		# The regions touching the changed points may have been merged or split
+		adjacency = self.board.grid.topology.adjacency
+		regions = set()
+		for i in changed:
+			for j in adjacency[i] + (i,):
+				if self.labels[j] is not None:
+					regions.add(self.labels[j])
+
+		points = set(changed)
+		for region in regions:
+			points |= region.points
+
+		for j in points:
+			self.labels[j] = None
+			self.set_owner(j, None)
+		self._label(points)
+
+	def _label(self, indices):
+		'''Find the regions containing the given unlabelled points, and give them to their owners'''
+		grid = self.board.grid
+		get_index = grid.get_index
+		empty = lambda j: not is_live(get_index(j))
+
+		for i in indices:
+			if self.labels[i] is not None or not empty(i):
 				continue
-
-			owner,state = self.get_point(next)
-			if owner is player:
-				neighbours.extend(self.neighbours(next))
-
-				if state in (STONE, DEAD_STONE):
-					self.set_point(next,(player, new_state))
-
+			points, border = grid.topology.flood([i], empty)
+			region = Region(points, set(get_index(j)[0] for j in border))
+			for j in points:
+				self.labels[j] = region
+			if region.owner is not None:
+				for j in points:
+					self.set_owner(j, region.owner)
+
+	def set_owner(self, i, player):
+		'''Give the point with index `i` to a player, or make it neutral if `player` is `None`.'''
+		old = self.owners[i]
+		if old is not None:
+			self._points[old].discard(i)
+		if player is not None:
+			self._points.setdefault(player, set()).add(i)
+		self.owners[i] = player
+
+	def points(self, player):
+		'''The indices of the points owned by a player.'''
+		return self._points.get(player, ())
+
+	def count(self):
+		'''Return a dictionary containing the number of points owned by each player.'''
+		return dict((player, len(points)) for player, points in self._points.iteritems() if points)
 
 class Group:
 	'''A group of stones which are connected.'''
@@ -284,9 +620,14 @@ class Group:
 		self.stones = set() # list of positions of the stones
 		self.liberties = False
 		self.board = board
-		debug('using point '+str(position))
 		start_point = board.get_point(position)
-		if start_point is not None:
+		if is_live(start_point):
+			# Use the chain already tracked by the board
+			chain = board.chain(position)
+			self.owner = chain.owner
+			self.stones = set(board.grid.position_of(i) for i in chain.stones)
+			self.liberties = bool(chain.liberties)
+		elif start_point is not None:
 			self.owner = start_point[0]
 			self.stones.add(position)
 			self.find_connected_stones(position)
@@ -302,27 +643,25 @@ class Group:
 		return True
 
 	def find_connected_stones(self,position):
-		'''Recursively add stones which are connected to the starting stone, and check for liberties.'''
-		neighbours = self.board.neighbours(position)
-		for next in neighbours:
-			if next not in self.stones:
-				if self.board.is_empty(next):
-					self.liberties = True
-				elif self.board.get_point(next)[0] is self.owner:
-					self.stones.add(next)
-					self.find_connected_stones(next)
+		'''Add stones which are connected to the starting stone, and check for liberties.'''
+		grid = self.board.grid
+		get_index = grid.get_index
+		stones, border = grid.topology.flood([grid.index_of(*position)], lambda j: is_live(get_index(j)) and get_index(j)[0] is self.owner)
+		self.stones |= set(grid.position_of(j) for j in stones)
+		if any(not is_live(get_index(j)) for j in border):
+			self.liberties = True
 
 	def kill(self):
 		'''Remove the group from the board.'''
 		for position in self.stones:
-			debug('removed %s' % str(position))
+			debug('removed %s', position)
 			self.board.remove_stone(position)
 
 
 class RectangularBoard(Board):
-	'''Convenience class for creating regular rectangular boards.'''
+	'''Convenience class for creating regular rectangular boards. If `array_storage` is true, the points are stored in a `geometry.ArrayGrid`.'''
 
-	def __init__(self, size):
+	def __init__(self, size, array_storage=False):
 		try:
 			x,y = size
 		except:
@@ -333,8 +672,29 @@ class RectangularBoard(Board):
 			raise SizeError()
 
 		grid = RectangularGrid(x, y)
+		if array_storage:
+			grid = ArrayGrid(grid)
 		Board.__init__(self,grid)
 
+	@classmethod
+	def from_array(cls, planes, players, grid=None, **options):
+		'''Create a board from planes made by `to_array`, as with `Board.from_array`. If no grid is given, the points are stored as for the constructor, using the `array_storage` option, which can only be given as a keyword argument.'''
+		array_storage = options.pop('array_storage', False)
+		if options:
+			raise TypeError('Unknown options: %s' % ', '.join(options))
+		if grid is None:
+			grid = RectangularGrid(*planes.shape[-2:])
+			if array_storage:
+				grid = ArrayGrid(grid)
+		return Board.from_array.im_func(cls, planes, players, grid)
+
+	@classmethod
+	def _on_grid(cls, grid):
+		'''Create an empty board of this class on a grid, without building a grid of its own.'''
+		board = Board(grid)
+		board.__class__ = cls
+		return board
+
 	def get_size(self):
 		'''Number of points wide/tall the board is. This doesn't really have any use and is just intended for testing.'''
 		x1,y1,x2,y2 = self.grid.size()
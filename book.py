@@ -0,0 +1,319 @@
+#!/usr/bin/python
+'''Opening books: how often each move was played in the early positions of a collection of finished games, and how often the player who played it went on to win.
+
+Positions are stored under their symmetry-canonical keys (see `symmetry`), so a position is found however the board is rotated or reflected, and with the colours swapped as long as the player to move is swapped too. Moves are stored in the canonical orientation and turned back into moves on the real board when they are looked up.
+
+A book is built with a `BookBuilder` by streaming through archives of games, such as the JSON lines written by `selfplay`, one game at a time. Counts are kept in memory until there are `run_size` of them, then written to a temporary file as a sorted run; the runs are merged when the book is written, so only one run has to fit in memory however big the archives are.
+
+The book file is a header followed by two tables of fixed size records, both in little endian byte order:
+
+	positions
+		The key of each position, sorted, with the number of its first move record and its number of moves (`POSITION_FORMAT`).
+	moves
+		The index of each move (see `geometry.Topology`) in the canonical orientation, or `PASS` for a pass, the number of games it was played in and twice the number of those games won by the player who played it, with draws counting as half a win (`MOVE_FORMAT`).
+
+An `OpeningBook` memory maps the file, so opening it doesn't read the tables, and looks up positions with a binary search, which takes a few microseconds.
+
+Build a book from the top level directory with: python book.py games.jsonl --output book.bin
+'''
+import os
+import sys
+import json
+import mmap
+import heapq
+import struct
+import tempfile
+from argparse import ArgumentParser
+from game import Move
+from symmetry import SymmetryKeys, symmetries, inverse
+import multilogger
+
+MAGIC = 'GOBOOK01'
+HEADER_FORMAT = '<8s32sIII' # magic, board description, points, positions, moves
+POSITION_FORMAT = '<QII' # key, first move, number of moves
+MOVE_FORMAT = '<HII' # move index, games, half wins
+RUN_FORMAT = '<QHII' # key, move index, games, half wins, in the temporary runs
+
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+POSITION_SIZE = struct.calcsize(POSITION_FORMAT)
+MOVE_SIZE = struct.calcsize(MOVE_FORMAT)
+RUN_SIZE = struct.calcsize(RUN_FORMAT)
+
+PASS = 0xffff
+
+# Mixed into the keys of positions where the second colour is to move
+SECOND_TO_MOVE = 0x9e3779b97f4a7c15
+
+def position_key(hash_key, to_move):
+	'''The book key of a position from its canonical hash and the colour (0 or 1) of the player to move, after any colour swap.'''
+	return hash_key ^ SECOND_TO_MOVE if to_move else hash_key
+
+def canonical_position(keys, to_move):
+	'''Return the book key of a position tracked by a `symmetry.SymmetryKeys`, and the transform to the canonical orientation.'''
+	hash_key, transform, swapped = keys.canonical()
+	return position_key(hash_key, to_move ^ swapped), transform
+
+class BookBuilder(object):
+	'''Collects the moves played in the first `max_moves` moves of games on boards described by `spec` (see `selfplay.make_board`). Positions seen in fewer than `min_games` games are left out of the book.'''
+
+	def __init__(self, spec, max_moves=20, min_games=1, run_size=1000000):
+		import selfplay
+		self.spec = str(spec)
+		self.max_moves = max_moves
+		self.min_games = min_games
+		self.run_size = run_size
+		self._make_board = selfplay.make_board
+		self.points = len(self._make_board(spec).grid)
+		self.games = 0
+		self.skipped = 0
+		self._counts = {} # (key, move) -> [games, half wins]
+		self._runs = [] # temporary files of sorted runs
+
+	def add_game(self, moves, winner):
+		'''Add a game, given its moves (indices of points, or -1 or `None` for a pass) and the colour of the winner (0 for the first player, 1 for the second, `None` for a draw).'''
+		from playout import Colour
+		board = self._make_board(self.spec)
+		players = [Colour('first'), Colour('second')]
+		keys = board.track_symmetry(players)
+		counts = self._counts
+
+		for n, i in enumerate(moves[:self.max_moves]):
+			to_move = n % 2
+			key = canonical_position(keys, to_move)[0]
+			if i is None or i < 0:
+				move = PASS
+			else:
+				move = keys.canonical_index(i)
+			if winner is None:
+				half_wins = 1
+			else:
+				half_wins = 2 if winner == to_move else 0
+
+			count = counts.get((key, move))
+			if count is None:
+				counts[(key, move)] = [1, half_wins]
+			else:
+				count[0] += 1
+				count[1] += half_wins
+
+			if move != PASS:
+				played = Move(board.grid.position_of(i), players[to_move])
+				board.place_stone(played)
+				board.remove_dead_stones(played)
+
+		self.games += 1
+		if len(counts) >= self.run_size:
+			self._spill()
+
+	def add_record(self, record):
+		'''Add a game from a `selfplay` record. Games on other boards are skipped.'''
+		if record.get('board') != self.spec:
+			self.skipped += 1
+			return
+		self.add_game(record['moves'], record.get('winner'))
+
+	def add_archive(self, lines):
+		'''Add the games from an iterable of JSON lines, such as an open archive file. Lines are read one at a time.'''
+		for line in lines:
+			line = line.strip()
+			if line:
+				self.add_record(json.loads(line))
+
+	def _spill(self):
+		'''Write the counts so far to a temporary file, sorted, and forget them.'''
+		run = tempfile.TemporaryFile()
+		pack = struct.Struct(RUN_FORMAT).pack
+		for (key, move), (games, half_wins) in sorted(self._counts.iteritems()):
+			run.write(pack(key, move, games, half_wins))
+		run.seek(0)
+		self._runs.append(run)
+		debug('Wrote run %d of %d moves', len(self._runs), len(self._counts))
+		self._counts = {}
+
+	@staticmethod
+	def _read_run(run):
+		'''Iterate over the records of a temporary run.'''
+		unpack = struct.Struct(RUN_FORMAT).unpack
+		while True:
+			data = run.read(RUN_SIZE * 4096)
+			if not data:
+				return
+			for offset in xrange(0, len(data), RUN_SIZE):
+				key, move, games, half_wins = unpack(data[offset:offset + RUN_SIZE])
+				yield (key, move), (games, half_wins)
+
+	def _merged(self):
+		'''Iterate over the key of each position and a list of its `(move, games, half wins)`, in key order, merging the runs.'''
+		sources = [self._read_run(run) for run in self._runs]
+		sources.append(iter(sorted((k, tuple(v)) for k, v in self._counts.iteritems())))
+		current_key = None
+		moves = []
+		for (key, move), (games, half_wins) in heapq.merge(*sources):
+			if key != current_key:
+				if moves:
+					yield current_key, moves
+				current_key, moves = key, []
+			if moves and moves[-1][0] == move:
+				old_move, old_games, old_half_wins = moves[-1]
+				moves[-1] = (move, old_games + games, old_half_wins + half_wins)
+			else:
+				moves.append((move, games, half_wins))
+		if moves:
+			yield current_key, moves
+
+	def write(self, path):
+		'''Write the book to a file. Returns the number of positions written.'''
+		pack_position = struct.Struct(POSITION_FORMAT).pack
+		pack_move = struct.Struct(MOVE_FORMAT).pack
+		positions = 0
+		move_count = 0
+		move_table = tempfile.TemporaryFile()
+		with open(path, 'wb') as output:
+			output.write('\0' * HEADER_SIZE)
+			for key, moves in self._merged():
+				if sum(games for move, games, half_wins in moves) < self.min_games:
+					continue
+				output.write(pack_position(key, move_count, len(moves)))
+				for move in moves:
+					move_table.write(pack_move(*move))
+				positions += 1
+				move_count += len(moves)
+
+			move_table.seek(0)
+			while True:
+				data = move_table.read(1 << 20)
+				if not data:
+					break
+				output.write(data)
+			move_table.close()
+
+			output.seek(0)
+			output.write(struct.pack(HEADER_FORMAT, MAGIC, self.spec, self.points, positions, move_count))
+		for run in self._runs:
+			run.close()
+		self._runs = []
+		info('Wrote %d positions and %d moves from %d games to %s', positions, move_count, self.games, path)
+		return positions
+
+class BookError(Exception):
+	'''The file isn't an opening book.'''
+
+class OpeningBook(object):
+	'''An opening book file, memory mapped for fast lookups.'''
+
+	def __init__(self, path):
+		self._file = open(path, 'rb')
+		try:
+			self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		except ValueError:
+			self._file.close()
+			raise BookError('%s is empty' % path)
+		if len(self._map) < HEADER_SIZE:
+			self.close()
+			raise BookError('%s is too short' % path)
+		magic, spec, self.points, self.positions, self.moves = struct.unpack_from(HEADER_FORMAT, self._map)
+		if magic != MAGIC:
+			self.close()
+			raise BookError('%s is not an opening book' % path)
+		self.spec = spec.rstrip('\0')
+		import selfplay
+		try:
+			self.topology = selfplay.make_board(self.spec).grid.topology
+		except ValueError:
+			self.close()
+			raise BookError('%s is for an unknown board %r' % (path, self.spec))
+		self._moves_offset = HEADER_SIZE + self.positions * POSITION_SIZE
+
+	def close(self):
+		'''Close the file.'''
+		if getattr(self, '_map', None) is not None:
+			self._map.close()
+			self._map = None
+		self._file.close()
+
+	def __len__(self):
+		return self.positions
+
+	def find(self, key):
+		'''Return a list of the `(move, games, half wins)` stored for a position key, or an empty list if it isn't in the book.'''
+		data = self._map
+		unpack_from = struct.unpack_from
+		low, high = 0, self.positions
+		while low < high:
+			middle = (low + high) // 2
+			middle_key, first, count = unpack_from(POSITION_FORMAT, data, HEADER_SIZE + middle * POSITION_SIZE)
+			if middle_key < key:
+				low = middle + 1
+			elif middle_key > key:
+				high = middle
+			else:
+				offset = self._moves_offset + first * MOVE_SIZE
+				return [unpack_from(MOVE_FORMAT, data, offset + n * MOVE_SIZE) for n in xrange(count)]
+		return []
+
+	def lookup(self, board, players, player):
+		'''Return a list of the book moves for a player in a board's position, as tuples of the index of the point on the board (or `None` for a pass), the number of games it was played in and the fraction of those the player won. Most played moves come first. `players` are the two players in turn order. Boards with a different topology from the book's board (see `spec`) get an empty list.
+
+		If the board is tracking its symmetry for the same players (see `board.Board.track_symmetry`) the key is already known; otherwise it is worked out from the whole board.'''
+		if board.grid.topology != self.topology or len(players) != 2:
+			return []
+		keys = board.symmetry
+		if keys is None or keys.players != list(players):
+			keys = SymmetryKeys(board.grid, players)
+		key, transform = canonical_position(keys, list(players).index(player))
+		topology = board.grid.topology
+		back = symmetries(topology)[inverse(topology, transform)]
+
+		result = []
+		for move, games, half_wins in self.find(key):
+			i = None if move == PASS else back[move]
+			result.append((i, games, half_wins / (2.0 * games)))
+		result.sort(key=lambda m: m[1], reverse=True)
+		return result
+
+	def best_move(self, board, players, player, min_games=1):
+		'''Return the position of the most played book move for a player, or `None` if the position isn't in the book (or only passes are), or no move has been played in `min_games` games.'''
+		for i, games, win_rate in self.lookup(board, players, player):
+			if games < min_games:
+				break
+			if i is not None:
+				return board.grid.position_of(i)
+		return None
+
+def main(argv=None):
+	parser = ArgumentParser(description='Build an opening book from archives of games.')
+	parser.add_argument('archives', nargs='+', help='files of games as JSON lines, as written by selfplay.py (- for standard input)')
+	parser.add_argument('--output', required=True, help='the book file to write')
+	parser.add_argument('--board', help='board size, e.g. 9x9 (default: the board of the first game)')
+	parser.add_argument('--moves', type=int, default=20, help='number of moves of each game to add')
+	parser.add_argument('--min-games', type=int, default=1, help='leave out positions seen in fewer games than this')
+	args = parser.parse_args(argv)
+
+	builder = None
+	for path in args.archives:
+		archive = sys.stdin if path == '-' else open(path)
+		try:
+			for line in archive:
+				line = line.strip()
+				if not line:
+					continue
+				record = json.loads(line)
+				if builder is None:
+					builder = BookBuilder(args.board or record['board'], args.moves, args.min_games)
+				builder.add_record(record)
+		finally:
+			if archive is not sys.stdin:
+				archive.close()
+
+	if builder is None:
+		sys.stderr.write('No games found\n')
+		return 1
+	positions = builder.write(args.output)
+	sys.stderr.write('%d games (%d skipped), %d positions, %d bytes\n' % (builder.games, builder.skipped, positions, os.path.getsize(args.output)))
+	return 0
+
+# Get a logger for this module
+debug,info,warning,error = multilogger.logFunctions(__name__)
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -1,5 +1,7 @@
 '''This module provides a layer in between the GUI and the underlying game objects, which handles players' input.'''
-from observer import Observable
+import threading
+from copy import copy
+from observer import Observable, MOVE_PLAYED, STATE_CHANGED, TURN_CHANGED
 import game
 import player
 import multilogger
@@ -9,19 +11,22 @@ class Controller(Observable):
 
 General usage:
 
-1. Add players with `add_local_player` or `add_remote_player`, and then call `begin_game`.
+1. Add players with `add_local_player`, `add_remote_player` or `add_ai_player`, and then call `begin_game`.
 
-2. Local players play moves using `play_move`, `pass_turn` and `resign`. This will make the move for the appropriate player. The object will notify when it is one of the local players' turns. Remote players play moves through the game object seperately.
+2. Local players play moves using `play_move`, `pass_turn` and `resign`. This will make the move for the appropriate player. The object publishes `observer.TURN_CHANGED` after every move, saying whether it is one of the local players' turns. Remote players play moves through the game object seperately. Computer players (see `mcts.MCTSPlayer`) move as soon as it is their turn after a local move, and confirm dead stones straight away. If the controller is given a `post` function, which runs a function on the GUI thread later (e.g. `wx.CallAfter`), computer players search on a background thread and their moves are played through `post`, so the GUI keeps responding; otherwise they move before `play_move` returns.
 
 4. After each move the game object should notify it's listeners, at which point they can check whether the game state has changed.
 
 5. When the game state is `MARK_DEAD`, stones can be marked dead using toggle_dead, and confirmed using confirm_dead, for both local and remote players. Once all players have confirmed, the game will end.
 	'''
 
-	def __init__(self):
+	def __init__(self, post=None):
 		Observable.__init__(self)
+		self.post = post
+		self._search_thread = None
 		self.local_players = []
 		self.remote_players = []
+		self.ai_players = {} # player -> mcts.MCTSPlayer
 		self.accept_local_moves = False
 		self.game = None
 		self.confirmed_dead_stones_remote = set()
@@ -36,18 +41,76 @@ General usage:
 
 	def add_remote_player(self, team, name):
 		'''Add a remote player to the game.'''
-		pass
+		p = player.PlayerSettings(team, name)
+		p = player.Player(p)
+		self.remote_players.append(p)
+		return p
+
+	def add_ai_player(self, team, name, search=None, book=None):
+		'''Add a computer player to the game, which chooses its moves with `search`, an `mcts.MCTS` (by default one with the default settings), and `book`, a `book.OpeningBook`, if given. Computer players count as remote players.'''
+		import mcts
+		p = self.add_remote_player(team, name)
+		self.ai_players[p] = mcts.MCTSPlayer(p, search, book)
+		return p
+
+	def play_ai_moves(self):
+		'''Play moves for computer players until it's someone else's turn. In the `MARK_DEAD` state, the computer players confirm the dead stones.'''
+		if self.game is None:
+			return
+		while self.game.state == game.PLAY_GAME and self.game.next_player in self.ai_players:
+			if self.post is not None:
+				self._search_in_background()
+				return
+			self.ai_players[self.game.next_player].play(self.game)
+		if self.game.state == game.MARK_DEAD:
+			for p in self.ai_players:
+				if p not in self.confirmed_dead_stones_remote:
+					self.confirm_dead(local=False, player=p)
+
+	@property
+	def searching(self):
+		'''True while a computer player is choosing a move on a background thread.'''
+		return self._search_thread is not None
+
+	def _search_in_background(self):
+		'''Choose the next computer player's move on a background thread, with a copy of the board, and play it through `post`. The move is thrown away if the game has moved on in the meantime. The copy shares the game's `board.ZobristTable`, so hashes match the game's history and the search's transposition table; the table is safe to use from both threads.'''
+		if self._search_thread is not None:
+			return
+		ai = self.ai_players[self.game.next_player]
+		current = self.game
+		board = copy(current.board)
+		moves = len(current.moves)
+
+		def finish(position):
+			self._search_thread = None
+			if self.game is current and len(current.moves) == moves and current.next_player is ai.player:
+				ai.play_position(current, position)
+				self.play_ai_moves()
+
+		def search():
+			try:
+				position = ai.choose(board, current.history, list(current.players))
+			except Exception:
+				error('Search for %s failed', ai.player.name, exc_info=True)
+				self.post(setattr, self, '_search_thread', None)
+				return
+			self.post(finish, position)
+
+		self._search_thread = threading.Thread(target=search, name='AI search')
+		self._search_thread.daemon = True
+		self._search_thread.start()
 
 	def toggle_dead(self, pos):
 		'''Toggle whether a group of stones is alive or dead.'''
 		self.confirmed_dead_stones_remote = set()
 		self.confirmed_dead_stones = False
-		self.game.board.toggle_dead(pos)
+		self.game.toggle_dead(pos)
+		self.play_ai_moves()
 
 	def confirm_dead(self, local=True, player=None):
 		'''Confirm the currently selected dead stones.'''
 		if player is not None and not local:
-			debug('Confirmed dead stones for '+player.name)
+			debug('Confirmed dead stones for %s', player.name)
 			self.confirmed_dead_stones_remote.add(player)
 		elif not local:
 			raise Exception('confirm_dead called without player')
@@ -63,8 +126,9 @@ General usage:
 		'''Create a game between the players which have been added.'''
 
 		self.game = game.TwoPlayerGame(board,self.local_players+self.remote_players,fixed_handicap,komi,custom_handicap,ruleset)
-		self.game.register_listener(self.on_move)
+		self.game.register_listener(self.on_move, (MOVE_PLAYED, STATE_CHANGED))
 		self.on_move() # Needed to get the first "next player"
+		self.play_ai_moves()
 
 	def on_move(self, *args):
 		'''Callback function called whenever a move is played.'''
@@ -75,7 +139,7 @@ General usage:
 		else:
 			debug('not accepting local moves')
 			self.accept_local_moves = False
-		self.notify(self.accept_local_moves,player)
+		self.publish(TURN_CHANGED, self.accept_local_moves, player)
 
 	def play_move(self, position):
 		'''Play a move for the current player.'''
@@ -84,6 +148,7 @@ General usage:
 		player = self.game.next_player
 		if player in self.local_players:
 			self.game.play_move(position,player)
+			self.play_ai_moves()
 
 	def pass_turn(self):
 		'''Pass turn for the current player.'''
@@ -94,6 +159,7 @@ General usage:
 			debug('Pass')
 			self.game.pass_turn()
 			# TODO fix game to accept player for the pass/resign functions
+			self.play_ai_moves()
 
 	def resign(self):
 		'''Resign the current player.'''
@@ -103,6 +169,7 @@ General usage:
 		if player in self.local_players:
 			debug('Resign')
 			self.game.resign()
+			self.play_ai_moves()
 
 # Get a logger for this module
 debug,info,warning,error = multilogger.logFunctions(__name__)
@@ -13,7 +13,7 @@ There are four major stages to the game, represented by module level constants:
 		The game is over.
 '''
 
-from observer import Observable
+from observer import Observable, MOVE_PLAYED, STATE_CHANGED, SCORE_UPDATED
 from copy import copy
 import string
 import rules
@@ -49,23 +49,26 @@ class TwoPlayerGame(Observable):
 
 2. If the game ends with neither player resigning, the game state will change to `MARK_DEAD`.
 
-3. Mark any dead stones using the game's board object directly
+3. Mark any dead stones using toggle_dead. The territory and scores are kept up to date after each change.
 
 4. When all dead stones have been marked, call score to end the game (`GAME_OVER` state) and calculate who won.
+
+	Listeners can subscribe to the `observer.MOVE_PLAYED`, `observer.STATE_CHANGED` and `observer.SCORE_UPDATED` topics.
 	'''
 
 	def __init__(self,board,players=(),fixed_handicap=0,komi=0,custom_handicap=0,ruleset=None):
 
 		Observable.__init__(self)
 		self._board = board
-		self._testboard = None
+		self._changes = None
+		self.timer = None
 
 		if ruleset:
 			self.ruleset = ruleset
 		else:
 			self.ruleset = rules.AGARules()
 
-		self.history = [] # the board at all times in the past
+		self.history = History(board) # the board at all times in the past
 		self.moves = [] # the list of moves
 
 		if not players:
@@ -93,13 +96,29 @@ class TwoPlayerGame(Observable):
 	def start(self):
 		'''Start the game. All stones placed will henceforth be treated as regular moves and not handicap stones.'''
 		info('Starting game')
-		self.state = PLAY_GAME
+
+		# Handicap stones are part of the starting position
+		self.history = History(self.board, to_move=self.next_player)
+		self.change_state(PLAY_GAME)
 
 	def end(self):
 		if self.state != MARK_DEAD and self.winner is None:
-			self.state = MARK_DEAD
+			# Territory is updated incrementally from now on, as stones are marked dead
+			self.board.mark_territory()
+			self.update_scores()
+			self.change_state(MARK_DEAD)
 		else:
-			self.state = GAME_OVER
+			self.change_state(GAME_OVER)
+
+	def set_timer(self, timer):
+		'''Record the time taken by each phase of every move in a `timing.PhaseTimer`, shared with the ruleset. Pass `None` to stop.'''
+		self.timer = timer
+		self.ruleset.timer = timer
+
+	def change_state(self, state):
+		'''Move to a new stage of the game, and tell the listeners.'''
+		self.state = state
+		self.publish(STATE_CHANGED, state)
 
 	@property
 	def last_move(self):
@@ -117,6 +136,7 @@ class TwoPlayerGame(Observable):
 			raise NotYourTurnError
 
 		move = Move(position, player)
+		timer = self.timer
 
 		# Attempt to play the move
 		if self.state == PLAY_GAME:
@@ -133,11 +153,46 @@ class TwoPlayerGame(Observable):
 		elif self.state == PLAY_GAME:
 			# Save the board state and move for later
 			self.moves.append(move)
-			self.history.append(copy(self.board))
-
 			self.end_turn()
 
-		self.notify(move)
+			if timer: timer.start()
+			self.history.record(self.board, self._changes, self.next_player)
+			if timer: timer.lap('history')
+
+		if timer: timer.start()
+		self.publish(MOVE_PLAYED, move)
+		if timer: timer.lap('listeners')
+
+	def move_status(self, position, player=None):
+		'''Check whether a move can be played, without playing it or raising exceptions. Returns `rules.LEGAL` or the reason the move is illegal (see `rules.GoRules.move_status`). `player` defaults to the next player.'''
+		if player is None:
+			player = self.next_player
+		if self.state in (GAME_OVER, MARK_DEAD):
+			return rules.GAME_OVER
+		if player is not self.next_player:
+			return rules.NOT_YOUR_TURN
+		return self.ruleset.move_status(self.board, self.history, position, player)
+
+	def is_legal(self, position, player=None):
+		'''True if the move can be played. See `move_status`.'''
+		return self.move_status(position, player) == rules.LEGAL
+
+	def legal_moves(self, player=None):
+		'''Return a list of the positions where a player (by default the next player) can play now.'''
+		if player is None:
+			player = self.next_player
+		if self.state in (GAME_OVER, MARK_DEAD) or player is not self.next_player:
+			return []
+		return self.ruleset.legal_moves(self.board, self.history, player)
+
+	def try_move(self, position, player=None):
+		'''Play a move if it is legal. Returns `rules.LEGAL` if the move was played, otherwise the reason it is illegal; unlike `play_move`, no exception is raised.'''
+		if player is None:
+			player = self.next_player
+		status = self.move_status(position, player)
+		if status == rules.LEGAL:
+			self.play_move(position, player)
+		return status
 
 	def end_turn(self):
 		'''Check for game over and change player'''
@@ -192,7 +247,7 @@ class TwoPlayerGame(Observable):
 		self.moves.append(move)
 
 		self.end_turn()
-		self.notify(move)
+		self.publish(MOVE_PLAYED, move)
 
 	def resign(self):
 		'''Resign the game.'''
@@ -209,7 +264,7 @@ class TwoPlayerGame(Observable):
 
 		self.moves.append(move)
 		self.end()
-		self.notify(move)
+		self.publish(MOVE_PLAYED, move)
 
 	def player_territory(self, player):
 		'''The territory belonging to a player'''
@@ -219,16 +274,31 @@ class TwoPlayerGame(Observable):
 		'''The score for a player'''
 		return self.ruleset.score_player(player)
 
+	def update_scores(self):
+		'''Recalculate every player's score from the territory currently marked.'''
+		for player in self.players:
+			self.score_player(player)
+		self.publish(SCORE_UPDATED)
+
+	def toggle_dead(self, position):
+		'''Toggle whether the group at a position is dead, and update the scores. Only the territory next to the group is recalculated.'''
+		if self.state != MARK_DEAD:
+			raise GameError('Stones can only be marked dead when the game is over')
+
+		self.board.toggle_dead(position)
+		self.update_scores()
+
 	def score(self):
-		'''Score the game.'''
+		'''Score the game, using the territory kept up to date while dead stones were marked. The whole board is only marked if the territory hasn't been marked yet.'''
 		debug('Scoring')
-		self.board.mark_territory()
+		if not self.board.territory.marked:
+			self.board.mark_territory()
 
 		self.winner = max(self.players, key=self.score_player)
+		self.publish(SCORE_UPDATED)
 
 		debug('ending')
 		self.end()
-		self.notify(None)
 
 	@property
 	def active_players(self):
@@ -241,24 +311,86 @@ class TwoPlayerGame(Observable):
 		return self._game_state
 
 	def begin(self):
-		'''Start a transactional operation on the board'''
-		self._testboard = copy(self._board)
-	
+		'''Start a transactional operation on the board. Changes are made to the board directly and recorded in its undo journal.'''
+		self._changes = None
+		self._board.begin()
+
 	def rollback(self):
 		'''Revert a transactional operation on the board'''
-		self._testboard = None
+		self._board.rollback()
 
 	def commit(self):
 		'''Commit a transactional operation on the board'''
-		self._board = self._testboard
-		self._testboard = None
+		self._changes = self._board.commit()
 
 	@property
 	def board(self):
-		if self._testboard is None:
-			return self._board
+		return self._board
+
+
+class History(object):
+	'''The positions of the board over the course of a game. Rather than a copy of the board after every move, this stores the points changed by each move (the stone placed plus any captures), with a checkpoint every `checkpoint_interval` moves. A checkpoint is just the value of every point, the hash and the player to move; past positions are rebuilt on demand with `board_at`, which works out the chains and other derived state of the board from scratch.
+
+	Move number 0 is the starting position, and `len(history)` is the number of moves recorded. The hash of every position is kept so that repeated positions can be found without rebuilding any boards.'''
+
+	def __init__(self, board, checkpoint_interval=32, to_move=None):
+		self.checkpoint_interval = checkpoint_interval
+		self._template = copy(board) # a board of the right kind to rebuild positions on
+		self._checkpoints = {0: (board.values(), board.hash, to_move)} # move number -> (values, hash, player to move)
+		self._deltas = [None] # move number -> tuple of (index, value) pairs
+		self._hashes = [board.hash]
+		self._to_move = [to_move]
+		self._positions = {board.hash: [0]} # hash -> move numbers
+
+	def __len__(self):
+		return len(self._deltas) - 1
+
+	def __contains__(self, board):
+		'''True if the board matches any recorded position.'''
+		return any(board == self.board_at(n) for n in self.positions_with_hash(board.hash))
+
+	def record(self, board, changes=None, to_move=None):
+		'''Record the position after a move, and the player to move next. `changes` is the undo journal of the move (see `board.Board.commit`); if it is not given, a checkpoint is stored instead.'''
+		move_number = len(self._deltas)
+		if changes is None or move_number % self.checkpoint_interval == 0:
+			self._checkpoints[move_number] = (board.values(), board.hash, to_move)
+			delta = None
 		else:
-			return self._testboard
+			indices = set(i for i, old in changes)
+			delta = tuple((i, board.grid.get_index(i)) for i in indices)
+
+		self._deltas.append(delta)
+		self._hashes.append(board.hash)
+		self._to_move.append(to_move)
+		self._positions.setdefault(board.hash, []).append(move_number)
+
+	def hash_at(self, move_number):
+		'''The hash of the position after `move_number` moves.'''
+		return self._hashes[move_number]
+
+	def to_move_at(self, move_number):
+		'''The player to move after `move_number` moves, or `None` if it wasn't recorded.'''
+		return self._to_move[move_number]
+
+	def positions_with_hash(self, position_hash):
+		'''Move numbers of the positions with the given hash.'''
+		return self._positions.get(position_hash, ())
+
+	def board_at(self, move_number):
+		'''Rebuild the board as it was after `move_number` moves, starting from the nearest checkpoint.'''
+		if not 0 <= move_number < len(self._deltas):
+			raise IndexError('No such move in the history')
+
+		start = move_number
+		while start not in self._checkpoints:
+			start -= 1
+
+		values, position_hash, to_move = self._checkpoints[start]
+		board = copy(self._template)
+		board.restore(values, position_hash)
+		for delta in self._deltas[start+1:move_number+1]:
+			board.apply_changes(delta)
+		return board
 
 
 class Move:
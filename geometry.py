@@ -18,62 +18,134 @@ NB: Grid/lattice coordinates should all be integers. They are not intended to co
 # 4D: ???
 from itertools import izip
 import sys
-from observer import Observable
+import weakref
+from observer import Observable, POINTS_CHANGED
 import multilogger
 
+# Topologies which are in use, indexed by the shape they were built from
+_topologies = weakref.WeakValueDictionary()
+
+def shared_topology(key, build):
+	'''Return the topology for a grid shape described by `key`, which must be hashable. `build` is called to create the dictionary of connections the first time a shape is seen; after that every grid of the same shape shares one `Topology` object.'''
+	topology = _topologies.get(key)
+	if topology is None:
+		topology = Topology(build(), key)
+		_topologies[key] = topology
+	return topology
+
+class Topology(object):
+	'''The points of a grid and the lines connecting them, which never change once the grid has been created.
+	Each point is assigned a dense integer index (in sorted coordinate order), so that the grid can be walked using `adjacency` without hashing any coordinates.
+	Topologies are immutable and shared between grids and their copies - use `shared_topology` to get one.'''
+
+	def __init__(self, connections, key=None):
+		self.key = key
+		self.positions = tuple(sorted(connections))
+		self.index = dict((pos, i) for i, pos in enumerate(self.positions))
+		self.connections = dict((pos, tuple(neighbours)) for pos, neighbours in connections.iteritems())
+		self.adjacency = tuple(tuple(self.index[n] for n in self.connections[pos]) for pos in self.positions)
+
+		xs = [x for x, y in self.positions]
+		ys = [y for x, y in self.positions]
+		self.bounds = (min(xs), min(ys), max(xs), max(ys))
+		self._frozen = True
+
+	def __setattr__(self, name, value):
+		if getattr(self, '_frozen', False):
+			raise AttributeError('Topology objects are immutable')
+		object.__setattr__(self, name, value)
+
+	def __eq__(self, other):
+		return self is other or self.connections == other.connections
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __len__(self):
+		return len(self.positions)
+
+	def flood(self, starts, inside):
+		'''Find the connected region containing the point indices in `starts`. The region grows through every neighbouring point for which `inside(index)` is true.
+		Returns a tuple of two sets of indices: the points in the region, and the points bordering it. Each point is only tested once, and the search uses an explicit stack, so there is no limit on the size of the region.'''
+		adjacency = self.adjacency
+		region = set(starts)
+		border = set()
+		unchecked = list(region)
+		while unchecked:
+			for j in adjacency[unchecked.pop()]:
+				if j in region or j in border:
+					continue
+				if inside(j):
+					region.add(j)
+					unchecked.append(j)
+				else:
+					border.add(j)
+		return region, border
+
 class Grid(Observable):
 	'''A representation of a 2D grid with each point holding some value.
 	Stores the relative location of each point and the lines connecting them.
 	Lattice is a list of points representing the lattice structure the grid is based around.
 	Basis is a tuple of coordinates of the grid points relative to the lattice points.
-	Connections is a list of 4-tuples of the form (x1,y1,x2,y2) indicating how points in the basis are connected'''
+	Connections is a list of 4-tuples of the form (x1,y1,x2,y2) indicating how points in the basis are connected
+	The points and connections are kept in a shared `Topology`; only the values belong to the grid itself.
+	Listeners of `observer.POINTS_CHANGED` are called with the set of positions that changed. Between `begin_batch` and `end_batch` changes are collected, and listeners are called once at the end.'''
 
 	def __init__(self, lattice, basis, connections, default_value=None):
 		'''Store points and connections'''
 		Observable.__init__(self)
-		self.points = {}
-		self.connections = {}
-		self.xmax = -1000
-		self.ymax = -1000
-		self.xmin = 1000
-		self.ymin = 1000
+		self._changed = None
+		lattice_points = tuple(lattice.items())
+		key = (lattice_points, tuple(basis), tuple(connections))
+		self.topology = shared_topology(key, lambda: self._connect(lattice_points, basis, connections))
+		self.points = dict.fromkeys(self.topology.positions, default_value)
+
+	@staticmethod
+	def _connect(lattice, basis, connections):
+		'''Build the dictionary of connections for a grid'''
+		points = {}
 
-		for lx,ly in lattice.items():
+		for lx,ly in lattice:
 
 			# Add the points by superimposing the basis onto each lattice point
 			for b in basis:
 				bx, by = b
-				self.points[(lx+bx, ly+by)] = default_value
-				self.connections[(lx+bx, ly+by)] = []
-
-				self.xmin = min(self.xmin, lx+bx)
-				self.ymin = min(self.ymin, ly+by)
-				self.ymax = max(self.ymax, ly+by)
-				self.xmax = max(self.xmax, lx+bx)
+				points[(lx+bx, ly+by)] = []
 
 		# Now connect the points
-		for lx,ly in lattice.items():
+		for lx,ly in lattice:
 
 			try:
 				for c in connections:
 					cx1, cy1, cx2, cy2 = c
 					a = (lx+cx1, ly+cy1)
 					b = (lx+cx2, ly+cy2)
-					if a in self.points and b in self.points:
-						self.connections[a].append(b)
-						self.connections[b].append(a)
+					if a in points and b in points:
+						points[a].append(b)
+						points[b].append(a)
 			except KeyError:
 				raise Exception('Invalid connections')
+		return points
 
 	def __eq__(self, other):
-		return (self.points == other.points and self.connections == other.connections)
+		'''Grids are equal if they have the same topology and the same value at every index, however their values are stored.'''
+		if not isinstance(other, Grid):
+			return NotImplemented
+		if self.topology != other.topology:
+			return False
+		get_index = other.get_index
+		return all(self.get_index(i) == get_index(i) for i in xrange(len(self)))
+
+	def __ne__(self, other):
+		equal = self.__eq__(other)
+		return equal if equal is NotImplemented else not equal
 
 	def __len__(self):
 		return len(self.points)
 
 	def neighbours(self, x, y):
 		try:
-			return self.connections[(x,y)]
+			return self.topology.connections[(x,y)]
 		except KeyError:
 			raise Exception('Bad grid coordinates')
 
@@ -81,7 +153,15 @@ class Grid(Observable):
 		if (x,y) not in self.points:
 			raise Exception('Bad grid coordinates')
 		self.points[(x,y)] = val
-		self.notify() # Notify observers on changes
+		self._point_changed((x,y))
+
+	def __copy__(self):
+		'''Copy the values of the grid. The topology is shared with the original grid, and the new grid has no listeners.'''
+		new = shallow_copy(self)
+		Observable.__init__(new)
+		new._changed = None
+		new.points = dict(self.points)
+		return new
 
 	def get_point(self, x, y):
 		try:
@@ -96,10 +176,113 @@ class Grid(Observable):
 		return self.points.iterkeys()
 
 	def get_connections(self):
-		return self.connections.iteritems()
+		return self.topology.connections.iteritems()
 
 	def size(self):
-		return self.xmin,self.ymin,self.xmax,self.ymax
+		return self.topology.bounds
+
+	def index_of(self, x, y):
+		'''The index of the point at the given coordinates.'''
+		try:
+			return self.topology.index[(x,y)]
+		except KeyError:
+			raise Exception('Bad grid coordinates')
+
+	def position_of(self, i):
+		'''The coordinates of the point with the given index.'''
+		return self.topology.positions[i]
+
+	def get_index(self, i):
+		return self.points[self.topology.positions[i]]
+
+	def set_index(self, i, val):
+		position = self.topology.positions[i]
+		self.points[position] = val
+		self._point_changed(position)
+
+	def neighbour_indices(self, i):
+		return self.topology.adjacency[i]
+
+	def _point_changed(self, position):
+		'''Tell listeners that a point has changed, or remember it until the end of the batch.'''
+		if self._changed is not None:
+			self._changed.add(position)
+		elif self.listeners:
+			self.publish(POINTS_CHANGED, set([position]))
+
+	def begin_batch(self):
+		'''Collect changes to points instead of notifying listeners of each one.'''
+		if self._changed is not None:
+			raise Exception('A batch is already in progress')
+		self._changed = set()
+
+	def end_batch(self, discard=False):
+		'''Notify listeners once with the set of positions changed since `begin_batch`, unless there were none or `discard` is true. Returns the changed positions.'''
+		changed = self._changed
+		if changed is None:
+			raise Exception('No batch in progress')
+		self._changed = None
+		if changed and not discard:
+			self.publish(POINTS_CHANGED, changed)
+		return changed
+
+	@property
+	def batching(self):
+		'''True between `begin_batch` and `end_batch`.'''
+		return self._changed is not None
+
+class ArrayGrid(Grid):
+	'''A grid with the same topology and values as another grid, which stores its values in a flat list instead of a dictionary.
+	Coordinates are only translated to indices at the edges of the API. Code that already knows the indices can use `index_of`, `get_index`, `set_index` and `neighbour_indices` to skip the coordinate lookups completely.'''
+
+	def __init__(self, grid):
+		Observable.__init__(self)
+		self._changed = None
+		self.topology = grid.topology
+		self.values = [grid.get_point(x, y) for x, y in self.topology.positions]
+
+	def __eq__(self, other):
+		if not isinstance(other, ArrayGrid):
+			return Grid.__eq__(self, other)
+		return self.values == other.values and self.topology == other.topology
+
+	def __len__(self):
+		return len(self.values)
+
+	def __copy__(self):
+		'''Copy the values of the grid. The topology is shared with the original grid, and the new grid has no listeners.'''
+		new = shallow_copy(self)
+		Observable.__init__(new)
+		new._changed = None
+		new.values = self.values[:]
+		return new
+
+	def set_point(self, x, y, val):
+		try:
+			i = self.topology.index[(x,y)]
+		except KeyError:
+			raise Exception('Bad grid coordinates')
+		self.values[i] = val
+		self._point_changed((x,y))
+
+	def get_point(self, x, y):
+		try:
+			return self.values[self.topology.index[(x,y)]]
+		except KeyError:
+			raise Exception('Bad grid coordinates')
+
+	def get_points(self):
+		return izip(self.topology.positions, self.values)
+
+	def get_positions(self):
+		return iter(self.topology.positions)
+
+	def get_index(self, i):
+		return self.values[i]
+
+	def set_index(self, i, val):
+		self.values[i] = val
+		self._point_changed(self.topology.positions[i])
 
 class RectangularGrid(Grid):
 	'''A rectangular grid. Aspect ratio should be a natural number (horizontal spacing >= vertical spacing)'''
@@ -118,6 +301,12 @@ class FoldedGrid(RectangularGrid):
 
 	def __init__(self, width, height, aspect_ratio, joins = [], reverse_joins = []):
 		RectangularGrid.__init__(self, width, height, aspect_ratio)
+		key = (self.topology.key, tuple(map(tuple, joins)), tuple(map(tuple, reverse_joins)))
+		self.topology = shared_topology(key, lambda: self._fold(width, height, aspect_ratio, joins, reverse_joins))
+
+	def _fold(self, width, height, aspect_ratio, joins, reverse_joins):
+		'''Build the dictionary of connections for the folded grid, starting from the unfolded one'''
+		connections = dict((pos, list(neighbours)) for pos, neighbours in self.topology.connections.iteritems())
 
 		# Lists of coordinates making up each side
 		east = []
@@ -148,18 +337,28 @@ class FoldedGrid(RectangularGrid):
 			for sideA, sideB in joins:
 				# Zip the two sides together to get a tuple of tuples (coordinates) for each connected pair
 				for c1, c2 in izip(sides[sideA], sides[sideB]):
-					self.connections[c1].append(c2)
-					self.connections[c2].append(c1)
+					connections[c1].append(c2)
+					connections[c2].append(c1)
 
 			for sideA, sideB in reverse_joins:
 				# This time the second side is reversed!
 				for c1, c2 in izip(sides[sideA], reversed(sides[sideB])):
-					self.connections[c1].append(c2)
-					self.connections[c2].append(c1)
+					connections[c1].append(c2)
+					connections[c2].append(c1)
 
 		except KeyError:
 			raise Exception('Invalid value for join or reverse_join')
+		return connections
+
+class _EmptyClass:
+	pass
 
+def shallow_copy(obj):
+	'''Copy the attributes of an instance without calling its constructor or `__copy__` method.'''
+	new = _EmptyClass()
+	new.__class__ = obj.__class__
+	new.__dict__.update(obj.__dict__)
+	return new
 
 class RectangularLattice:
 	'''List of coordinates of points arranged in a grid'''
@@ -41,14 +41,15 @@ class PlayerPanel(wx.Panel):
 		self.SetSizer(playerSizer)
 		playerSizer.Fit(self) # Fit this panel to the minimum size of the sizer
 
-		controller.game.register_listener(self.UpdateScore)
+		controller.game.register_listener(self.UpdateCaptures, [observer.MOVE_PLAYED])
+		controller.game.register_listener(self.UpdateScore, [observer.SCORE_UPDATED])
 
-	def UpdateScore(self,move=None,*args):
-		if move:
-			self.captureDisplays[move.player].SetLabel(str(move.player.captures))
-		else:
-			for player in self.scoreDisplays.keys():
-				self.scoreDisplays[player].SetLabel(str(player.score))
+	def UpdateCaptures(self,move):
+		self.captureDisplays[move.player].SetLabel(str(move.player.captures))
+
+	def UpdateScore(self):
+		for player in self.scoreDisplays.keys():
+			self.scoreDisplays[player].SetLabel(str(player.score))
 
 class BoardView(wx.Panel):
 	'''Show the board using wxPython'''
@@ -60,11 +61,10 @@ class BoardView(wx.Panel):
 		self.colors = colors
 		self.game = game
 
-		# Assume that whenever a move is made, the board will change.
-		# This will trigger a full repaint.
-		# It would be quicker to listen for individual grid changes, and then do
-		# a partial repaint for each one, but this way is simpler :)
-		game.register_listener(self.BoardChanged)
+		# Repaint whenever points on the board change. The grid tells us once
+		# per move which points changed; this still triggers a full repaint,
+		# but it would be possible to repaint just those points.
+		self.grid.register_listener(self.BoardChanged, [observer.POINTS_CHANGED])
 		self.Bind(wx.EVT_PAINT, self.OnPaint)
 		self.Bind(wx.EVT_ERASE_BACKGROUND, self.OnPaintBg)
 
@@ -80,8 +80,8 @@ class BoardView(wx.Panel):
 		self.highlightColor = highlightColor
 
 		# Size of the board in grid spacings. Assumes an origin of 0,0
-		self.grid_width = max([x for x,y in self.grid.points])
-		self.grid_height = max([y for x,y in self.grid.points])
+		self.grid_width = max([x for x,y in self.grid.get_positions()])
+		self.grid_height = max([y for x,y in self.grid.get_positions()])
 
 		self.borderWidth = borderWidth # width of border in grid units
 		self.BoardChanged() # Make sure the board is drawn
@@ -131,7 +131,7 @@ class BoardView(wx.Panel):
 			gc.DrawEllipse(x-stoneSize/2, y-stoneSize/2, stoneSize, stoneSize)
 
 		# Draw stones / points
-		for p in self.grid.points:
+		for p in self.grid.get_positions():
 			x,y = p
 			value = self.grid.get_point(x,y)
 			x,y = self.GridToView(p)
@@ -201,9 +201,9 @@ class PlayableBoard(BoardView):
 		self.Bind(wx.EVT_LEFT_UP, self.MouseUp)
 		self.Bind(wx.EVT_LEFT_DOWN, self.MouseDown)
 		self.Bind(wx.EVT_MOTION, self.MouseMove)
-		self.controller.register_listener(self.GameUpdated)
+		self.controller.register_listener(self.GameUpdated, [observer.TURN_CHANGED])
 
-	def GameUpdated(self, accept_moves, *args):
+	def GameUpdated(self, accept_moves, player):
 		self._clicked = None
 		self._hover = None
 		self.Refresh()
@@ -247,7 +247,7 @@ class PlayableBoard(BoardView):
 			x,y = pos
 			self._clicked = pos,self.controller.game.next_player
 			self._hover = None
-			debug('clicked %d,%d' % pos)
+			debug('clicked %d,%d', *pos)
 			self.Refresh()
 
 	def MouseDownMark(self, event):
@@ -260,7 +260,7 @@ class PlayableBoard(BoardView):
 		if pos:
 			x,y = pos
 			self.controller.toggle_dead(pos)
-			debug('Toggled deadness of %d,%d' % pos)
+			debug('Toggled deadness of %d,%d', *pos)
 			self.Refresh()
 
 	def MouseMoveGame(self, event):
@@ -289,11 +289,11 @@ class PlayableBoard(BoardView):
 				self.Refresh()
 				return
 
-			debug('released at %d,%d' % (x,y))
+			debug('released at %d,%d', x, y)
 
 			if self.controller.accept_local_moves:
 				try:
-					debug('Playing %s,%s...' % pos)
+					debug('Playing %s,%s...', *pos)
 					self.controller.play_move(pos)
 				except game.NotYourTurnError:
 					debug('Not your turn')
@@ -335,17 +335,17 @@ class GamePanel(wx.Frame):
 		self.resignButton.Bind(wx.EVT_BUTTON, self.ResignButtonClick)
 		self.confirmButton.Bind(wx.EVT_BUTTON, self.ConfirmButtonClick)
 		self.CreateStatusBar()
+		self._status_state = None
 		self.UpdateStatus()
 
-		# Update status whenever the game state changes
-		self.game_controller.game.register_listener(self.UpdateStatus)
+		# Update status whenever a move is played or the game state changes
+		self.game_controller.game.register_listener(self.UpdateStatus, [observer.MOVE_PLAYED])
+		self.game_controller.game.register_listener(self.OnChangeState, [observer.STATE_CHANGED])
 
 		# Grey out pass/resign if it's not the player's go
-		self.game_controller.register_listener(self.OnChangePlayer)
-
-		self.game_controller.game.register_listener(self.OnChangeState)
+		self.game_controller.register_listener(self.OnChangePlayer, [observer.TURN_CHANGED])
 
-	def UpdateStatus(self,move=None,*args):
+	def UpdateStatus(self,move=None):
 		dialog = None
 		if move is None:
 			moveTxt = ''
@@ -370,17 +370,21 @@ class GamePanel(wx.Frame):
 			gameTxt = ''
 
 		self.SetStatusText(moveTxt+gameTxt)
-		if dialog:
+
+		# Only show the dialog the first time we see each state, not on every update (e.g. when toggling dead stones)
+		if dialog and self.game_controller.game.state != self._status_state:
 			dialog.ShowModal()
+		self._status_state = self.game_controller.game.state
 
-	def OnChangePlayer(self, accept_moves, *args):
+	def OnChangePlayer(self, accept_moves, player):
 		'''Enable pass/resign only if we accept moves'''
 		self.passButton.Enable(accept_moves)
 		self.resignButton.Enable(accept_moves)
 
-	def OnChangeState(self, move, *args):
+	def OnChangeState(self, state):
 		'''Show confirm button if we are marking dead stones'''
-		self.confirmButton.Enable(self.game_controller.game.state == game.MARK_DEAD)
+		self.UpdateStatus()
+		self.confirmButton.Enable(state == game.MARK_DEAD)
 
 	def ConfirmButtonClick(self,event):
 		self.game_controller.confirm_dead()
@@ -49,12 +49,12 @@ class NewGameWizard(wx.wizard.Wizard):
 	def Finish(self,event):
 		# Read game setup from the wizard pages
 		size = self.board.Size()
-		info('Size is '+str(size))
+		info('Size is %s', size)
 
 		grid = geometry.FoldedGrid(size[0],size[0],1,[('N','S'),('E','W')])
 
 		#Create game controller
-		game_controller = controller.Controller()
+		game_controller = controller.Controller(wx.CallAfter)
 		black = game_controller.add_local_player('black','Black player')
 		white = game_controller.add_local_player('white','White player')
 		game_controller.begin_game(board.Board(grid))
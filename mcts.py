@@ -0,0 +1,298 @@
+#!/usr/bin/python
+'''A computer player using Monte Carlo tree search.
+
+Each search plays many random games (see `playout`) from the current position, building a tree of the positions reached on the way. Moves are chosen down the tree with the UCT formula, which balances moves that have won often against moves that haven't been tried much, and the result of each playout is added to the statistics of every position it went through. The most visited move at the root is played.
+
+Positions are stored in a transposition table (see `transposition`), keyed by the Zobrist hash of the board and the player to move, so the same position reached by different move orders shares its statistics, and the tree is kept from one move to the next. The table has a fixed size and forgets the least recently used positions first, so a long game doesn't use more and more memory.
+
+Searches are limited by a number of playouts, a time limit, or both. With more than one process the search uses root parallelism: each worker process searches the same position independently, and the visits and wins of their root moves are added together and stored in the main transposition table. Workers are sent the board's Zobrist keys, so their hashes match the main process and positions from earlier in the game are avoided throughout their trees, and each worker keeps its own table from one move to the next.
+
+An `MCTSPlayer` plays for one of the players of a game; `controller.Controller.add_ai_player` sets one up. It can be given a `book.OpeningBook`, in which case moves are taken from the book without searching while the game is still in it.
+'''
+import math
+import random
+import timeit
+import os
+import multiprocessing
+from copy import copy
+from board import Board, ZobristTable
+from rules import AGARules, LEGAL
+from playout import Playout, Colour, is_eye
+from transposition import TranspositionTable
+import multilogger
+
+class Node(object):
+	'''The statistics for a position in the search. `wins` counts the playouts won by the player who moved into the position. `moves` is a list of `(index, captured, key)` tuples for the moves from the position, where `index` is `None` for a pass, or `None` until the position is expanded.'''
+
+	__slots__ = ('visits', 'wins', 'moves')
+
+	def __init__(self):
+		self.visits = 0
+		self.wins = 0.0
+		self.moves = None
+
+class Search(object):
+	'''A single threaded search, using the transposition table `table` of `Node` objects (by default a new `transposition.TranspositionTable`).'''
+
+	def __init__(self, table=None, ruleset=None, rand=None, exploration=1.0):
+		self.table = TranspositionTable() if table is None else table
+		self.ruleset = ruleset or AGARules()
+		self.rand = rand or random.Random()
+		self.exploration = exploration
+
+	def node(self, key):
+		'''Return the node for a key, adding it to the table if it's new.'''
+		node = self.table.get(key)
+		if node is None:
+			node = Node()
+			self.table.store(key, node)
+		return node
+
+	def expand(self, state, allowed=None):
+		'''List the moves from the current position of a playout: the legal moves which don't fill the player's own eyes, limited to the indices in `allowed` if it is given. If there are none, the only move is to pass.'''
+		player = state.player
+		board = state.board
+		next_turn = (state.turn + 1) % len(state.players)
+		candidates = state.empty if allowed is None else allowed
+		moves = []
+		for i in candidates:
+			if is_eye(board, i, player):
+				continue
+			status, captured, new_hash = self.ruleset.move_effect(board, i, player)
+			if status == LEGAL and new_hash not in state.seen:
+				moves.append((i, captured or None, (new_hash, next_turn)))
+		if not moves:
+			moves.append((None, None, (board.hash, next_turn)))
+		return moves
+
+	def select(self, node):
+		'''Choose a move from an expanded node, trying each move once before using UCT.'''
+		peek = self.table.peek
+		unvisited = []
+		best = None
+		best_value = -1
+		log_visits = math.log(max(node.visits, 1))
+		for move in node.moves:
+			child = peek(move[2])
+			if child is None or not child.visits:
+				unvisited.append(move)
+			elif not unvisited:
+				value = child.wins / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
+				if value > best_value:
+					best, best_value = move, value
+		if unvisited:
+			return self.rand.choice(unvisited)
+		return best
+
+	def iterate(self, board, players, turn, seen, komis, allowed=None):
+		'''Run one playout from the position, and update the statistics of the positions it passed through.'''
+		state = Playout(board, players, self.ruleset, self.rand)
+		state.turn = turn
+		state.seen = set(seen)
+
+		root_key = (state.board.hash, turn)
+		node = self.node(root_key)
+		path = [(node, turn)]
+		while not state.finished:
+			if node.moves is None:
+				node.moves = self.expand(state, allowed if node is path[0][0] else None)
+			if not node.visits:
+				break
+
+			i, captured, key = self.select(node)
+			if i is None:
+				state.pass_turn()
+			else:
+				state.play_at(i, captured)
+			node = self.table.get(key)
+			if node is None:
+				node = Node()
+				self.table.store(key, node)
+				path.append((node, state.turn))
+				break
+			path.append((node, state.turn))
+
+		scores = state.play()
+		totals = [scores[player] + komi for player, komi in zip(players, komis)]
+		best = max(totals)
+		winners = [n for n, total in enumerate(totals) if total == best]
+
+		for node, node_turn in path:
+			node.visits += 1
+			mover = (node_turn - 1) % len(players)
+			if mover in winners:
+				node.wins += 1.0 / len(winners)
+
+	def run(self, board, players, turn, seen=(), komis=None, allowed=None, playouts=None, seconds=None):
+		'''Search the position until `playouts` playouts have been played or `seconds` have passed. Returns a dictionary from the root move indices (or `None` for a pass) to their `(visits, wins)`.'''
+		if komis is None:
+			komis = [0] * len(players)
+		if playouts is None and seconds is None:
+			playouts = 1000
+		deadline = None if seconds is None else timeit.default_timer() + seconds
+		seen = set(seen)
+		seen.add(board.hash)
+
+		# The root may have been expanded deeper in an earlier search, where ko was checked against a different path
+		root = self.table.peek((board.hash, turn))
+		if root is not None:
+			root.moves = None
+
+		count = 0
+		while (playouts is None or count < playouts) and (deadline is None or timeit.default_timer() < deadline):
+			self.iterate(board, players, turn, seen, komis, allowed)
+			count += 1
+
+		root = self.table.peek((board.hash, turn))
+		if root is None:
+			return {}
+		stats = {}
+		for i, captured, key in root.moves or ():
+			child = self.table.peek(key)
+			if child is not None:
+				stats[i] = (child.visits, child.wins)
+		return stats
+
+# The players, Zobrist keys and search of a worker process, kept from one move to the next
+_worker = None
+
+def _search_worker(task):
+	'''Search a position in a worker process. The values of the grid and of the Zobrist keys in the task hold player numbers instead of players. The keys are the ones used by the board in the main process, so the hashes of the game's positions in `seen` match the worker's. Returns the worker's process id and the statistics of the root moves.'''
+	global _worker
+	grid, turn, seen, allowed, komis, keys, playouts, seconds, seed, exploration = task
+	if _worker is None or len(_worker[0]) != len(komis):
+		_worker = ([Colour('player %d' % n) for n in range(len(komis))], ZobristTable(), Search())
+	players, zobrist, search = _worker
+	zobrist.add_keys(((i, (players[n], kind)), key) for (i, (n, kind)), key in keys)
+	for i in xrange(len(grid)):
+		value = grid.get_index(i)
+		if value is not None:
+			grid.set_index(i, (players[value[0]], value[1]))
+	search.rand = random.Random(seed)
+	search.exploration = exploration
+	return os.getpid(), search.run(Board(grid, zobrist), players, turn, seen, komis, allowed, playouts, seconds)
+
+class MCTS(object):
+	'''Chooses moves with Monte Carlo tree search. Each move is searched for `playouts` playouts or `seconds` seconds, whichever comes first (either may be `None`), over `processes` processes. The transposition table is kept between moves; `table` can be a `transposition.TranspositionTable` shared with something else, or one with a different size.'''
+
+	def __init__(self, playouts=1000, seconds=None, processes=1, exploration=1.0, seed=None, ruleset=None, table=None):
+		self.playouts = playouts
+		self.seconds = seconds
+		self.processes = processes
+		self.exploration = exploration
+		self.rand = random.Random(seed)
+		self.ruleset = ruleset or AGARules()
+		self.search = Search(table, self.ruleset, self.rand, exploration)
+		self._pool = None
+
+	@property
+	def table(self):
+		'''The transposition table.'''
+		return self.search.table
+
+	def close(self):
+		'''Stop the worker processes, if there are any.'''
+		if self._pool is not None:
+			self._pool.terminate()
+			self._pool.join()
+			self._pool = None
+
+	def move_stats(self, board, history, players, player):
+		'''Search the position for a player, returning a dictionary from the indices of the moves at the root (or `None` for a pass) to their `(visits, wins)`.'''
+		turn = players.index(player)
+		komis = [getattr(p, 'komi', 0) for p in players]
+
+		# Ko at the root is checked against the whole game; deeper in the tree only against the positions on the way
+		allowed = [i for i in self.ruleset.legal_indices(board, history, player) if not is_eye(board, i, player)]
+		seen = set(history.hash_at(n) for n in range(len(history) + 1)) if history is not None else ()
+
+		if self.processes <= 1:
+			return self.search.run(board, players, turn, seen, komis, allowed, self.playouts, self.seconds)
+
+		# Root parallelism: send each worker the position and the Zobrist keys with players replaced by numbers
+		number = dict((id(p), n) for n, p in enumerate(players))
+		grid = copy(board.grid)
+		for i in xrange(len(grid)):
+			value = grid.get_index(i)
+			if value is not None:
+				grid.set_index(i, (number[id(value[0])], value[1]))
+		keys = [((i, (number[id(value[0])], value[1])), key) for (i, value), key in board.zobrist.keys() if id(value[0]) in number]
+		share = None if self.playouts is None else -(-self.playouts // self.processes)
+		tasks = [(grid, turn, seen, allowed, komis, keys, share, self.seconds, self.rand.getrandbits(32), self.exploration) for n in range(self.processes)]
+		if self._pool is None:
+			self._pool = multiprocessing.Pool(self.processes)
+
+		# A worker's statistics include its earlier searches, so when one process ran more than one task only its last result counts
+		results = {}
+		for pid, result in self._pool.map(_search_worker, tasks):
+			old = results.get(pid)
+			if old is None or sum(v for v, w in result.itervalues()) > sum(v for v, w in old.itervalues()):
+				results[pid] = result
+
+		stats = {}
+		for result in results.itervalues():
+			for i, (visits, wins) in result.iteritems():
+				old_visits, old_wins = stats.get(i, (0, 0.0))
+				stats[i] = (old_visits + visits, old_wins + wins)
+		self._store(board, players, player, stats)
+		return stats
+
+	def _store(self, board, players, player, stats):
+		'''Store the combined statistics of the root moves from the worker processes in the transposition table, so the table holds the result of the search, as it does for a single process search.'''
+		turn = players.index(player)
+		next_turn = (turn + 1) % len(players)
+		for i, (visits, wins) in stats.iteritems():
+			if i is None:
+				key = (board.hash, next_turn)
+			else:
+				key = (self.ruleset.move_effect(board, i, player)[2], next_turn)
+			node = self.search.node(key)
+			node.visits, node.wins = visits, wins
+		root = self.search.node((board.hash, turn))
+		root.visits = max(root.visits, sum(visits for visits, wins in stats.itervalues()))
+
+	def best_move(self, board, history, players, player):
+		'''Return the position of the best move for a player, or `None` to pass.'''
+		stats = self.move_stats(board, history, players, player)
+		if not stats:
+			return None
+		i = max(stats, key=lambda i: (stats[i][0], i is not None))
+		if i is None:
+			return None
+		return board.grid.position_of(i)
+
+class MCTSPlayer(object):
+	'''Plays the moves of one player in a game, using an `MCTS` search, or `book` (a `book.OpeningBook`) if it has a move for the position.'''
+
+	def __init__(self, player, search=None, book=None):
+		self.player = player
+		self.search = search or MCTS()
+		self.book = book
+
+	def choose(self, board, history, players):
+		'''Return the position of the move to play in a position, or `None` to pass. The game isn't changed, so this can be run on another thread with a copy of the game's board.'''
+		position = None
+		if self.book is not None and len(players) == 2:
+			position = self.book.best_move(board, players, self.player)
+			if position is not None and not self.search.ruleset.is_legal(board, history, position, self.player):
+				position = None
+		if position is None:
+			position = self.search.best_move(board, history, players, self.player)
+		return position
+
+	def play_position(self, game, position):
+		'''Play a move chosen by `choose`, or pass if it is `None`.'''
+		debug('%s plays %s', self.player.name, position)
+		if position is None:
+			game.pass_turn()
+		else:
+			game.play_move(position, self.player)
+
+	def play(self, game):
+		'''Play a move, or pass, if it's this player's turn.'''
+		if game.next_player is not self.player:
+			return
+		self.play_position(game, self.choose(game.board, game.history, game.players))
+
+# Get a logger for this module
+debug,info,warning,error = multilogger.logFunctions(__name__)
@@ -1,16 +1,68 @@
+'''Logging for the whole program. Every module gets its logging functions once, when it is imported:
+
+	debug,info,warning,error = multilogger.logFunctions(__name__)
+
+Logging is configured once, by the first call to `logFunctions` or by calling `setup` at startup. The functions for levels which are disabled do nothing at all, so calls to them cost no more than calling an empty function. Messages should be passed with their arguments, e.g. `debug('removed %s', position)`, so they are only formatted if they are actually logged.
+'''
 import logging
 import sys
 
-def setup():
-	'''Use the appropriate log level for the command line args supplied'''
-	logging.basicConfig(level=logging.DEBUG)
+# Names of the logging functions given to each module, and their levels
+LEVELS = (('debug', logging.DEBUG), ('info', logging.INFO), ('warning', logging.WARNING), ('error', logging.ERROR))
 
-def logFunctions(module):
-	setup()
+# Modules which have asked for logging functions, and the functions they were given
+_modules = {}
+
+# Level set by `setup`, or None if logging hasn't been configured yet
+_level = None
+
+def ignore(*args, **kwargs):
+	'''Logging function for a disabled level.'''
+	pass
 
+def command_line_level(argv=None):
+	'''The log level asked for on the command line with `--log-level=LEVEL` or `--debug`. Defaults to warnings and errors only.'''
+	if argv is None:
+		argv = sys.argv
+	level = logging.WARNING
+	for arg in argv:
+		if arg == '--debug':
+			level = logging.DEBUG
+		elif arg.startswith('--log-level='):
+			level = getattr(logging, arg.split('=',1)[1].upper(), level)
+	return level
+
+def setup(level=None):
+	'''Configure logging, using the level from the command line if none is given. Modules which already have logging functions get new ones for the new level.'''
+	global _level
+	if level is None:
+		level = command_line_level()
+	if _level is None:
+		logging.basicConfig(level=level)
+	logging.getLogger().setLevel(level)
+	_level = level
+
+	# Rebind the functions in modules which still use the ones we gave them
+	for module_name, functions in _modules.items():
+		module = sys.modules.get(module_name)
+		new_functions = _functions(module_name)
+		if module is not None:
+			for (name, level), old, new in zip(LEVELS, functions, new_functions):
+				if getattr(module, name, None) is old:
+					setattr(module, name, new)
+		_modules[module_name] = new_functions
+
+def _functions(module):
+	'''The logging functions for a module at the current log level.'''
 	if module == '__main__':
 		logger = logging.getLogger()
 	else:
 		logger = logging.getLogger(module)
+	return tuple(getattr(logger, name) if logger.isEnabledFor(level) else ignore for name, level in LEVELS)
 
-	return (logger.debug,logger.info,logger.warning,logger.error)
+def logFunctions(module):
+	'''Return the debug, info, warning and error functions for a module.'''
+	if _level is None:
+		setup()
+	functions = _modules[module] = _functions(module)
+	return functions
@@ -1,18 +1,228 @@
+'''Observer pattern with topics.
+
+Observables publish events on a topic, with some arguments. A listener can subscribe to a list of topics, in which case it is only called for events on those topics, or to everything, in which case it is called for every event (including ones sent with `Observable.notify`, which have no topic).
+
+Bound methods are held by a weak reference to their object, so registering a method of a window or a player doesn't keep it alive after everything else has forgotten about it. Other callables are held normally unless `weak` is set when they are registered.
+
+Listeners registered with an `EventQueue` are called on the queue's worker thread instead of inside `publish`, so a slow listener doesn't slow down whatever published the event. The queue is bounded, and what happens when it is full depends on the topic (see `EventQueue`). Listeners which touch a GUI still have to pass their work on to the GUI thread themselves (e.g. with `wx.CallAfter`).
+'''
+import weakref
+import threading
+from collections import deque
+from types import MethodType
+import multilogger
+
+# Topics, and the arguments listeners are called with
+MOVE_PLAYED = 'move played' # move
+STATE_CHANGED = 'state changed' # new state
+POINTS_CHANGED = 'points changed' # set of changed positions
+SCORE_UPDATED = 'score updated' # no arguments
+TURN_CHANGED = 'turn changed' # whether local moves are accepted, next player
+
+# Policies for queued events
+BLOCK = 'block' # wait for space in the queue
+DROP = 'drop' # throw the event away if the queue is full
+COALESCE = 'coalesce' # replace an event for the same listener that is still waiting
+
+def merge_sets(pending, new):
+	'''Coalesce two events whose only argument is a set, by taking the union of the sets.'''
+	return (pending[0] | new[0],)
+
+# Policies used by an `EventQueue` unless it is given others. Every move is delivered, but a listener that falls behind only sees the latest score and turn, and one event with all the points that changed.
+DEFAULT_POLICIES = {
+	MOVE_PLAYED: BLOCK,
+	STATE_CHANGED: BLOCK,
+	POINTS_CHANGED: merge_sets,
+	SCORE_UPDATED: COALESCE,
+	TURN_CHANGED: COALESCE,
+}
+
+class QueueFullError(Exception):
+	'''An event couldn't be queued because the queue is full and its worker isn't running, so waiting would never end.'''
+	pass
+
+class Subscription(object):
+	'''A reference to a listener and the topics it is interested in. `topics` is `None` for a listener which hears everything.'''
+
+	__slots__ = ('topics', 'queue', '_ref', '_func')
+
+	def __init__(self, listener, topics=None, weak=None, queue=None):
+		self.topics = None if topics is None else frozenset(topics)
+		self.queue = queue
+		self._func = None
+		target = getattr(listener, 'im_self', None)
+		if weak is None:
+			weak = target is not None
+
+		if not weak:
+			self._ref = lambda: listener
+		elif target is not None:
+			# Keep the function, and a weak reference to the object it's bound to
+			self._ref = weakref.ref(target)
+			self._func = listener.im_func
+		else:
+			self._ref = weakref.ref(listener)
+
+	def listener(self):
+		'''Return the listener, or `None` if it has been garbage collected.'''
+		target = self._ref()
+		if target is None or self._func is None:
+			return target
+		return MethodType(self._func, target, target.__class__)
+
+	def wants(self, topic):
+		'''True if the listener should be called for events on this topic.'''
+		return self.topics is None or topic in self.topics
+
 class Observable:
 	'''Implement observer pattern'''
 
 	def __init__(self):
 		self.listeners = []
 
-	def register_listener(self, listener):
-		self.listeners.append(listener) #this object has synasthaesia
+	def register_listener(self, listener, topics=None, weak=None, queue=None):
+		'''Call `listener` for events on any of the given topics, or for all events if no topics are given. If `weak` is true the listener is only weakly referenced; by default this is done for bound methods only. If an `EventQueue` is given, the listener is called by the queue's worker thread.'''
+		self.listeners.append(Subscription(listener, topics, weak, queue)) #this object has synasthaesia
 
 	def remove_listener(self, listener):
-		try:
-			self.listeners.remove(listener)
-		except ValueError:
-			pass
+		for subscription in self.listeners:
+			if subscription.listener() == listener:
+				self.listeners.remove(subscription)
+				return
+
+	def publish(self, topic, *args):
+		'''Call the listeners for a topic with the given arguments. Listeners which have been garbage collected are removed.'''
+		dead = False
+		for subscription in self.listeners[:]:
+			if subscription.wants(topic):
+				listener = subscription.listener()
+				if listener is None:
+					dead = True
+				elif subscription.queue is not None:
+					subscription.queue.put(subscription, topic, args)
+				else:
+					listener(*args)
+		if dead:
+			self.listeners = [s for s in self.listeners if s.listener() is not None]
 
 	def notify(self, *args):
-		for i in self.listeners:
-			i(*args)
+		'''Call the listeners which listen to everything, without a topic.'''
+		self.publish(None, *args)
+
+
+class EventQueue(object):
+	'''A bounded queue of events, which are passed to their listeners by a worker thread. Call `start` before publishing events, and `stop` when finished.
+
+	`policies` maps topics to what is done with an event when the queue is full:
+
+		`observer.BLOCK`
+			The publisher waits until there is space (backpressure).
+		`observer.DROP`
+			The event is thrown away, and counted in `dropped`.
+		`observer.COALESCE`
+			If the same listener already has an event on this topic waiting, its arguments are replaced by the new ones, whether or not the queue is full. Otherwise the publisher waits as for `BLOCK`.
+		A function
+			Coalesces like `COALESCE`, but the arguments are the result of calling the function with the waiting and new arguments (e.g. `merge_sets`).
+
+	Topics without a policy use `default`.
+
+	Before `start` and after `stop` nothing takes events off the queue, so instead of waiting, a publisher that would have to wait gets a `QueueFullError`. Dropping and coalescing work as usual. A listener publishing from the worker thread can't wait for itself either, and its events are queued even if the queue is full.'''
+
+	def __init__(self, maxsize=256, policies=DEFAULT_POLICIES, default=BLOCK):
+		self.maxsize = maxsize
+		self.policies = dict(policies)
+		self.default = default
+		self.dropped = 0
+		self.coalesced = 0
+		self._events = deque() # [subscription, topic, args] lists
+		self._waiting = {} # (subscription, topic) -> the list in _events
+		self._busy = False
+		self._running = False
+		self._thread = None
+		self._lock = threading.Condition()
+
+	def __len__(self):
+		return len(self._events)
+
+	def start(self):
+		'''Start the worker thread.'''
+		with self._lock:
+			if self._running:
+				return
+			self._running = True
+		self._thread = threading.Thread(target=self._work, name='EventQueue')
+		self._thread.daemon = True
+		self._thread.start()
+
+	def stop(self, flush=True):
+		'''Stop the worker thread, after delivering the events still in the queue unless `flush` is false.'''
+		with self._lock:
+			if not flush:
+				self._events.clear()
+				self._waiting.clear()
+			self._running = False
+			self._lock.notify_all()
+		if self._thread is not None and self._thread is not threading.current_thread():
+			self._thread.join()
+		self._thread = None
+
+	def join(self):
+		'''Wait until every event in the queue has been delivered.'''
+		with self._lock:
+			while (self._events or self._busy) and self._running:
+				self._lock.wait()
+
+	def put(self, subscription, topic, args):
+		'''Queue an event for a listener, following the policy for its topic.'''
+		policy = self.policies.get(topic, self.default)
+		with self._lock:
+			if policy != BLOCK and policy != DROP:
+				waiting = self._waiting.get((subscription, topic))
+				if waiting is not None:
+					waiting[2] = args if policy == COALESCE else policy(waiting[2], args)
+					self.coalesced += 1
+					return
+
+			if len(self._events) >= self.maxsize:
+				if policy == DROP:
+					self.dropped += 1
+					return
+				# Listeners publishing from the worker thread can't wait for themselves
+				while len(self._events) >= self.maxsize and self._running and threading.current_thread() is not self._thread:
+					self._lock.wait()
+				if len(self._events) >= self.maxsize and not self._running:
+					raise QueueFullError('%d events are waiting and the queue is not running' % len(self._events))
+
+			event = [subscription, topic, args]
+			self._events.append(event)
+			if policy != BLOCK and policy != DROP:
+				self._waiting[(subscription, topic)] = event
+			self._lock.notify_all()
+
+	def _work(self):
+		'''Deliver events until the queue is stopped.'''
+		while True:
+			with self._lock:
+				while not self._events and self._running:
+					self._lock.wait()
+				if not self._events:
+					return
+				subscription, topic, args = event = self._events.popleft()
+				if self._waiting.get((subscription, topic)) is event:
+					del self._waiting[(subscription, topic)]
+				self._busy = True
+				self._lock.notify_all()
+
+			try:
+				listener = subscription.listener()
+				if listener is not None:
+					listener(*args)
+			except Exception:
+				error('Listener for %s raised an exception', topic, exc_info=True)
+			finally:
+				with self._lock:
+					self._busy = False
+					self._lock.notify_all()
+
+# Get a logger for this module
+debug,info,warning,error = multilogger.logFunctions(__name__)
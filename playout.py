@@ -0,0 +1,170 @@
+#!/usr/bin/python
+'''Fast random playouts: games of random legal moves played to the end without a `game.TwoPlayerGame`, for AI players, stress testing and measuring the speed of the board code.
+
+A playout works on its own copy of a board, which has no listeners, and plays directly through `board.Board.place_stone` and `board.Board.remove_dead_stones`. Moves are checked with `rules.GoRules.move_effect`, and repeated positions are found from a set of position hashes instead of a `game.History`, so nothing is copied or logged per move.
+
+Players never fill their own eyes (empty points whose neighbours are all their own stones), so games come to an end: once a player has no other legal move they pass, and the playout stops after both players pass in a row. The result is scored by area: stones on the board plus territory found by `board.Board.mark_territory`, plus komi for the second player.
+
+Run from the top level directory to measure the number of playouts per second: python playout.py [size] [playouts]'''
+import random
+import sys
+import timeit
+from copy import copy
+from board import RectangularBoard, is_live
+from rules import AGARules, LEGAL
+from game import Move
+import multilogger
+
+class Colour(object):
+	'''A player in a playout, when no real players are given.'''
+	def __init__(self, team):
+		self.team = team
+
+	def __repr__(self):
+		return self.team
+
+def is_eye(board, i, player):
+	'''True if every neighbour of the point with index `i` is one of the player's live stones.'''
+	get_index = board.grid.get_index
+	for j in board.grid.topology.adjacency[i]:
+		value = get_index(j)
+		if not is_live(value) or value[0] is not player:
+			return False
+	return True
+
+class Playout(object):
+	'''A random game played out from a starting position. `players` are the players in turn order, starting with the next player to move. Moves are chosen with `rand`, a `random.Random`, so playouts can be repeated by seeding it.'''
+
+	def __init__(self, board, players, ruleset=None, rand=None, komi=0, max_moves=None):
+		self.board = copy(board)
+		self.players = list(players)
+		self.ruleset = ruleset or AGARules()
+		self.rand = rand or random.Random()
+		self.komi = komi
+		grid = self.board.grid
+		self.max_moves = max_moves if max_moves is not None else 3 * len(grid)
+		self.empty = [i for i in xrange(len(grid)) if not is_live(grid.get_index(i))]
+		self.seen = set([self.board.hash])
+		self.moves = [] # indices played, or None for a pass
+		self.turn = 0 # index of the next player
+		self.passes = 0 # passes in a row
+		self.scores = None
+
+	def is_eye(self, i, player):
+		'''True if every neighbour of the point is one of the player's stones.'''
+		return is_eye(self.board, i, player)
+
+	def choose(self, player):
+		'''Pick a random legal move which doesn't fill one of the player's eyes. Returns the index of the point and the stones it captures, or `None` if there is no such move.'''
+		candidates = self.empty[:]
+		rand = self.rand
+		board = self.board
+		move_effect = self.ruleset.move_effect
+		while candidates:
+			# Take a random candidate out of the list
+			k = int(rand.random() * len(candidates))
+			i = candidates[k]
+			candidates[k] = candidates[-1]
+			candidates.pop()
+
+			if self.is_eye(i, player):
+				continue
+			status, captured, new_hash = move_effect(board, i, player)
+			if status == LEGAL and new_hash not in self.seen:
+				return i, captured
+		return None
+
+	@property
+	def player(self):
+		'''The player whose turn it is.'''
+		return self.players[self.turn]
+
+	@property
+	def finished(self):
+		'''True once every player has passed in a row, or the move limit is reached.'''
+		return self.passes >= len(self.players) or len(self.moves) >= self.max_moves
+
+	def play_at(self, i, captured):
+		'''Play a stone for the player whose turn it is at the point with index `i`, which must be legal, capturing the given stones (see `rules.GoRules.move_effect`).'''
+		board = self.board
+		move = Move(board.grid.position_of(i), self.players[self.turn])
+		board.place_stone(move)
+		if captured:
+			board.remove_dead_stones(move)
+			self.empty.extend(captured)
+		self.empty.remove(i)
+		self.seen.add(board.hash)
+		self.moves.append(i)
+		self.passes = 0
+		self.turn = (self.turn + 1) % len(self.players)
+
+	def pass_turn(self):
+		'''Pass for the player whose turn it is.'''
+		self.moves.append(None)
+		self.passes += 1
+		self.turn = (self.turn + 1) % len(self.players)
+
+	def play_move(self):
+		'''Play a random move for the player whose turn it is. Returns false if the player passed.'''
+		choice = self.choose(self.players[self.turn])
+		if choice is None:
+			self.pass_turn()
+			return False
+		self.play_at(*choice)
+		return True
+
+	def play(self):
+		'''Play until every player passes in a row, or the move limit is reached. Returns the scores.'''
+		while not self.finished:
+			self.play_move()
+		return self.score()
+
+	def score(self):
+		'''Score the board by area, returning a dictionary of each player's score.'''
+		self.scores = area_score(self.board, self.players, self.komi)
+		return self.scores
+
+	def winner(self):
+		'''The player with the highest score, or `None` for a draw.'''
+		if self.scores is None:
+			self.score()
+		best = max(self.scores.itervalues())
+		winners = [player for player, score in self.scores.iteritems() if score == best]
+		return winners[0] if len(winners) == 1 else None
+
+def area_score(board, players, komi=0):
+	'''Score a board by area: each player's live stones plus the territory found by `board.Board.mark_territory`, with komi added for the last player. Returns a dictionary of scores.'''
+	board.mark_territory()
+	scores = dict((player, 0) for player in players)
+	for player, points in board.count_territory().iteritems():
+		scores[player] = scores.get(player, 0) + points
+	for position, value in board.points():
+		if is_live(value):
+			scores[value[0]] = scores.get(value[0], 0) + 1
+	scores[players[-1]] += komi
+	return scores
+
+def playout(board, players, **kwargs):
+	'''Play a random game from a position and return the scores. Keyword arguments are passed to `Playout`.'''
+	return Playout(board, players, **kwargs).play()
+
+def playouts_per_second(board, players, number=100, seed=0, **kwargs):
+	'''Play `number` playouts from a position, and return the rate and the average number of moves per playout.'''
+	rand = random.Random(seed)
+	moves = 0
+	start = timeit.default_timer()
+	for n in xrange(number):
+		game = Playout(board, players, rand=rand, **kwargs)
+		game.play()
+		moves += len(game.moves)
+	elapsed = timeit.default_timer() - start
+	return number / elapsed, float(moves) / number
+
+# Get a logger for this module
+debug,info,warning,error = multilogger.logFunctions(__name__)
+
+if __name__ == '__main__':
+	size = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+	number = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+	rate, moves = playouts_per_second(RectangularBoard((size, size)), (Colour('black'), Colour('white')), number, komi=7.5)
+	print '%dx%d: %.1f playouts/s, %.1f moves per playout' % (size, size, rate, moves)
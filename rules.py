@@ -1,10 +1,10 @@
 #!/usr/bin/python
 '''This module implements various rulesets which can be used to validate moves and score the game.'''
-from copy import copy
 import re
 import gameErrors
 import game
 import board
+from board import STONE, is_live
 import multilogger
 from abc import ABCMeta,abstractmethod
 from itertools import cycle
@@ -14,6 +14,15 @@ nine_star_points = ((3,7),(7,3),(3,3),(7,7),(5,5))
 thirteen_star_points = ((4,4), (9,9), (4,9), (9,4), (7,7),(4,7),(9,7),(7,4),(7,9))
 nineteen_star_points = ((4,4),(16,16),(4,16),(16,5),(10,10),(4,10),(16,10),(10,4),(16,4))
 
+# Results of checking a move with `GoRules.move_status` or `game.TwoPlayerGame.try_move`
+LEGAL = 0
+NONEXISTENT = 1
+OCCUPIED = 2
+SUICIDE = 3
+KO = 4
+NOT_YOUR_TURN = 5
+GAME_OVER = 6
+
 def score_japanese(player):
 	player.score = len(player.territory) + player.captures + player.komi
 
@@ -26,6 +35,7 @@ class GoRules(object):
 		object.__init__(self)
 		self._parameters = {}
 		self.errors = gameErrors.ErrorList() # List of rule violations encountered during a move
+		self.timer = None # timing.PhaseTimer for the phases of each move, if any
 
 	def setup(self, game):
 		'''Called at the beginning of the game. Handles things like fixed handicap and komi, and who goes first. Normally black goes first, unless there was a handicap.'''
@@ -80,14 +90,84 @@ class GoRules(object):
 
 	def check_suicide(self,position,board):
 		'''Check to see if the stone has any liberties.'''
-		group = board.group(position)
-		if not group.liberties:
+		if not board.liberty_count(position):
 			self.errors.fail('SuicideError')
 
+	def move_status(self, board, history, position, player):
+		'''Check whether a player can play a stone at a position, without raising exceptions or changing the board. Returns `LEGAL`, or the reason the move is illegal: `NONEXISTENT`, `OCCUPIED`, `SUICIDE` or `KO`.
+
+		Captures and suicide are worked out from the chains next to the point, and the hash of the new position from the stones it would capture. The move is only played out (and rolled back) if that hash matches an earlier position, to rule out a hash collision.'''
+		try:
+			i = board.grid.topology.index.get(tuple(position))
+		except TypeError:
+			i = None
+		if i is None:
+			return NONEXISTENT
+		return self._index_status(board, history, i, player)
+
+	def move_effect(self, board, i, player):
+		'''Work out what would happen if a player played at the point with index `i`, ignoring ko. Returns a tuple of the status (`LEGAL`, `OCCUPIED` or `SUICIDE`), the set of indices of the stones it would capture, and the hash of the position afterwards. The captures and hash are only worked out for legal moves. Captures and liberties come from `board.Board.capture_effect`.'''
+		grid = board.grid
+		value = grid.get_index(i)
+		if is_live(value):
+			return OCCUPIED, None, None
+
+		has_liberty, captured = board.capture_effect(i, player)
+		if not has_liberty:
+			return SUICIDE, None, None
+
+		key = board.zobrist.key
+		new_hash = board.hash ^ key(i, value) ^ key(i, (player, STONE))
+		for k in captured:
+			new_hash ^= key(k, grid.get_index(k))
+		return LEGAL, captured, new_hash
+
+	def _index_status(self, board, history, i, player):
+		'''The status of a move at the point with index `i`, which must exist.'''
+		status, captured, new_hash = self.move_effect(board, i, player)
+		if status != LEGAL or history is None or not history.positions_with_hash(new_hash):
+			return status
+
+		# Probably a repeated position; play the move to make sure
+		move = game.Move(board.grid.position_of(i), player)
+		board.begin()
+		try:
+			board.place_stone(move)
+			board.remove_dead_stones(move)
+			repeated = any(board == history.board_at(n) for n in history.positions_with_hash(board.hash))
+		finally:
+			board.rollback()
+		return KO if repeated else LEGAL
+
+	def is_legal(self, board, history, position, player):
+		'''True if a player can play a stone at a position. See `move_status`.'''
+		return self.move_status(board, history, position, player) == LEGAL
+
+	def legal_indices(self, board, history, player):
+		'''Iterate over the indices of the points where a player can play, in index order.'''
+		grid = board.grid
+		for i in xrange(len(grid)):
+			if not is_live(grid.get_index(i)) and self._index_status(board, history, i, player) == LEGAL:
+				yield i
+
+	def legal_moves(self, board, history, player):
+		'''Return a list of all the positions where a player can play, taking occupied points, suicide and ko into account.'''
+		position_of = board.grid.position_of
+		return [position_of(i) for i in self.legal_indices(board, history, player)]
+
+	def legal_mask(self, board, history, player):
+		'''Return the legal moves as an integer in which bit `i` is set if the point with index `i` (see `geometry.Topology`) is legal.'''
+		mask = 0
+		for i in self.legal_indices(board, history, player):
+			mask |= 1 << i
+		return mask
+
 	def check_ko(self,move,board,history):
-		'''Check to see if the move resets the board to any of its previous states.'''
-		if board in history:
-			self.errors.fail('KoError')
+		'''Check to see if the move resets the board to any of its previous states. Only past positions with the same hash are compared in full.'''
+		for move_number in history.positions_with_hash(board.hash):
+			if board == history.board_at(move_number):
+				self.errors.fail('KoError')
+				return
 
 
 class AGARules(GoRules):
@@ -103,28 +183,40 @@ class AGARules(GoRules):
 
 	def play_move(self, game, move):
 		'''Handle a normal game move by the current player.'''
+		timer = self.timer
+		if timer: timer.start()
 		self.errors.clear()
 		game.begin()
+		if timer: timer.lap('begin')
 
 		# Place the stone
 		try:
 			game.board.place_stone(move)
 		except board.BoardError as error:
 			self.errors.fail(error.__class__.__name__)
+			if timer: timer.lap('place_stone')
 			game.rollback()
+			if timer: timer.lap('rollback')
 			return
+		if timer: timer.lap('place_stone')
 
 		# Capture enemy stones
-		move.player.captures += game.board.remove_dead_stones(move)
+		captures = game.board.remove_dead_stones(move)
+		if timer: timer.lap('remove_dead_stones')
 
 		self.check_suicide(move.position, game.board)
+		if timer: timer.lap('check_suicide')
 		self.check_ko(move, game.board, game.history)
+		if timer: timer.lap('check_ko')
 
 		# Check for errors
 		if self.errors:
 			game.rollback()
+			if timer: timer.lap('rollback')
 		else:
 			game.commit()
+			move.player.captures += captures
+			if timer: timer.lap('commit')
 
 	def change_active_player(self, game):
 		'''N/A - teams not implemented yet'''
@@ -56,7 +56,7 @@ gameover - called after each turn. Must return true if the game is complete
 			method = getattr(self,'_handle_'+node.type)
 
 		except AttributeError:
-			warning('No handler "'+'_handle_'+node.type + '"')
+			warning('No handler "_handle_%s"', node.type)
 			return None
 
 		return method(node,game=None)
@@ -114,7 +114,7 @@ gameover - called after each turn. Must return true if the game is complete
 
 		if game is None:
 			if name in self.constants:
-				warning('value for '+name+' already exists')
+				warning('value for %s already exists', name)
 
 			self.constants[name] = value
 		else:
@@ -129,7 +129,7 @@ gameover - called after each turn. Must return true if the game is complete
 		try:
 			method = getattr(self,'_func_' + node.leaf)
 		except AttributeError:
-			error('no such function '+node.leaf)
+			error('no such function %s', node.leaf)
 
 		return method(node, game)
 
@@ -154,7 +154,7 @@ gameover - called after each turn. Must return true if the game is complete
 			value = self.constants[name]
 
 		if value is None:
-			error('variable '+name+' does not exist')
+			error('variable %s does not exist', name)
 
 		return value
 
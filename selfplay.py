@@ -0,0 +1,154 @@
+#!/usr/bin/python
+'''Self-play: many independent random games spread over a pool of worker processes, for generating large batches of games.
+
+Each game is described by a board, a seed and an engine, and is played entirely inside a worker process, which builds its own board. Only the compact record of the game is sent back, as soon as it is finished. Games don't depend on each other, so throughput grows with the number of processes until the machine runs out of cores.
+
+The engines are:
+
+	`playout`
+		A `playout.Playout`, which is the fastest.
+	`game`
+		A full `game.TwoPlayerGame`, choosing random moves from `game.TwoPlayerGame.legal_moves`, for testing the game code itself.
+
+Records are dictionaries with these keys:
+
+	`id`, `board`, `seed`, `engine`
+		The description of the game.
+	`moves`
+		Indices of the points played (see `geometry.Topology`), with -1 for a pass.
+	`scores`
+		The area score of each player, in turn order.
+	`winner`
+		The index of the winning player, or `None` for a draw.
+	`seconds`
+		How long the game took to play.
+
+Run from the top level directory with: python selfplay.py --games 1000 --board 9x9 --output games.jsonl'''
+import sys
+import json
+import random
+import timeit
+import multiprocessing
+from argparse import ArgumentParser
+from geometry import RectangularGrid, FoldedGrid
+from board import Board
+from playout import Playout, Colour, area_score, is_eye
+import multilogger
+
+ENGINES = ('playout', 'game')
+
+def make_board(spec):
+	'''Build a board from a description like "9x9" or "19x19-torus".'''
+	size, torus = spec, False
+	if spec.endswith('-torus'):
+		size, torus = spec[:-len('-torus')], True
+	width, height = [int(n) for n in size.split('x')]
+	if torus:
+		return Board(FoldedGrid(width, height, 1, [('N','S'),('E','W')]))
+	return Board(RectangularGrid(width, height))
+
+def play_playout(board, rand, komi):
+	'''Play a game with the playout engine, returning the moves, players and scores.'''
+	players = (Colour('black'), Colour('white'))
+	game = Playout(board, players, rand=rand, komi=komi)
+	scores = game.play()
+	return game.moves, players, scores
+
+def play_game(board, rand, komi):
+	'''Play a game through `game.TwoPlayerGame`, returning the moves, players and scores.'''
+	import game as game_module
+	game = game_module.TwoPlayerGame(board, komi=komi)
+	grid = board.grid
+	moves = []
+	while game.state == game_module.PLAY_GAME and len(moves) < 3 * len(grid):
+		player = game.next_player
+		candidates = [p for p in game.legal_moves() if not is_eye(board, grid.index_of(*p), player)]
+		if candidates:
+			position = rand.choice(candidates)
+			game.play_move(position, player)
+			moves.append(grid.index_of(*position))
+		else:
+			game.pass_turn()
+			moves.append(None)
+	return moves, game.players, area_score(board, game.players, komi)
+
+def play(task):
+	'''Play one game in a worker process. `task` is a tuple of the game id, board description, seed, engine and komi. Returns the record of the game.'''
+	game_id, spec, seed, engine, komi = task
+	start = timeit.default_timer()
+	board = make_board(spec)
+	rand = random.Random(seed)
+	if engine == 'playout':
+		moves, players, scores = play_playout(board, rand, komi)
+	elif engine == 'game':
+		moves, players, scores = play_game(board, rand, komi)
+	else:
+		raise ValueError('Unknown engine %r' % (engine,))
+
+	score_list = [scores[player] for player in players]
+	best = max(score_list)
+	winner = score_list.index(best) if score_list.count(best) == 1 else None
+	return {
+		'id': game_id,
+		'board': spec,
+		'seed': seed,
+		'engine': engine,
+		'moves': [-1 if i is None else i for i in moves],
+		'scores': score_list,
+		'winner': winner,
+		'seconds': timeit.default_timer() - start,
+	}
+
+def tasks(games, spec, seed=0, engine='playout', komi=7.5):
+	'''The tasks for a batch of games. Game n uses seed `seed + n`, so any game can be played again on its own.'''
+	for n in xrange(games):
+		yield (n, spec, seed + n, engine, komi)
+
+def run(games, spec, processes=None, seed=0, engine='playout', komi=7.5, chunksize=8):
+	'''Play a batch of games over a pool of `processes` worker processes (by default, one per core). Yields the records as the games finish, which isn't necessarily in order.'''
+	if processes == 1:
+		for task in tasks(games, spec, seed, engine, komi):
+			yield play(task)
+		return
+
+	pool = multiprocessing.Pool(processes)
+	try:
+		for record in pool.imap_unordered(play, tasks(games, spec, seed, engine, komi), chunksize):
+			yield record
+		pool.close()
+	except:
+		pool.terminate()
+		raise
+	finally:
+		pool.join()
+
+def main(argv=None):
+	parser = ArgumentParser(description='Play random games over several processes.')
+	parser.add_argument('--games', type=int, default=100, help='number of games to play')
+	parser.add_argument('--board', default='9x9', help='board size, e.g. 9x9 or 19x19-torus')
+	parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per core)')
+	parser.add_argument('--engine', choices=ENGINES, default='playout')
+	parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+	parser.add_argument('--komi', type=float, default=7.5)
+	parser.add_argument('--output', help='write the records to this file, one JSON object per line (default: standard output)')
+	args = parser.parse_args(argv)
+
+	output = open(args.output, 'w') if args.output else sys.stdout
+	start = timeit.default_timer()
+	count = 0
+	try:
+		for record in run(args.games, args.board, args.processes, args.seed, args.engine, args.komi):
+			output.write(json.dumps(record, separators=(',',':')) + '\n')
+			count += 1
+	finally:
+		if output is not sys.stdout:
+			output.close()
+	elapsed = timeit.default_timer() - start
+	sys.stderr.write('%d games in %.1fs: %.1f games/s\n' % (count, elapsed, count / elapsed))
+	return 0
+
+# Get a logger for this module
+debug,info,warning,error = multilogger.logFunctions(__name__)
+
+if __name__ == '__main__':
+	sys.exit(main())
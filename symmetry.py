@@ -0,0 +1,169 @@
+'''Symmetry-canonical position keys, so that positions which are the same up to rotation, reflection or swapping the colours share one key.
+
+A square board has 8 symmetries (the identity, 3 rotations and 4 reflections), and a rectangular one 4. A `SymmetryKeys` object hashes a position in every orientation at once, and optionally with the colours swapped as well, and the smallest of these hashes is the canonical key of the position. The transform that gives the canonical key says how to turn moves on the real board into moves on the canonical one and back (`map_index`, `map_position`, `inverse`).
+
+Transforms are numbered 0 to 7. `TRANSPOSE` (4) swaps x and y, and then `FLIP_X` (1) and `FLIP_Y` (2) reflect each axis; see `TRANSFORM_NAMES`. Only the transforms which map the grid onto itself, keeping its connections, are used, so a torus or any other unusual grid simply gets fewer symmetries.
+
+Unlike `board.ZobristTable`, the keys here don't depend on the player objects, only on each player's place in the list of players (their colour), and are generated from a fixed seed. So canonical keys are the same in every game and every process, and can be stored on disk (see `book`).
+
+Swapping the colours only gives the same position if the player to move is swapped too. Keys of positions where it matters who is to move should either list the players starting with the player to move (so the colours mean "to move" and "not to move", and a colour swap is automatically a change of player), or include who is to move, swapped when `canonical` says the colours were swapped.
+
+A `SymmetryKeys` object can be kept up to date as the board changes by attaching it to the board with `board.Board.track_symmetry`, which updates it alongside the board's own hash. `canonical_key` works out the key of a position from scratch.
+'''
+import random
+import weakref
+from board import STONE
+import multilogger
+
+IDENTITY = 0
+TRANSPOSE = 4
+FLIP_X = 1
+FLIP_Y = 2
+
+TRANSFORM_NAMES = ('identity', 'flip x', 'flip y', 'rotate 180', 'transpose', 'rotate 90', 'rotate 270', 'anti-transpose')
+
+# Seed for the keys, so that canonical keys are the same everywhere
+DEFAULT_SEED = 0x5ca1ab1e
+
+def transform_position(position, transform, bounds):
+	'''Apply a transform to a position on a grid with the given bounds (see `geometry.Grid.size`). The result may not be a point of the grid if it isn't square.'''
+	x1, y1, x2, y2 = bounds
+	u, v = position[0] - x1, position[1] - y1
+	width, height = x2 - x1, y2 - y1
+	if transform & TRANSPOSE:
+		u, v = v, u
+		width, height = height, width
+	if transform & FLIP_X:
+		u = width - u
+	if transform & FLIP_Y:
+		v = height - v
+	return (u + x1, v + y1)
+
+# Symmetries of each topology that has been used, and the keys for them
+_symmetries = weakref.WeakKeyDictionary()
+_point_keys = weakref.WeakKeyDictionary()
+_inverses = weakref.WeakKeyDictionary()
+
+def symmetries(topology):
+	'''Return a dictionary from each transform which maps the points of a `geometry.Topology` onto themselves, keeping the connections, to the permutation of point indices it gives: a tuple where item `i` is the index of the image of point `i`.'''
+	result = _symmetries.get(topology)
+	if result is not None:
+		return result
+
+	result = {}
+	index = topology.index
+	adjacency = topology.adjacency
+	for transform in range(8):
+		permutation = []
+		for position in topology.positions:
+			j = index.get(transform_position(position, transform, topology.bounds))
+			if j is None:
+				break
+			permutation.append(j)
+		else:
+			if all(sorted(permutation[j] for j in adjacency[i]) == sorted(adjacency[permutation[i]]) for i in xrange(len(permutation))):
+				result[transform] = tuple(permutation)
+	_symmetries[topology] = result
+	return result
+
+def inverse(topology, transform):
+	'''The transform which undoes `transform` on a topology.'''
+	inverses = _inverses.setdefault(topology, {})
+	if transform in inverses:
+		return inverses[transform]
+	permutation = symmetries(topology)[transform]
+	for other, other_permutation in symmetries(topology).iteritems():
+		if all(other_permutation[permutation[i]] == i for i in xrange(len(permutation))):
+			inverses[transform] = other
+			return other
+	raise ValueError('Transform %d has no inverse' % transform)
+
+def map_index(topology, i, transform):
+	'''The index of the point that the point with index `i` moves to under a transform.'''
+	return symmetries(topology)[transform][i]
+
+def map_position(grid, position, transform):
+	'''The position that a position on a grid moves to under a transform.'''
+	topology = grid.topology
+	return topology.positions[map_index(topology, topology.index[position], transform)]
+
+class SymmetryKeys(object):
+	'''Hashes of a position in every symmetric orientation, with and without the colours swapped (unless `colours` is false). `players` gives the colour of each player: their index in the list. Only two players can be swapped; with more, colours are never swapped.
+
+	Points are added and removed with `update`, which takes a few microseconds, so the hashes can be kept up to date as moves are played.'''
+
+	def __init__(self, grid, players, colours=True, seed=DEFAULT_SEED):
+		self.players = list(players)
+		self.colours = colours and len(self.players) == 2
+		self._permutations = symmetries(grid.topology)
+		self.transforms = sorted(self._permutations)
+		self._colour = dict((id(p), n) for n, p in enumerate(self.players))
+		self._point_keys = self._keys(grid.topology, seed)
+		self.hashes = [0] * len(self._variants())
+		for i in xrange(len(grid)):
+			self.update(i, None, grid.get_index(i))
+
+	def __copy__(self):
+		'''Copy the hashes, sharing the keys.'''
+		new = object.__new__(SymmetryKeys)
+		new.__dict__.update(self.__dict__)
+		new.hashes = list(self.hashes)
+		return new
+
+	def _variants(self):
+		'''The (transform, swapped) pairs, in the order of `hashes`.'''
+		swaps = (False, True) if self.colours else (False,)
+		return [(transform, swapped) for transform in self.transforms for swapped in swaps]
+
+	def _keys(self, topology, seed):
+		'''Work out, for each code (see `_code`) and point index, the keys to XOR into each of the hashes. The keys only depend on the topology, the seed, the number of players and `colours`, so they are worked out once for each combination.'''
+		codes = 2 * max(len(self.players), 2)
+		cache = _point_keys.setdefault(topology, {})
+		keys = cache.get((seed, codes, self.colours))
+		if keys is not None:
+			return keys
+
+		rand = random.Random(seed)
+		size = len(topology)
+		base = [[rand.getrandbits(64) for i in xrange(size)] for code in xrange(codes)]
+		permutations = symmetries(topology)
+		variants = self._variants()
+		# Swapping the colours of two players changes the colour bit of the code, and leaves the dead stone bit
+		keys = [[tuple(base[code ^ 2 if swapped else code][permutations[transform][i]] for transform, swapped in variants)
+			for i in xrange(size)] for code in xrange(codes)]
+		cache[(seed, codes, self.colours)] = keys
+		return keys
+
+	def _code(self, value):
+		'''A number for the value of a point: the colour of the player, times two, plus one for a dead stone.'''
+		return 2 * self._colour[id(value[0])] + (value[1] != STONE)
+
+	def update(self, i, old, value):
+		'''Update the hashes after the value of the point with index `i` changes from `old` to `value`.'''
+		if old is not None:
+			self.hashes = [h ^ k for h, k in zip(self.hashes, self._point_keys[self._code(old)][i])]
+		if value is not None:
+			self.hashes = [h ^ k for h, k in zip(self.hashes, self._point_keys[self._code(value)][i])]
+
+	def canonical(self):
+		'''Return the canonical key of the position, the transform that turns the board into the canonical orientation, and whether the colours were swapped.'''
+		best = min(xrange(len(self.hashes)), key=self.hashes.__getitem__)
+		transform, swapped = self._variants()[best]
+		return self.hashes[best], transform, swapped
+
+	def canonical_index(self, i):
+		'''The index of the point with index `i` on the canonical board. A symmetric position has more than one transform to the canonical orientation, and moves which are the same because of the symmetry (like the four 3-3 points on an empty board) give the same index.'''
+		best = min(self.hashes)
+		return min(self._permutations[transform][i] for (transform, swapped), h in zip(self._variants(), self.hashes) if h == best)
+
+	@property
+	def key(self):
+		'''The canonical key of the position.'''
+		return min(self.hashes)
+
+def canonical_key(board, players, colours=True):
+	'''Return the canonical key of a board's position, the transform to the canonical orientation, and whether the colours were swapped. See `SymmetryKeys`.'''
+	return SymmetryKeys(board.grid, players, colours).canonical()
+
+# Get a logger for this module
+debug,info,warning,error = multilogger.logFunctions(__name__)
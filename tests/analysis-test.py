@@ -0,0 +1,116 @@
+#!/usr/bin/python
+# Unit tests for analysis.py
+
+import unittest
+from board import *
+from analysis import *
+import analysis
+from geometry import Grid, RectangularGrid, ArrayGrid, RectangularLattice
+from game import Move
+
+class Player(object):
+	def __init__(self, bla):
+		self.bla = bla
+
+@unittest.skipIf(analysis.numpy is None, 'NumPy is not installed')
+class ArrayTest(unittest.TestCase):
+	def setUp(self):
+		self.black = Player('black')
+		self.white = Player('white')
+		self.players = [self.black, self.white]
+		self.board = RectangularBoard((5,4))
+		self.board.place_stone(Move((0,0),self.black))
+		self.board.place_stone(Move((1,0),self.white))
+		self.board.place_stone(Move((4,3),self.white))
+		self.board.set_point((2,2),(self.black,DEAD_STONE))
+
+	def testPlanes(self):
+		planes = self.board.to_array(self.players)
+		self.assertEquals(planes.shape, (3,5,4))
+		self.assertEquals(planes.dtype, analysis.numpy.int8)
+		self.assertEquals(planes[EMPTY].sum(), 16)
+		self.assertEquals(planes[PLAYER,0,0], 0)
+		self.assertEquals(planes[PLAYER,1,0], 1)
+		self.assertEquals(planes[PLAYER,4,3], 1)
+		self.assertEquals(planes[PLAYER,0,1], -1)
+		self.assertEquals(planes[DEAD,2,2], 1)
+		self.assertEquals(planes[DEAD].sum(), 1)
+
+	def testRoundTrip(self):
+		planes = self.board.to_array(self.players)
+		board = RectangularBoard.from_array(planes, self.players)
+		self.assertEquals(board, self.board)
+		self.assertEquals(board.grid, self.board.grid)
+		self.assertEquals(board.hash, board.zobrist.hash(board.grid))
+		board = Board.from_array(planes, self.players)
+		self.assertEquals(dict(board.points()), dict(self.board.points()))
+
+	def testGridArgument(self):
+		'''A grid passed to RectangularBoard.from_array is used as with Board.from_array'''
+		planes = self.board.to_array(self.players)
+		grid = ArrayGrid(RectangularGrid(5,4))
+		board = RectangularBoard.from_array(planes, self.players, grid)
+		self.assertTrue(board.grid is grid)
+		self.assertTrue(isinstance(board, RectangularBoard))
+		self.assertEquals(board, self.board)
+		board = RectangularBoard.from_array(planes, self.players, array_storage=True)
+		self.assertTrue(isinstance(board.grid, ArrayGrid))
+		self.assertEquals(board.grid, self.board.grid)
+		self.assertRaises(TypeError, RectangularBoard.from_array, planes, self.players, colour=True)
+
+	def testUnknownPlayer(self):
+		self.assertRaises(ValueError, self.board.to_array, [self.black])
+
+	def testNotRectangular(self):
+		'''A grid with a hole in the middle'''
+		lattice = RectangularLattice(3,3)
+		lattice.points.remove((1,1))
+		board = Board(Grid(lattice, ((0,0),), ((0,0,1,0), (0,0,0,1))))
+		self.assertRaises(BoardError, board.to_array, self.players)
+
+	def testStoneCounts(self):
+		planes = self.board.to_array(self.players)
+		self.assertEquals(list(stone_counts(planes, 2)), [1,2])
+		self.assertEquals(list(stone_counts(planes, 2, include_dead=True)), [2,2])
+		batch = stack_boards([self.board, RectangularBoard((5,4))], self.players)
+		self.assertEquals(stone_counts(batch, 2).tolist(), [[1,2],[0,0]])
+
+	def testLabelRegions(self):
+		board = RectangularBoard((5,5))
+		for y in range(5):
+			board.place_stone(Move((2,y),self.black))
+		labels = label_regions(board.to_array(self.players))
+		self.assertEquals(set(labels[0:2].flat), set([1]))
+		self.assertEquals(set(labels[2].flat), set([0]))
+		self.assertEquals(set(labels[3:5].flat), set([16]))
+
+		# On a torus the two sides join up
+		labels = label_regions(board.to_array(self.players), wrap=True)
+		self.assertEquals(set(labels[3:5].flat), set([1]))
+
+	def testLegalArray(self):
+		from rules import AGARules
+		legal = legal_array(AGARules(), self.board, None, self.black)
+		self.assertEquals(legal.shape, (5,4))
+		self.assertFalse(legal[0,0])
+		self.assertTrue(legal[2,2]) # dead stone
+		self.assertEquals(legal.sum(), 17)
+
+	def testInfluence(self):
+		planes = RectangularBoard((5,5)).to_array(self.players)
+		planes[EMPTY,2,2] = 0
+		planes[PLAYER,2,2] = 1
+		field = influence(planes, 2, decay=0.5, steps=1)
+		self.assertEquals(field.shape, (2,5,5))
+		self.assertEquals(field[0].sum(), 0)
+		self.assertEquals(field[1,2,2], 1)
+		self.assertEquals(field[1,2,3], 0.5)
+		self.assertEquals(field[1,0,0], 0)
+
+def suite():
+	suite1 = unittest.makeSuite(ArrayTest)
+	alltests = unittest.TestSuite((suite1))
+	return alltests
+
+if __name__ == "__main__":
+	unittest.main()
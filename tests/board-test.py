@@ -242,10 +242,296 @@ class GroupTest(BoardTest):
 	def testTerritoryDeadStones(self):
 		pass
 
+	def testToggleUpdatesTerritory(self):
+		'''Check toggling a group updates the territory around it to match a full recount'''
+		# b w .
+		# b w .
+		# w w .
+		for pos in ((0,0),(0,1)):
+			self.board.place_stone(Move(pos,self.black))
+		for pos in ((1,0),(1,1),(0,2),(1,2)):
+			self.board.place_stone(Move(pos,self.white))
+		self.board.mark_territory()
+		self.board.toggle_dead((0,0))
+		self.assertTrue(self.board.get_territory((0,1)) is self.white)
+		expected = copy.copy(self.board)
+		expected.mark_territory()
+		self.assertEquals(self.board.territory.owners, expected.territory.owners)
+
+		self.board.toggle_dead((0,1))
+		self.assertTrue(self.board.get_territory((0,0)) is None)
+		self.assertEquals(self.board.get_point((0,0)), (self.black,STONE))
+
+	def testStonesPlayedAfterMarking(self):
+		'''Check the territory is forgotten when stones change after it was marked, so toggling dead stones doesn't update the old regions'''
+		self.board = RectangularBoard((4,4))
+		self.board.place_stone(Move((1,0),self.black))
+		self.board.mark_territory()
+		for pos in ((0,1),(1,1),(2,0)):
+			self.board.place_stone(Move(pos,self.black))
+		self.board.place_stone(Move((3,3),self.white))
+		self.assertFalse(self.board.territory.marked)
+		self.assertTrue(self.board.get_territory((0,0)) is None)
+
+		self.board.toggle_dead((3,3))
+		self.assertTrue(self.board.get_territory((3,2)) is None)
+		self.board.mark_territory()
+		self.assertTrue(self.board.get_territory((3,3)) is self.black)
+		self.assertTrue(self.board.get_territory((0,0)) is self.black)
+
+	def testCountTerritory(self):
+		# . b w .
+		# b b w w
+		self.board = RectangularBoard((4,4))
+		for pos in ((0,1),(1,0),(1,1)):
+			self.board.place_stone(Move(pos,self.black))
+		for pos in ((2,0),(2,1),(3,1)):
+			self.board.place_stone(Move(pos,self.white))
+		self.board.mark_territory()
+		self.assertEquals(self.board.count_territory(), {self.black:1, self.white:1})
+		self.assertEquals(self.board.player_territory(self.black), [(0,0)])
+		self.assertEquals(self.board.player_territory(self.white), [(3,0)])
+
+	def testEmptyBoardTerritory(self):
+		'''The whole empty board is a single neutral region'''
+		self.board.mark_territory()
+		regions = set(self.board.territory.labels)
+		self.assertEquals(len(regions), 1)
+		self.assertEquals(len(regions.pop().points), 361)
+		self.assertEquals(self.board.count_territory(), {})
+
+	def testNeutralRegionLabelled(self):
+		'''Check every point of a region bordering both players is labelled, not just the points searched before the second player was found'''
+		self.board.place_stone(Move((0,0),self.black))
+		self.board.place_stone(Move((18,18),self.white))
+		self.board.mark_territory()
+		labels = self.board.territory.labels
+		self.assertTrue(labels[0] is None)
+		self.assertEquals(len(set(labels) - set([None])), 1)
+		self.assertEquals(len(labels[1].points), 359)
+		self.assertTrue(labels[1].owner is None)
+
+	def testSetTerritory(self):
+		self.board.set_territory((0,1),self.black)
+		self.assertTrue(self.board.get_territory((0,1)) is self.black)
+		self.board.set_territory((0,1),self.white)
+		self.assertEquals(self.board.count_territory(), {self.white:1})
+		self.board.reset_territory()
+		self.assertTrue(self.board.get_territory((0,1)) is None)
+		self.assertTrue(self.board.get_territory((-1,1)) is None)
+
+class HashTest(BoardTest):
+	def testEmptyBoard(self):
+		self.assertEquals(self.board.hash, 0)
+
+	def testPlaceAndRemove(self):
+		self.board.place_stone(Move((3,3),self.black))
+		self.assertNotEquals(self.board.hash, 0)
+		self.board.remove_stone((3,3))
+		self.assertEquals(self.board.hash, 0)
+
+	def testMoveOrder(self):
+		board2 = copy.copy(self.board)
+		self.board.place_stone(Move((3,3),self.black))
+		self.board.place_stone(Move((4,4),self.white))
+		board2.place_stone(Move((4,4),self.white))
+		board2.place_stone(Move((3,3),self.black))
+		self.assertEquals(self.board.hash, board2.hash)
+		self.assertEquals(self.board, board2)
+
+	def testDifferentPositions(self):
+		board2 = copy.copy(self.board)
+		self.board.place_stone(Move((3,3),self.black))
+		board2.place_stone(Move((3,3),self.white))
+		self.assertNotEquals(self.board.hash, board2.hash)
+		self.assertFalse(self.board == board2)
+
+	def testDeadStones(self):
+		self.board.place_stone(Move((0,0),self.black))
+		alive = self.board.hash
+		self.board.toggle_dead((0,0))
+		self.assertNotEquals(self.board.hash, alive)
+		self.board.toggle_dead((0,0))
+		self.assertEquals(self.board.hash, alive)
+
+	def testKeysFromThreads(self):
+		'''Check two threads asking for new keys at the same time get the same ones'''
+		import threading
+		zobrist = ZobristTable()
+		keys = [{}, {}]
+		def generate(n):
+			for i in xrange(20000):
+				keys[n][i] = zobrist.key(i, (self.black, STONE))
+		threads = [threading.Thread(target=generate, args=(n,)) for n in (0, 1)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEquals(keys[0], keys[1])
+
+class TransactionTest(BoardTest):
+	def testRollback(self):
+		'''Check a capture is undone by rolling back'''
+		self.board.place_stone(Move((0,0),self.black))
+		self.board.place_stone(Move((1,0),self.white))
+		before = copy.copy(self.board)
+		self.board.begin()
+		move = Move((0,1),self.white)
+		self.board.place_stone(move)
+		self.assertEquals(self.board.remove_dead_stones(move), 1)
+		self.board.rollback()
+		self.assertEquals(self.board, before)
+		self.assertEquals(self.board.hash, before.hash)
+		self.assertEquals(self.board.get_point((0,0)), (self.black,STONE))
+
+	def testCommit(self):
+		self.board.begin()
+		self.board.place_stone(Move((0,0),self.black))
+		self.board.commit()
+		self.assertEquals(self.board.get_point((0,0)), (self.black,STONE))
+		self.assertRaises(BoardError, self.board.rollback)
+
+	def testNestedBegin(self):
+		self.board.begin()
+		self.assertRaises(BoardError, self.board.begin)
+
+class NotificationTest(BoardTest):
+	def setUp(self):
+		BoardTest.setUp(self)
+		self.events = []
+		self.board.grid.register_listener(self.events.append)
+
+	def testSinglePoint(self):
+		self.board.place_stone(Move((0,0),self.black))
+		self.assertEquals(self.events, [set([(0,0)])])
+
+	def testCaptureCommit(self):
+		'''Check a capture sends one event with every changed point'''
+		self.board.place_stone(Move((0,0),self.black))
+		self.board.place_stone(Move((0,1),self.black))
+		self.board.place_stone(Move((1,0),self.white))
+		self.board.place_stone(Move((1,1),self.white))
+		del self.events[:]
+		self.board.begin()
+		move = Move((0,2),self.white)
+		self.board.place_stone(move)
+		self.board.remove_dead_stones(move)
+		self.assertEquals(self.events, [])
+		self.board.commit()
+		self.assertEquals(self.events, [set([(0,0),(0,1),(0,2)])])
+
+	def testRollback(self):
+		self.board.begin()
+		self.board.place_stone(Move((0,0),self.black))
+		self.board.rollback()
+		self.assertEquals(self.events, [])
+
+	def testApplyChanges(self):
+		self.board.apply_changes([(0, (self.black,STONE)), (1, (self.white,STONE))])
+		self.assertEquals(len(self.events), 1)
+
+class ChainTest(BoardTest):
+	def testLibertiesCorner(self):
+		'''Check the number of liberties of a chain is correct for a corner chain'''
+		self.board.place_stone(Move((0,0),self.black))
+		self.board.place_stone(Move((0,1),self.black))
+		self.board.place_stone(Move((0,2),self.black))
+		self.assertEquals(self.board.liberty_count((0,0)), 4)
+
+	def testLibertiesSide(self):
+		'''Check the number of liberties of a chain is correct for a side chain'''
+		self.board.place_stone(Move((0,3),self.black))
+		self.board.place_stone(Move((0,1),self.black))
+		self.board.place_stone(Move((0,2),self.black))
+		self.assertEquals(self.board.liberty_count((0,3)), 5)
+
+	def testLibertiesCenter(self):
+		'''Check the number of liberties of a chain is correct for a center chain'''
+		self.board.place_stone(Move((2,4),self.black))
+		self.board.place_stone(Move((2,2),self.black))
+		self.board.place_stone(Move((2,3),self.black))
+		self.assertEquals(self.board.liberty_count((2,4)), 8)
+
+	def testMerge(self):
+		'''Check that a stone joining two chains merges them'''
+		self.board.place_stone(Move((2,2),self.black))
+		self.board.place_stone(Move((2,4),self.black))
+		self.assertFalse(self.board.chain((2,2)) is self.board.chain((2,4)))
+		self.board.place_stone(Move((2,3),self.black))
+		chain = self.board.chain((2,2))
+		self.assertTrue(chain is self.board.chain((2,4)))
+		self.assertEquals(len(chain.stones), 3)
+		self.assertTrue(chain.owner is self.black)
+
+	def testEnemyStoneTakesLiberty(self):
+		self.board.place_stone(Move((0,0),self.black))
+		self.assertEquals(self.board.liberty_count((0,0)), 2)
+		self.board.place_stone(Move((1,0),self.white))
+		self.assertEquals(self.board.liberty_count((0,0)), 1)
+		self.assertEquals(self.board.liberty_count((1,0)), 2)
+
+	def testCaptureRestoresLiberties(self):
+		self.board.place_stone(Move((0,0),self.black))
+		self.board.place_stone(Move((1,0),self.white))
+		move = Move((0,1),self.white)
+		self.board.place_stone(move)
+		self.assertEquals(self.board.remove_dead_stones(move), 1)
+		self.assertTrue(self.board.chain((0,0)) is None)
+		self.assertEquals(self.board.liberty_count((1,0)), 3)
+
+	def testSplit(self):
+		'''Check that removing a stone from the middle of a chain splits it'''
+		for y in range(5):
+			self.board.place_stone(Move((3,y),self.black))
+		self.board.remove_stone((3,2))
+		self.assertFalse(self.board.chain((3,0)) is self.board.chain((3,4)))
+		self.assertEquals(len(self.board.chain((3,0)).stones), 2)
+		self.assertEquals(self.board.liberty_count((3,4)), 6)
+
+	def testEmptyPoint(self):
+		self.assertTrue(self.board.chain((5,5)) is None)
+		self.assertEquals(self.board.liberty_count((5,5)), 0)
+		self.assertRaises(NonExistentPointError, self.board.chain, (19,19))
+
+	def testCopiesIndependent(self):
+		'''Check chains shared with a copy aren't changed by moves on either board'''
+		for y in range(3):
+			self.board.place_stone(Move((3,y),self.black))
+		board_copy = copy.copy(self.board)
+		self.assertTrue(board_copy.chain((3,0)) is self.board.chain((3,0)))
+
+		self.board.place_stone(Move((4,0),self.white))
+		self.assertEquals(self.board.liberty_count((3,0)), 6)
+		self.assertEquals(board_copy.liberty_count((3,0)), 7)
+
+		board_copy.place_stone(Move((3,3),self.black))
+		self.assertEquals(len(board_copy.chain((3,0)).stones), 4)
+		self.assertEquals(len(self.board.chain((3,0)).stones), 3)
+		self.assertEquals(board_copy.liberty_count((3,0)), 9)
+		self.assertEquals(self.board.liberty_count((3,0)), 6)
+
+class ArrayGroupTest(GroupTest):
+	'''Run the group tests again on a board using array storage'''
+	def setUp(self):
+		GroupTest.setUp(self)
+		self.board = RectangularBoard((19,19), array_storage=True)
+
+	def testCopyIsIndependent(self):
+		self.board.place_stone(Move((3,3),self.black))
+		board_copy = copy.copy(self.board)
+		self.assertEquals(self.board, board_copy)
+		board_copy.remove_stone((3,3))
+		self.assertEquals(self.board.get_point((3,3)), (self.black,STONE))
+
 def suite():
 	suite1 = unittest.makeSuite(BoardSizeTest)
 	suite2 = unittest.makeSuite(GroupTest)
-	alltests = unittest.TestSuite((suite1, suite2))
+	suite3 = unittest.makeSuite(ArrayGroupTest)
+	suite4 = unittest.makeSuite(HashTest)
+	suite5 = unittest.makeSuite(TransactionTest)
+	suite6 = unittest.makeSuite(ChainTest)
+	suite7 = unittest.makeSuite(NotificationTest)
+	alltests = unittest.TestSuite((suite1, suite2, suite3, suite4, suite5, suite6, suite7))
 	return alltests
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+#!/usr/bin/python
+# Unit tests for book.py
+
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from book import *
+from board import *
+from game import TwoPlayerGame, Move
+from playout import Colour
+import selfplay
+
+class BookTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, 'book.bin')
+		self.players = self.black, self.white = [Colour('black'), Colour('white')]
+		self.index = RectangularBoard((9,9)).grid.index_of
+		self.books = []
+
+	def tearDown(self):
+		for book in self.books:
+			book.close()
+		shutil.rmtree(self.directory)
+
+	def build(self, games, **kwargs):
+		builder = BookBuilder('9x9', **kwargs)
+		for moves, winner in games:
+			builder.add_game([self.index(*position) for position in moves], winner)
+		builder.write(self.path)
+		book = OpeningBook(self.path)
+		self.books.append(book)
+		return book
+
+	def board(self, stones):
+		board = RectangularBoard((9,9))
+		for position, player in stones:
+			board.place_stone(Move(position, player))
+		return board
+
+	def testFirstMove(self):
+		'''Opening moves in opposite corners are the same move'''
+		book = self.build([([(2,2)], 0), ([(6,6)], 1), ([(4,4)], 0)])
+		moves = book.lookup(RectangularBoard((9,9)), self.players, self.black)
+		self.assertEquals(len(moves), 2)
+		i, games, win_rate = moves[0]
+		self.assertEquals((games, win_rate), (2, 0.5))
+		self.assertTrue(RectangularBoard((9,9)).grid.position_of(i) in ((2,2), (2,6), (6,2), (6,6)))
+		self.assertEquals(moves[1], (self.index(4,4), 1, 1.0))
+
+	def testRotatedReply(self):
+		book = self.build([([(2,2), (2,6)], 1)])
+		board = self.board([((6,6), self.black)])
+		moves = book.lookup(board, self.players, self.white)
+		self.assertEquals(len(moves), 1)
+		self.assertTrue(board.grid.position_of(moves[0][0]) in ((2,6), (6,2)))
+		self.assertEquals(moves[0][2], 1.0)
+
+	def testColourSwap(self):
+		'''The same position with the colours and the player to move swapped'''
+		book = self.build([([(2,2), (4,4)], 1)])
+		board = self.board([((2,2), self.white)])
+		self.assertEquals(book.best_move(board, self.players, self.black), (4,4))
+		# With the same player to move as the stones, the position isn't in the book
+		self.assertEquals(book.best_move(board, self.players, self.white), None)
+
+	def testTrackedBoard(self):
+		book = self.build([([(2,2), (4,4)], 1)])
+		board = RectangularBoard((9,9))
+		board.track_symmetry(self.players)
+		board.place_stone(Move((6,2), self.black))
+		self.assertEquals(book.best_move(board, self.players, self.white), (4,4))
+
+	def testMinGames(self):
+		book = self.build([([(2,2), (4,4)], 0), ([(4,4), (2,2)], 0)], min_games=2)
+		self.assertEquals(len(book), 1)
+		self.assertEquals(book.best_move(self.board([((2,2), self.black)]), self.players, self.white), None)
+
+	def testRuns(self):
+		'''Spilling the counts to temporary runs gives the same book'''
+		records = list(selfplay.run(20, '9x9', processes=1, seed=3))
+		files = []
+		for run_size in (1000000, 7):
+			builder = BookBuilder('9x9', max_moves=10, run_size=run_size)
+			builder.add_archive(json.dumps(record) for record in records)
+			builder.write(self.path)
+			files.append(open(self.path, 'rb').read())
+		self.assertEquals(files[0], files[1])
+		book = OpeningBook(self.path)
+		self.books.append(book)
+		self.assertEquals(sum(games for i, games, win_rate in book.lookup(RectangularBoard((9,9)), self.players, self.black)), 20)
+
+	def testOtherBoards(self):
+		builder = BookBuilder('9x9')
+		builder.add_record({'board': '7x7', 'moves': [0], 'winner': 0})
+		self.assertEquals((builder.games, builder.skipped), (0, 1))
+		builder.write(self.path)
+		book = OpeningBook(self.path)
+		self.books.append(book)
+		self.assertEquals(book.lookup(RectangularBoard((7,7)), self.players, self.black), [])
+
+	def testTorusBook(self):
+		'''A book for a torus isn't used for a flat board of the same size'''
+		builder = BookBuilder('9x9-torus')
+		builder.add_game([self.index(2,2)], 0)
+		builder.write(self.path)
+		book = OpeningBook(self.path)
+		self.books.append(book)
+		self.assertEquals(book.lookup(RectangularBoard((9,9)), self.players, self.black), [])
+		self.assertEquals(len(book.lookup(selfplay.make_board('9x9-torus'), self.players, self.black)), 1)
+
+	def testNotABook(self):
+		with open(self.path, 'wb') as f:
+			f.write('x' * 100)
+		self.assertRaises(BookError, OpeningBook, self.path)
+
+	def testPlayer(self):
+		'''A computer player takes its first move from the book'''
+		import mcts
+		book = self.build([([(2,2)], 0)])
+		game = TwoPlayerGame(RectangularBoard((9,9)))
+		black = game.players[0]
+		mcts.MCTSPlayer(black, mcts.MCTS(playouts=1), book).play(game)
+		self.assertTrue(game.moves[0].position in ((2,2), (2,6), (6,2), (6,6)))
+
+def suite():
+	suite1 = unittest.makeSuite(BookTest)
+	alltests = unittest.TestSuite((suite1))
+	return alltests
+
+if __name__ == "__main__":
+	unittest.main()
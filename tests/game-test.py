@@ -6,6 +6,9 @@ from board import *
 from rules import *
 from gameErrors import *
 import unittest
+import random
+from copy import copy
+from observer import MOVE_PLAYED, STATE_CHANGED, SCORE_UPDATED
 import player
 
 class GameTest(unittest.TestCase):
@@ -114,9 +117,215 @@ class MoveTest(GameTest):
 		self.game.play_move(move5,self.black)
 		self.game.play_move(notSuicide,self.white)
 
+	def testInvalidMoveRolledBack(self):
+		'''Check that a ko violation leaves the board and captures as they were'''
+		for position in ((1,0),(1,1),(0,1),(0,2),(4,4),(0,0)):
+			self.game.play_move(position,self.game.next_player)
+		before = copy(self.game.board)
+		captures = self.black.captures
+		self.assertRaises(InvalidMove, self.game.play_move, (0,1), self.black)
+		self.assertEquals(self.game.board, before)
+		self.assertEquals(self.black.captures, captures)
+
+class TryMoveTest(GameTest):
+	def play(self, positions):
+		for position in positions:
+			self.game.play_move(position,self.game.next_player)
+
+	def testStatus(self):
+		self.assertEquals(self.game.move_status((0,0)), LEGAL)
+		self.assertEquals(self.game.move_status((19,0)), NONEXISTENT)
+		self.assertEquals(self.game.move_status((0,0),self.white), NOT_YOUR_TURN)
+		self.play([(0,0)])
+		self.assertEquals(self.game.move_status((0,0)), OCCUPIED)
+
+	def testListPosition(self):
+		'''Positions given as lists work like tuples'''
+		self.assertEquals(self.game.move_status([0,0]), LEGAL)
+		self.assertEquals(self.game.move_status([19,0]), NONEXISTENT)
+		self.assertEquals(self.game.move_status(None), NONEXISTENT)
+		self.assertEquals(self.game.move_status([[0],0]), NONEXISTENT)
+
+	def testSuicide(self):
+		self.play([(1,0),(4,4),(0,1)])
+		self.assertEquals(self.game.move_status((0,0)), SUICIDE)
+		self.assertFalse(self.game.is_legal((0,0)))
+
+	def testKo(self):
+		self.play([(1,0),(1,1),(0,1),(0,2),(4,4),(0,0)])
+		self.assertEquals(self.game.move_status((0,1)), KO)
+		self.play([(9,9),(10,10)])
+		self.assertEquals(self.game.move_status((0,1)), LEGAL)
+
+	def testTryMove(self):
+		'''Check try_move plays legal moves and leaves the board alone otherwise'''
+		self.assertEquals(self.game.try_move((0,0)), LEGAL)
+		before = copy(self.game.board)
+		self.assertEquals(self.game.try_move((0,0)), OCCUPIED)
+		self.assertEquals(self.game.board, before)
+		self.assertEquals(len(self.game.moves), 1)
+
+	def testGameOver(self):
+		self.game.pass_turn()
+		self.game.pass_turn()
+		self.assertEquals(self.game.move_status((0,0)), GAME_OVER)
+
+	def testMatchesPlayMove(self):
+		'''Check the status agrees with play_move for random moves'''
+		rand = random.Random(3)
+		game = TwoPlayerGame(RectangularBoard((5,5)))
+		positions = list(game.board.positions())
+		for n in range(300):
+			position = rand.choice(positions)
+			status = game.move_status(position)
+			try:
+				game.play_move(position,game.next_player)
+				played = True
+			except InvalidMove:
+				played = False
+			self.assertEquals(status == LEGAL, played)
+
+class LegalMovesTest(GameTest):
+	def testEmptyBoard(self):
+		self.assertEquals(len(self.game.legal_moves()), 361)
+		self.assertEquals(self.game.legal_moves(self.white), [])
+
+	def testKoAndSuicide(self):
+		for position in ((1,0),(1,1),(0,1),(0,2),(4,4),(0,0)):
+			self.game.play_move(position,self.game.next_player)
+		legal = self.game.legal_moves()
+		self.assertFalse((0,1) in legal) # ko
+		self.assertEquals(len(legal), 361 - 6)
+
+	def testMatchesStatus(self):
+		'''Check the generator agrees with move_status on random positions'''
+		rand = random.Random(5)
+		game = TwoPlayerGame(RectangularBoard((5,5)))
+		positions = sorted(game.board.positions())
+		for n in range(100):
+			expected = [p for p in positions if game.move_status(p) == LEGAL]
+			self.assertEquals(sorted(game.legal_moves()), expected)
+			mask = game.ruleset.legal_mask(game.board, game.history, game.next_player)
+			self.assertEquals(sorted(game.board.grid.position_of(i) for i in range(25) if mask >> i & 1), expected)
+			game.try_move(rand.choice(positions))
+
+class EventTest(GameTest):
+	def setUp(self):
+		GameTest.setUp(self)
+		self.moves = []
+		self.states = []
+		self.game.register_listener(self.moves.append, [MOVE_PLAYED])
+		self.game.register_listener(self.states.append, [STATE_CHANGED])
+
+	def testMovePlayed(self):
+		self.game.play_move((0,0),self.black)
+		self.assertEquals(self.moves, [self.game.last_move])
+		self.assertEquals(self.states, [])
+
+	def testStateChanged(self):
+		self.game.pass_turn()
+		self.game.pass_turn()
+		self.assertEquals(len(self.moves), 2)
+		self.assertEquals(self.states, [MARK_DEAD])
+
+class MarkDeadTest(GameTest):
+	def setUp(self):
+		GameTest.setUp(self)
+		# A lone white stone in black's corner
+		self.game.play_move((0,2),self.black)
+		self.game.play_move((0,0),self.white)
+		self.game.play_move((1,1),self.black)
+		self.game.pass_turn()
+		self.game.play_move((2,0),self.black)
+		self.game.pass_turn()
+		self.game.pass_turn()
+
+	def testTerritoryMarked(self):
+		self.assertEquals(self.game.state, MARK_DEAD)
+		self.assertTrue(self.game.board.get_territory((1,0)) is None)
+		self.assertTrue(self.game.board.get_territory((5,5)) is self.black)
+
+	def testToggleDead(self):
+		updates = []
+		self.game.register_listener(lambda *args: updates.append(args), [SCORE_UPDATED])
+		self.game.toggle_dead((0,0))
+		self.assertEquals(updates, [()])
+		self.assertTrue(self.game.board.get_territory((0,0)) is self.black)
+		self.assertTrue(self.game.board.get_territory((1,0)) is self.black)
+		self.assertEquals(self.game.board.count_territory(), {self.black: 361-3})
+
+		board = copy(self.game.board)
+		board.mark_territory()
+		self.assertEquals(self.game.board.count_territory(), board.count_territory())
+
+	def testScoreUsesLiveTerritory(self):
+		'''Check scoring reads the territory kept up to date by toggle_dead instead of marking the board again'''
+		self.game.toggle_dead((0,0))
+		territory = self.game.board.territory
+		region = territory.labels[self.game.board.grid.index_of(5,5)]
+		self.game.score()
+		self.assertTrue(territory.labels[self.game.board.grid.index_of(5,5)] is region)
+		self.assertTrue(self.game.winner is self.black)
+
+	def testToggleDuringGame(self):
+		game = TwoPlayerGame(RectangularBoard((9,9)))
+		self.assertRaises(GameError, game.toggle_dead, (0,0))
+
+class HistoryTest(GameTest):
+	def setUp(self):
+		GameTest.setUp(self)
+		self.game.history = History(self.game.board, checkpoint_interval=3)
+		self.boards = [copy(self.game.board)]
+
+		# Includes a capture at (0,0)
+		for position in ((0,0),(1,0),(4,4),(0,1),(5,5),(6,6),(7,7),(8,8)):
+			self.game.play_move(position,self.game.next_player)
+			self.boards.append(copy(self.game.board))
+
+	def testLength(self):
+		self.assertEquals(len(self.game.history), 8)
+
+	def testBoardAt(self):
+		'''Check every past position can be rebuilt'''
+		for n,board in enumerate(self.boards):
+			self.assertEquals(self.game.history.board_at(n), board)
+			self.assertEquals(self.game.history.hash_at(n), board.hash)
+
+	def testContains(self):
+		self.assertTrue(self.boards[4] in self.game.history)
+		self.assertTrue(self.game.board in self.game.history)
+		self.game.board.remove_stone((8,8))
+		self.game.board.remove_stone((6,6))
+		self.assertFalse(self.game.board in self.game.history)
+
+	def testCheckpointChains(self):
+		'''Check chains are worked out again on boards rebuilt from a checkpoint'''
+		board = self.game.history.board_at(6)
+		self.assertEquals(board.liberty_count((1,0)), self.boards[6].liberty_count((1,0)))
+		self.assertEquals(board.liberty_count((0,1)), self.boards[6].liberty_count((0,1)))
+		board.place_stone(Move((2,0), self.white))
+		self.assertEquals(board.remove_dead_stones(Move((2,0), self.white)), 0)
+
+	def testToMove(self):
+		game = TwoPlayerGame(RectangularBoard((9,9)))
+		black, white = game.players
+		game.play_move((2,2), black)
+		game.play_move((3,3), white)
+		self.assertTrue(game.history.to_move_at(0) is black)
+		self.assertTrue(game.history.to_move_at(1) is white)
+		self.assertTrue(game.history.to_move_at(2) is black)
+
+	def testBadMoveNumber(self):
+		self.assertRaises(IndexError, self.game.history.board_at, 9)
+
 def suite():
 	suite1 = unittest.makeSuite(MoveTest)
-	alltests = unittest.TestSuite((suite1))
+	suite2 = unittest.makeSuite(HistoryTest)
+	suite3 = unittest.makeSuite(MarkDeadTest)
+	suite4 = unittest.makeSuite(EventTest)
+	suite5 = unittest.makeSuite(TryMoveTest)
+	suite6 = unittest.makeSuite(LegalMovesTest)
+	alltests = unittest.TestSuite((suite1, suite2, suite3, suite4, suite5, suite6))
 	return alltests
 
 if __name__ == "__main__":
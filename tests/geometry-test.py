@@ -65,8 +65,108 @@ class NeighbourTest(RectangularGridTest):
 					required.add((i,j+1))
 				self.assertEqual(conns, required)
 
+class ArrayGridTest(unittest.TestCase):
+	def setUp(self):
+		self.source = FoldedGrid(9,9,2,[('N','S')])
+		self.grid = ArrayGrid(self.source)
+
+	def testSameShape(self):
+		self.assertEqual(len(self.grid), 81)
+		self.assertEqual(self.grid.size(), self.source.size())
+		self.assertEqual(sorted(self.grid.get_positions()), sorted(self.source.get_positions()))
+
+	def testSameConnections(self):
+		for x,y in self.source.get_positions():
+			self.assertEqual(frozenset(self.grid.neighbours(x,y)), frozenset(self.source.neighbours(x,y)))
+
+	def testIndices(self):
+		for x,y in self.grid.get_positions():
+			i = self.grid.index_of(x,y)
+			self.assertEqual(self.grid.position_of(i), (x,y))
+			neighbours = [self.grid.position_of(j) for j in self.grid.neighbour_indices(i)]
+			self.assertEqual(tuple(neighbours), self.grid.neighbours(x,y))
+
+	def testSetValue(self):
+		self.grid.set_point(2,3,1)
+		self.assertEqual(self.grid.get_point(2,3), 1)
+		self.assertEqual(self.grid.get_index(self.grid.index_of(2,3)), 1)
+		self.assertTrue(self.source.get_point(2,3) is None)
+
+	def testBadCoordinates(self):
+		self.assertRaises(Exception, self.grid.get_point, 1, 0)
+		self.assertRaises(Exception, self.grid.set_point, 18, 0, 1)
+
+	def testCopy(self):
+		from copy import copy
+		grid2 = copy(self.grid)
+		self.assertEqual(self.grid, grid2)
+		grid2.set_point(0,0,1)
+		self.assertTrue(self.grid.get_point(0,0) is None)
+		self.assertFalse(self.grid == grid2)
+
+	def testEqualToDictGrid(self):
+		'''Check equality works both ways between the two kinds of storage'''
+		self.assertTrue(self.source == self.grid)
+		self.assertTrue(self.grid == self.source)
+		self.source.set_point(2,3,1)
+		self.assertFalse(self.source == self.grid)
+		self.assertTrue(self.source != self.grid)
+		self.assertTrue(self.grid != self.source)
+
+class TopologyTest(unittest.TestCase):
+	def testSharedBetweenGrids(self):
+		grid1 = RectangularGrid(9,9,1)
+		grid2 = RectangularGrid(9,9,1)
+		self.assertTrue(grid1.topology is grid2.topology)
+		self.assertFalse(grid1.topology is RectangularGrid(9,9,2).topology)
+
+	def testSharedWithCopies(self):
+		from copy import copy
+		grid = FoldedGrid(9,9,1,[('N','S'),('E','W')])
+		grid2 = copy(grid)
+		self.assertTrue(grid.topology is grid2.topology)
+		self.assertTrue(ArrayGrid(grid).topology is grid.topology)
+
+	def testFoldedTopology(self):
+		grid = FoldedGrid(9,9,1,[('N','S'),('E','W')])
+		self.assertFalse(grid.topology is RectangularGrid(9,9,1).topology)
+		self.assertTrue(grid.topology is FoldedGrid(9,9,1,[('N','S'),('E','W')]).topology)
+		self.assertEqual(frozenset(grid.neighbours(0,0)), frozenset([(1,0),(0,1),(8,0),(0,8)]))
+
+	def testImmutable(self):
+		grid = RectangularGrid(9,9,1)
+		self.assertRaises(AttributeError, setattr, grid.topology, 'positions', ())
+
+class FloodTest(unittest.TestCase):
+	def setUp(self):
+		self.grid = RectangularGrid(50,50,1)
+		self.index = self.grid.index_of
+
+	def testSnake(self):
+		'''A region longer than the recursion limit'''
+		snake = set()
+		for x in range(0,50,2):
+			for y in range(50):
+				snake.add(self.index(x,y))
+			if x < 49:
+				snake.add(self.index(x+1, 49 if x % 4 == 0 else 0))
+		region, border = self.grid.topology.flood([self.index(0,0)], snake.__contains__)
+		self.assertEqual(region, snake)
+		self.assertEqual(len(border), 50*50 - len(snake))
+
+	def testBorder(self):
+		region, border = self.grid.topology.flood([self.index(5,5)], lambda i: False)
+		self.assertEqual(region, set([self.index(5,5)]))
+		self.assertEqual(border, set(self.index(x,y) for x,y in ((4,5),(6,5),(5,4),(5,6))))
+
+	def testFolded(self):
+		grid = FoldedGrid(9,9,1,[('N','S'),('E','W')])
+		region, border = grid.topology.flood([grid.index_of(0,0)], lambda i: grid.position_of(i)[1] == 0)
+		self.assertEqual(len(region), 9)
+		self.assertEqual(len(border), 18)
+
 def suite():
-	tests = (SquareGridTest,NeighbourTest,EmptyGridTest,SetValueTest)
+	tests = (SquareGridTest,NeighbourTest,EmptyGridTest,SetValueTest,ArrayGridTest,TopologyTest,FloodTest)
 	return unittest.TestSuite(map(unittest.makeSuite,tests))
 #	suite1 = unittest.makeSuite(NeighbourTest)
 #	suite2 = unittest.makeSuite(NeighbourTest)
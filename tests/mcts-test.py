@@ -0,0 +1,187 @@
+#!/usr/bin/python
+# Unit tests for mcts.py
+
+import unittest
+import random
+from mcts import *
+import mcts
+from board import *
+from game import TwoPlayerGame, Move, PLAY_GAME, MARK_DEAD
+from playout import Colour
+from transposition import TranspositionTable
+from rules import LEGAL, AGARules
+from copy import copy
+import controller
+
+class SearchTest(unittest.TestCase):
+	def setUp(self):
+		self.players = [Colour('black'), Colour('white')]
+		self.board = RectangularBoard((5,5))
+
+	def testVisits(self):
+		search = Search(rand=random.Random(1))
+		stats = search.run(self.board, self.players, 0, playouts=200)
+		self.assertEquals(sum(visits for visits, wins in stats.itervalues()), 199)
+		self.assertEquals(search.table[(self.board.hash, 0)].visits, 200)
+		for visits, wins in stats.itervalues():
+			self.assertTrue(0 <= wins <= visits)
+
+	def testRepeatable(self):
+		first = Search(rand=random.Random(2)).run(self.board, self.players, 0, playouts=100)
+		second = Search(rand=random.Random(2)).run(self.board, self.players, 0, playouts=100)
+		self.assertEquals(first, second)
+
+	def testAllowed(self):
+		search = Search(rand=random.Random(3))
+		stats = search.run(self.board, self.players, 0, allowed=[0, 12], playouts=50)
+		self.assertEquals(set(stats), set([0, 12]))
+
+	def testPassWhenNoMoves(self):
+		'''Only eyes are left for black, so the only move is to pass'''
+		black = self.players[0]
+		for i in range(25):
+			if i != 12:
+				self.board.place_stone(Move(self.board.grid.position_of(i), black))
+		stats = Search(rand=random.Random(4)).run(self.board, self.players, 0, playouts=10)
+		self.assertEquals(stats.keys(), [None])
+
+	def testSmallTable(self):
+		table = TranspositionTable(50)
+		search = Search(table, rand=random.Random(11))
+		stats = search.run(self.board, self.players, 0, playouts=300)
+		self.assertEquals(len(table), 50)
+		self.assertTrue(table.evictions > 0)
+		self.assertTrue(stats)
+
+	def testBoardUnchanged(self):
+		Search(rand=random.Random(5)).run(self.board, self.players, 0, playouts=50)
+		self.assertEquals(list(self.board.points()), list(RectangularBoard((5,5)).points()))
+
+class MCTSTest(unittest.TestCase):
+	def setUp(self):
+		self.game = TwoPlayerGame(RectangularBoard((5,5)))
+		self.black, self.white = self.game.players
+		self.white.team = 'white'
+
+	def testBestMove(self):
+		for position, p in (((2,2),self.black), ((2,3),self.white), ((3,3),self.black), ((4,4),self.white)):
+			self.game.next_player = p
+			self.game.play_move(position, p)
+		search = MCTS(playouts=200, seed=6)
+		stats = search.move_stats(self.game.board, self.game.history, self.game.players, self.black)
+		best = max(stats, key=lambda i: stats[i][0])
+		search = MCTS(playouts=200, seed=6)
+		position = search.best_move(self.game.board, self.game.history, self.game.players, self.black)
+		self.assertEquals(position, self.game.board.grid.position_of(best))
+		self.assertEquals(self.game.move_status(position), LEGAL)
+
+	def testTableKept(self):
+		search = MCTS(playouts=50, seed=7)
+		search.best_move(self.game.board, self.game.history, self.game.players, self.black)
+		size = len(search.table)
+		self.assertTrue(size > 1)
+		search.best_move(self.game.board, self.game.history, self.game.players, self.black)
+		self.assertTrue(len(search.table) > size)
+
+	def testProcesses(self):
+		search = MCTS(playouts=40, processes=2, seed=8)
+		try:
+			stats = search.move_stats(self.game.board, self.game.history, self.game.players, self.black)
+		finally:
+			search.close()
+		self.assertEquals(sum(visits for visits, wins in stats.itervalues()), 38)
+
+	def testProcessesStoreStats(self):
+		'''Check the combined statistics of the workers end up in the transposition table'''
+		search = MCTS(playouts=40, processes=2, seed=8)
+		try:
+			stats = search.move_stats(self.game.board, self.game.history, self.game.players, self.black)
+		finally:
+			search.close()
+		i = max(stats, key=lambda i: stats[i][0])
+		key = (search.ruleset.move_effect(self.game.board, i, self.black)[2], 1)
+		self.assertEquals(search.table.peek(key).visits, stats[i][0])
+
+	def testPlayGame(self):
+		'''Two computer players play a whole game with legal moves'''
+		search = MCTS(playouts=20, seed=9)
+		ais = [MCTSPlayer(self.black, search), MCTSPlayer(self.white, search)]
+		for n in range(200):
+			if self.game.state != PLAY_GAME:
+				break
+			for ai in ais:
+				ai.play(self.game)
+		self.assertEquals(self.game.state, MARK_DEAD)
+
+class WorkerTest(unittest.TestCase):
+	def setUp(self):
+		self.players = [Colour('black'), Colour('white')]
+		self.board = RectangularBoard((5,5))
+		self.board.place_stone(Move((2,2), self.players[1]))
+
+	def tearDown(self):
+		mcts._worker = None
+
+	def task(self, seen=(), allowed=None):
+		'''A task for the position, as `MCTS.move_stats` would send it.'''
+		grid = copy(self.board.grid)
+		grid.set_index(grid.index_of(2,2), (1, STONE))
+		keys = [((i, (self.players.index(value[0]), value[1])), key) for (i, value), key in self.board.zobrist.keys()]
+		return (grid, 0, seen, allowed, [0, 0], keys, 20, None, 1, 1.0)
+
+	def testSeen(self):
+		'''Check the worker hashes positions like the main process, so history positions are avoided'''
+		i, j = self.board.grid.index_of(0,0), self.board.grid.index_of(4,4)
+		seen = [AGARules().move_effect(self.board, i, self.players[0])[2]]
+		pid, stats = mcts._search_worker(self.task(seen, [i, j]))
+		self.assertTrue(i not in stats)
+		self.assertTrue(j in stats)
+
+	def testTableKept(self):
+		pid, first = mcts._search_worker(self.task())
+		pid, second = mcts._search_worker(self.task())
+		self.assertEquals(sum(v for v, w in second.itervalues()), 2 * sum(v for v, w in first.itervalues()) + 1)
+
+class ControllerTest(unittest.TestCase):
+	def testReply(self):
+		c = controller.Controller()
+		black = c.add_local_player('black', 'human')
+		white = c.add_ai_player('white', 'computer', MCTS(playouts=20, seed=10))
+		c.begin_game(RectangularBoard((5,5)))
+		self.assertTrue(c.game.next_player is black)
+		c.play_move((3,3))
+		self.assertEquals(len(c.game.moves), 2)
+		self.assertTrue(c.game.next_player is black)
+		self.assertTrue(c.accept_local_moves)
+
+	def testBackgroundSearch(self):
+		'''Check the computer's move is chosen on another thread and played through post'''
+		posted = []
+		c = controller.Controller(lambda function, *args: posted.append((function, args)))
+		black = c.add_local_player('black', 'human')
+		white = c.add_ai_player('white', 'computer', MCTS(playouts=20, seed=10))
+		c.begin_game(RectangularBoard((5,5)))
+		c.play_move((3,3))
+		self.assertTrue(c.searching)
+		self.assertTrue(c.game.next_player is white)
+		self.assertFalse(c.accept_local_moves)
+
+		c._search_thread.join()
+		self.assertEquals(len(c.game.moves), 1)
+		function, args = posted.pop()
+		function(*args)
+		self.assertFalse(c.searching)
+		self.assertEquals(len(c.game.moves), 2)
+		self.assertTrue(c.game.next_player is black)
+		self.assertTrue(c.accept_local_moves)
+
+def suite():
+	suite1 = unittest.makeSuite(SearchTest)
+	suite2 = unittest.makeSuite(MCTSTest)
+	suite3 = unittest.makeSuite(ControllerTest)
+	suite4 = unittest.makeSuite(WorkerTest)
+	alltests = unittest.TestSuite((suite1, suite2, suite3, suite4))
+	return alltests
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/python
+# Unit tests for multilogger.py
+
+import unittest
+import logging
+import sys
+import types
+import multilogger
+
+class LevelTest(unittest.TestCase):
+	def setUp(self):
+		self.level = logging.getLogger().level
+		self.module = types.ModuleType('loggedmodule')
+		sys.modules['loggedmodule'] = self.module
+
+	def tearDown(self):
+		multilogger.setup(self.level)
+		del sys.modules['loggedmodule']
+
+	def testDisabled(self):
+		'''Check disabled levels get a function that does nothing'''
+		multilogger.setup(logging.WARNING)
+		debug,info,warning,error = multilogger.logFunctions('loggedmodule')
+		self.assertTrue(debug is multilogger.ignore)
+		self.assertTrue(info is multilogger.ignore)
+		self.assertFalse(warning is multilogger.ignore)
+
+	def testRebind(self):
+		'''Check modules get new functions when the level changes'''
+		multilogger.setup(logging.WARNING)
+		self.module.debug,self.module.info,self.module.warning,self.module.error = multilogger.logFunctions('loggedmodule')
+		multilogger.setup(logging.DEBUG)
+		self.assertFalse(self.module.debug is multilogger.ignore)
+		multilogger.setup(logging.ERROR)
+		self.assertTrue(self.module.debug is multilogger.ignore)
+		self.assertTrue(self.module.warning is multilogger.ignore)
+
+	def testCommandLine(self):
+		self.assertEquals(multilogger.command_line_level(['go']), logging.WARNING)
+		self.assertEquals(multilogger.command_line_level(['go','--debug']), logging.DEBUG)
+		self.assertEquals(multilogger.command_line_level(['go','--log-level=info']), logging.INFO)
+
+def suite():
+	suite1 = unittest.makeSuite(LevelTest)
+	alltests = unittest.TestSuite((suite1))
+	return alltests
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/python
+# Unit tests for observer.py
+
+import unittest
+import gc
+import threading
+from observer import *
+
+class Panel:
+	def __init__(self):
+		self.events = []
+
+	def update(self, *args):
+		self.events.append(args)
+
+class ObserverTest(unittest.TestCase):
+	def setUp(self):
+		self.observable = Observable()
+		self.panel = Panel()
+
+	def testTopics(self):
+		'''Check listeners are only called for their topics'''
+		self.observable.register_listener(self.panel.update, [MOVE_PLAYED])
+		self.observable.publish(MOVE_PLAYED, 'move')
+		self.observable.publish(SCORE_UPDATED)
+		self.assertEquals(self.panel.events, [('move',)])
+
+	def testEverything(self):
+		self.observable.register_listener(self.panel.update)
+		self.observable.publish(MOVE_PLAYED, 'move')
+		self.observable.notify(1, 2)
+		self.assertEquals(self.panel.events, [('move',), (1, 2)])
+
+	def testTopicListenerIgnoresNotify(self):
+		self.observable.register_listener(self.panel.update, [STATE_CHANGED])
+		self.observable.notify()
+		self.assertEquals(self.panel.events, [])
+
+	def testRemove(self):
+		self.observable.register_listener(self.panel.update)
+		self.observable.remove_listener(self.panel.update)
+		self.observable.notify()
+		self.assertEquals(self.panel.events, [])
+		self.assertEquals(self.observable.listeners, [])
+
+	def testWeakMethod(self):
+		'''Check a registered method doesn't keep its object alive'''
+		self.observable.register_listener(self.panel.update)
+		del self.panel
+		gc.collect()
+		self.observable.notify()
+		self.assertEquals(self.observable.listeners, [])
+
+	def testStrongFunction(self):
+		'''Check plain functions are kept alive unless they are registered weakly'''
+		events = []
+		self.observable.register_listener(lambda *args: events.append(args))
+		self.observable.register_listener(lambda *args: events.append('weak'), weak=True)
+		gc.collect()
+		self.observable.notify()
+		self.assertEquals(events, [()])
+		self.assertEquals(len(self.observable.listeners), 1)
+
+class QueueTest(unittest.TestCase):
+	def setUp(self):
+		self.observable = Observable()
+		self.panel = Panel()
+
+	def deliver(self, queue):
+		queue.start()
+		queue.join()
+		queue.stop()
+
+	def testWorkerThread(self):
+		'''Check queued listeners are called on the worker thread, after publish returns'''
+		threads = []
+		queue = EventQueue()
+		self.observable.register_listener(lambda *args: threads.append(threading.current_thread()), queue=queue)
+		self.observable.notify()
+		self.assertEquals(threads, [])
+		self.deliver(queue)
+		self.assertEquals(len(threads), 1)
+		self.assertFalse(threads[0] is threading.current_thread())
+
+	def testDeadListenerRemoved(self):
+		'''Check a garbage collected listener with a queue is removed, and gets no more events'''
+		queue = EventQueue()
+		self.observable.register_listener(self.panel.update, [MOVE_PLAYED], queue=queue)
+		del self.panel
+		self.observable.publish(MOVE_PLAYED, 1)
+		self.assertEquals(self.observable.listeners, [])
+		self.assertEquals(len(queue), 0)
+
+	def testOrder(self):
+		queue = EventQueue()
+		queue.start()
+		self.observable.register_listener(self.panel.update, [MOVE_PLAYED], queue=queue)
+		for n in range(100):
+			self.observable.publish(MOVE_PLAYED, n)
+		queue.join()
+		queue.stop()
+		self.assertEquals(self.panel.events, [(n,) for n in range(100)])
+
+	def testDrop(self):
+		queue = EventQueue(maxsize=1, policies={MOVE_PLAYED: DROP})
+		self.observable.register_listener(self.panel.update, queue=queue)
+		self.observable.publish(MOVE_PLAYED, 1)
+		self.observable.publish(MOVE_PLAYED, 2)
+		self.assertEquals(queue.dropped, 1)
+		self.deliver(queue)
+		self.assertEquals(self.panel.events, [(1,)])
+
+	def testFullWhenNotRunning(self):
+		'''Check a full queue which isn't running raises instead of growing or waiting forever'''
+		queue = EventQueue(maxsize=2)
+		self.observable.register_listener(self.panel.update, queue=queue)
+		self.observable.publish(MOVE_PLAYED, 1)
+		self.observable.publish(MOVE_PLAYED, 2)
+		self.assertRaises(QueueFullError, self.observable.publish, MOVE_PLAYED, 3)
+		self.assertEquals(len(queue), 2)
+		self.deliver(queue)
+		self.assertEquals(self.panel.events, [(1,), (2,)])
+
+	def testCoalesce(self):
+		queue = EventQueue()
+		self.observable.register_listener(self.panel.update, queue=queue)
+		self.observable.publish(SCORE_UPDATED)
+		self.observable.publish(POINTS_CHANGED, set([(0,0)]))
+		self.observable.publish(SCORE_UPDATED)
+		self.observable.publish(POINTS_CHANGED, set([(1,1)]))
+		self.assertEquals(len(queue), 2)
+		self.assertEquals(queue.coalesced, 2)
+		self.deliver(queue)
+		self.assertEquals(self.panel.events, [(), (set([(0,0),(1,1)]),)])
+
+	def testListenerError(self):
+		'''Check the worker carries on after a listener fails'''
+		queue = EventQueue()
+		self.observable.register_listener(lambda: 1/0, [SCORE_UPDATED], queue=queue)
+		self.observable.register_listener(self.panel.update, [MOVE_PLAYED], queue=queue)
+		self.observable.publish(SCORE_UPDATED)
+		self.observable.publish(MOVE_PLAYED, 1)
+		self.deliver(queue)
+		self.assertEquals(self.panel.events, [(1,)])
+
+def suite():
+	suite1 = unittest.makeSuite(ObserverTest)
+	suite2 = unittest.makeSuite(QueueTest)
+	alltests = unittest.TestSuite((suite1, suite2))
+	return alltests
+
+if __name__ == "__main__":
+	unittest.main()
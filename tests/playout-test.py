@@ -0,0 +1,62 @@
+#!/usr/bin/python
+# Unit tests for playout.py
+
+import unittest
+import random
+from playout import *
+from board import *
+from geometry import FoldedGrid
+
+class PlayoutTest(unittest.TestCase):
+	def setUp(self):
+		self.players = (Colour('black'), Colour('white'))
+		self.board = RectangularBoard((9,9))
+
+	def testFinishes(self):
+		game = Playout(self.board, self.players, rand=random.Random(1))
+		scores = game.play()
+		self.assertEquals(game.moves[-2:], [None, None])
+		self.assertTrue(len(game.moves) < game.max_moves)
+		self.assertTrue(sum(scores.values()) <= 81)
+
+	def testEmptyPointsTracked(self):
+		game = Playout(self.board, self.players, rand=random.Random(2))
+		game.play()
+		empty = sorted(i for i in range(81) if not is_live(game.board.grid.get_index(i)))
+		self.assertEquals(sorted(game.empty), empty)
+
+	def testNoEyesFilled(self):
+		'''Check the board ends with every empty point an eye of one player'''
+		game = Playout(self.board, self.players, rand=random.Random(3))
+		game.play()
+		for i in game.empty:
+			self.assertTrue(game.is_eye(i, self.players[0]) or game.is_eye(i, self.players[1]) or game.ruleset.move_effect(game.board, i, self.players[0])[0] != LEGAL)
+
+	def testRepeatable(self):
+		first = Playout(self.board, self.players, rand=random.Random(4))
+		second = Playout(self.board, self.players, rand=random.Random(4))
+		self.assertEquals(first.play(), second.play())
+		self.assertEquals(first.moves, second.moves)
+
+	def testBoardUnchanged(self):
+		playout(self.board, self.players, rand=random.Random(5))
+		self.assertEquals(list(self.board.points()), list(RectangularBoard((9,9)).points()))
+
+	def testKomi(self):
+		game = Playout(self.board, self.players, rand=random.Random(6), komi=7.5)
+		scores = game.play()
+		self.assertEquals(sum(scores.values()) % 1, 0.5)
+
+	def testTorus(self):
+		board = Board(FoldedGrid(7,7,1,[('N','S'),('E','W')]))
+		game = Playout(board, self.players, rand=random.Random(7))
+		game.play()
+		self.assertEquals(game.moves[-2:], [None, None])
+
+def suite():
+	suite1 = unittest.makeSuite(PlayoutTest)
+	alltests = unittest.TestSuite((suite1))
+	return alltests
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,43 @@
+#!/usr/bin/python
+# Unit tests for selfplay.py
+
+import unittest
+from selfplay import *
+
+class SelfPlayTest(unittest.TestCase):
+	def testMakeBoard(self):
+		self.assertEquals(len(make_board('9x9').grid), 81)
+		self.assertEquals(len(make_board('5x7-torus').grid), 35)
+		self.assertEquals(len(make_board('5x5-torus').grid.neighbours(0,0)), 4)
+
+	def testRecord(self):
+		record = play((3, '7x7', 10, 'playout', 0.5))
+		self.assertEquals(record['id'], 3)
+		self.assertEquals(record['moves'][-2:], [-1, -1])
+		self.assertEquals(len(record['scores']), 2)
+		self.assertEquals(record['winner'], record['scores'].index(max(record['scores'])))
+
+	def testReplay(self):
+		'''Check a game played again from its seed is the same'''
+		first = play((0, '7x7', 4, 'playout', 0))
+		second = play((0, '7x7', 4, 'playout', 0))
+		self.assertEquals(first['moves'], second['moves'])
+
+	def testProcesses(self):
+		'''Check the results don't depend on the number of processes'''
+		key = lambda record: (record['id'], record['moves'], record['scores'])
+		serial = sorted(key(record) for record in run(6, '5x5', processes=1))
+		parallel = sorted(key(record) for record in run(6, '5x5', processes=2, chunksize=1))
+		self.assertEquals(serial, parallel)
+
+	def testGameEngine(self):
+		record = play((0, '5x5', 1, 'game', 0))
+		self.assertTrue(len(record['moves']) > 0)
+
+def suite():
+	suite1 = unittest.makeSuite(SelfPlayTest)
+	alltests = unittest.TestSuite((suite1))
+	return alltests
+
+if __name__ == "__main__":
+	unittest.main()
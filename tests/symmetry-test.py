@@ -0,0 +1,112 @@
+#!/usr/bin/python
+# Unit tests for symmetry.py
+
+import unittest
+from copy import copy
+from symmetry import *
+from board import *
+from game import Move
+from geometry import FoldedGrid
+from playout import Colour
+
+class SymmetryTest(unittest.TestCase):
+	def setUp(self):
+		self.black, self.white = self.players = [Colour('black'), Colour('white')]
+
+	def play(self, board, moves):
+		for position, player in moves:
+			board.place_stone(Move(position, player))
+
+	def testCount(self):
+		self.assertEquals(len(symmetries(RectangularBoard((9,9)).grid.topology)), 8)
+		self.assertEquals(len(symmetries(RectangularBoard((9,7)).grid.topology)), 4)
+
+	def testTorus(self):
+		'''Every transform still maps a square torus onto itself'''
+		board = Board(FoldedGrid(5,5,1,[('N','S'),('E','W')]))
+		self.assertEquals(len(symmetries(board.grid.topology)), 8)
+
+	def testRotations(self):
+		'''A position and all its rotations and reflections have the same key'''
+		board = RectangularBoard((9,9))
+		moves = [((2,2), self.black), ((2,6), self.white), ((3,2), self.black), ((6,6), self.white)]
+		self.play(board, moves)
+		key = canonical_key(board, self.players)[0]
+		for transform in range(8):
+			other = RectangularBoard((9,9))
+			self.play(other, [(map_position(other.grid, position, transform), player) for position, player in moves])
+			self.assertEquals(canonical_key(other, self.players)[0], key)
+
+	def testColourSwap(self):
+		board = RectangularBoard((9,9))
+		self.play(board, [((2,2), self.black), ((4,6), self.white), ((2,3), self.black)])
+		swapped = RectangularBoard((9,9))
+		self.play(swapped, [((2,2), self.white), ((4,6), self.black), ((2,3), self.white)])
+		first = canonical_key(board, self.players)
+		second = canonical_key(swapped, self.players)
+		self.assertEquals(first[0], second[0])
+		self.assertNotEquals(first[2], second[2])
+		self.assertNotEquals(canonical_key(board, self.players, colours=False)[0], canonical_key(swapped, self.players, colours=False)[0])
+
+	def testDifferentPositions(self):
+		board = RectangularBoard((9,9))
+		self.play(board, [((2,2), self.black)])
+		other = RectangularBoard((9,9))
+		self.play(other, [((2,3), self.black)])
+		self.assertNotEquals(canonical_key(board, self.players)[0], canonical_key(other, self.players)[0])
+
+	def testDeterministic(self):
+		'''Keys don't depend on the player objects'''
+		board = RectangularBoard((9,9))
+		self.play(board, [((4,2), self.black)])
+		others = [Colour('x'), Colour('y')]
+		other = RectangularBoard((9,9))
+		self.play(other, [((4,2), others[0])])
+		self.assertEquals(canonical_key(board, self.players), canonical_key(other, others))
+
+	def testTransform(self):
+		'''Moves mapped with the transform from `canonical` give the canonical board'''
+		board = RectangularBoard((9,9))
+		moves = [((1,2), self.black), ((7,3), self.white)]
+		self.play(board, moves)
+		key, transform, swapped = canonical_key(board, self.players, colours=False)
+		canonical = RectangularBoard((9,9))
+		self.play(canonical, [(map_position(board.grid, position, transform), player) for position, player in moves])
+		self.assertEquals(SymmetryKeys(canonical.grid, self.players, False).hashes[0], key)
+		topology = board.grid.topology
+		back = inverse(topology, transform)
+		for i in range(81):
+			self.assertEquals(map_index(topology, map_index(topology, i, transform), back), i)
+
+	def testCanonicalIndex(self):
+		'''Moves which are the same because the position is symmetric have the same canonical index'''
+		board = RectangularBoard((9,9))
+		keys = SymmetryKeys(board.grid, self.players)
+		index = board.grid.index_of
+		corners = set(keys.canonical_index(index(*p)) for p in ((2,2), (2,6), (6,2), (6,6)))
+		self.assertEquals(len(corners), 1)
+		self.assertNotEquals(keys.canonical_index(index(2,3)), keys.canonical_index(index(2,2)))
+		self.assertEquals(keys.canonical_index(index(2,3)), keys.canonical_index(index(3,2)))
+
+	def testTracking(self):
+		'''Keys kept up to date by the board match keys worked out from scratch, through captures and rollbacks'''
+		board = RectangularBoard((5,5))
+		tracker = board.track_symmetry(self.players)
+		self.play(board, [((0,1), self.black), ((1,0), self.black), ((0,0), self.white)])
+		board.remove_dead_stones(Move((1,0), self.black))
+		board.begin()
+		self.play(board, [((2,2), self.white)])
+		board.rollback()
+		self.assertEquals(tracker.hashes, SymmetryKeys(board.grid, self.players).hashes)
+		copied = copy(board)
+		self.play(copied, [((3,3), self.white)])
+		self.assertEquals(board.symmetry.hashes, tracker.hashes)
+		self.assertEquals(copied.symmetry.hashes, SymmetryKeys(copied.grid, self.players).hashes)
+
+def suite():
+	suite1 = unittest.makeSuite(SymmetryTest)
+	alltests = unittest.TestSuite((suite1))
+	return alltests
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/python
+# Unit tests for timing.py
+
+import unittest
+from timing import *
+from game import TwoPlayerGame
+from board import RectangularBoard
+from gameErrors import InvalidMove
+
+class Clock(object):
+	'''Clock which goes forward one second every time it is read'''
+	def __init__(self):
+		self.now = 0
+
+	def __call__(self):
+		self.now += 1
+		return self.now
+
+class PhaseTimerTest(unittest.TestCase):
+	def testLap(self):
+		timer = PhaseTimer(Clock())
+		timer.start()
+		timer.lap('a')
+		timer.lap('b')
+		timer.start()
+		timer.lap('a')
+		self.assertEquals(timer.totals, {'a': 2, 'b': 1})
+		self.assertEquals(timer.counts, {'a': 2, 'b': 1})
+		summary = timer.summary()
+		self.assertEquals([r['phase'] for r in summary], ['a', 'b'])
+		self.assertEquals(summary[0]['mean'], 1)
+
+	def testReset(self):
+		timer = PhaseTimer(Clock())
+		timer.start()
+		timer.lap('a')
+		timer.reset()
+		self.assertEquals(timer.summary(), [])
+
+class GameTimingTest(unittest.TestCase):
+	def setUp(self):
+		self.game = TwoPlayerGame(RectangularBoard((9,9)))
+		self.timer = PhaseTimer()
+		self.game.set_timer(self.timer)
+
+	def testPhases(self):
+		self.game.play_move((0,0), self.game.next_player)
+		self.assertEquals(set(self.timer.counts), set(['begin', 'place_stone', 'remove_dead_stones', 'check_suicide', 'check_ko', 'commit', 'history', 'listeners']))
+		self.assertTrue(self.timer.report().startswith('phase'))
+
+	def testRollback(self):
+		self.game.play_move((0,0), self.game.next_player)
+		self.assertRaises(InvalidMove, self.game.play_move, (0,0), self.game.next_player)
+		self.assertEquals(self.timer.counts['rollback'], 1)
+
+	def testDisable(self):
+		self.game.set_timer(None)
+		self.game.play_move((0,0), self.game.next_player)
+		self.assertEquals(self.timer.counts, {})
+
+def suite():
+	suite1 = unittest.makeSuite(PhaseTimerTest)
+	suite2 = unittest.makeSuite(GameTimingTest)
+	alltests = unittest.TestSuite((suite1, suite2))
+	return alltests
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/python
+# Unit tests for transposition.py
+
+import unittest
+from transposition import *
+
+class LRUTest(unittest.TestCase):
+	def setUp(self):
+		self.table = TranspositionTable(3)
+
+	def testStoreAndGet(self):
+		self.table[1] = 'a'
+		self.assertEquals(self.table.get(1), 'a')
+		self.assertEquals(self.table[1], 'a')
+		self.assertEquals(self.table.get(2), None)
+		self.assertRaises(KeyError, lambda: self.table[2])
+		self.assertEquals((self.table.hits, self.table.misses), (2, 2))
+
+	def testCapacity(self):
+		for key in range(10):
+			self.table[key] = key
+		self.assertEquals(len(self.table), 3)
+		self.assertEquals(sorted(self.table), [7, 8, 9])
+		self.assertEquals(self.table.evictions, 7)
+
+	def testLeastRecentlyUsed(self):
+		for key in range(3):
+			self.table[key] = key
+		self.table.get(0)
+		self.table[3] = 3
+		self.assertTrue(0 in self.table)
+		self.assertFalse(1 in self.table)
+
+	def testPeekDoesNotUse(self):
+		for key in range(3):
+			self.table[key] = key
+		self.assertEquals(self.table.peek(0), 0)
+		self.table[3] = 3
+		self.assertFalse(0 in self.table)
+		self.assertEquals((self.table.hits, self.table.misses), (0, 0))
+
+	def testReplace(self):
+		self.table[1] = 'a'
+		self.table[1] = 'b'
+		self.assertEquals(len(self.table), 1)
+		self.assertEquals(self.table[1], 'b')
+
+	def testUpdate(self):
+		self.table.update('k', 0.5, best=10)
+		entry = self.table.update('k', 0.25)
+		self.assertEquals((entry.value, entry.visits, entry.best), (0.25, 2, 10))
+
+	def testStats(self):
+		self.table[1] = 1
+		self.table.get(1)
+		self.table.get(2)
+		stats = self.table.stats()
+		self.assertEquals(stats['hit_rate'], 0.5)
+		self.assertEquals(stats['size'], 1)
+		self.table.clear()
+		self.assertEquals(len(self.table), 0)
+		self.assertEquals(self.table.hits, 0)
+
+	def testBadArguments(self):
+		self.assertRaises(ValueError, TranspositionTable, 0)
+		self.assertRaises(ValueError, TranspositionTable, 10, 'random')
+
+class DepthTest(unittest.TestCase):
+	def setUp(self):
+		self.table = TranspositionTable(3, DEPTH)
+
+	def testShallowestEvicted(self):
+		self.table.store('a', 1, depth=5)
+		self.table.store('b', 2, depth=1)
+		self.table.store('c', 3, depth=3)
+		self.table.store('d', 4, depth=4)
+		self.assertEquals(sorted(self.table), ['a', 'c', 'd'])
+		self.assertEquals(self.table.evictions, 1)
+
+	def testOldestFirst(self):
+		for key in 'abc':
+			self.table.store(key, key, depth=2)
+		self.table.store('d', 'd', depth=2)
+		self.assertFalse('a' in self.table)
+
+	def testDepthChanged(self):
+		self.table.store('a', 1, depth=1)
+		self.table.store('b', 2, depth=2)
+		self.table.store('c', 3, depth=3)
+		self.table.store('a', 1, depth=10)
+		self.table.store('d', 4, depth=4)
+		self.assertEquals(sorted(self.table), ['a', 'c', 'd'])
+		self.assertEquals(self.table.depth('a'), 10)
+
+	def testDelete(self):
+		self.table.store('a', 1, depth=1)
+		self.table.store('b', 2, depth=2)
+		del self.table['a']
+		self.table.store('c', 3, depth=3)
+		self.table.store('d', 4, depth=4)
+		self.assertEquals(sorted(self.table), ['b', 'c', 'd'])
+
+	def testManyUpdates(self):
+		'''Storing the same keys again and again doesn't let the heap grow without limit'''
+		for n in range(1000):
+			self.table.store(n % 3, n, depth=n)
+		self.assertTrue(len(self.table._heap) < 30)
+		self.table.store('x', 0, depth=0)
+		self.assertEquals(len(self.table), 3)
+
+def suite():
+	suite1 = unittest.makeSuite(LRUTest)
+	suite2 = unittest.makeSuite(DepthTest)
+	alltests = unittest.TestSuite((suite1, suite2))
+	return alltests
+
+if __name__ == "__main__":
+	unittest.main()
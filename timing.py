@@ -0,0 +1,65 @@
+#!/usr/bin/python
+'''Instrumentation for timing the phases of a move.
+
+A `PhaseTimer` can be given to a game with `game.TwoPlayerGame.set_timer`. The game and its ruleset then record how long each phase of every move takes: starting the board transaction, placing the stone, removing captured stones, the suicide and ko checks, committing or rolling back, recording the history and calling the listeners. Without a timer the only cost is a check for `None` between phases.
+
+	timer = PhaseTimer()
+	game.set_timer(timer)
+	...
+	print timer.report()
+'''
+import timeit
+import multilogger
+
+class PhaseTimer(object):
+	'''Accumulates the total time and number of calls for each named phase. Call `start` at the beginning of an operation, and `lap` at the end of each phase of it.'''
+
+	def __init__(self, clock=timeit.default_timer):
+		self.clock = clock
+		self.reset()
+
+	def reset(self):
+		'''Forget all the timings recorded so far.'''
+		self.totals = {} # phase -> total seconds
+		self.counts = {} # phase -> number of times it was recorded
+		self.maxima = {} # phase -> longest time
+		self._last = None
+
+	def start(self):
+		'''Start timing the first phase of an operation.'''
+		self._last = self.clock()
+
+	def lap(self, phase):
+		'''Record the time since the last call to `start` or `lap` against a phase.'''
+		now = self.clock()
+		elapsed = now - self._last
+		self._last = now
+		self.totals[phase] = self.totals.get(phase, 0.0) + elapsed
+		self.counts[phase] = self.counts.get(phase, 0) + 1
+		if elapsed > self.maxima.get(phase, 0.0):
+			self.maxima[phase] = elapsed
+
+	def summary(self):
+		'''Return a list of dictionaries, one for each phase, with its total, mean and maximum time in seconds and its count. The phases taking the most time come first.'''
+		result = []
+		for phase, total in self.totals.iteritems():
+			count = self.counts[phase]
+			result.append({
+				'phase': phase,
+				'count': count,
+				'total': total,
+				'mean': total / count,
+				'max': self.maxima.get(phase, 0.0),
+			})
+		result.sort(key=lambda r: r['total'], reverse=True)
+		return result
+
+	def report(self):
+		'''Return the summary as a table of text, with times in microseconds.'''
+		lines = ['%-20s %8s %12s %10s %10s' % ('phase', 'count', 'total', 'mean', 'max')]
+		for r in self.summary():
+			lines.append('%-20s %8d %12.1f %10.2f %10.2f' % (r['phase'], r['count'], 1e6 * r['total'], 1e6 * r['mean'], 1e6 * r['max']))
+		return '\n'.join(lines)
+
+# Get a logger for this module
+debug,info,warning,error = multilogger.logFunctions(__name__)
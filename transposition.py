@@ -0,0 +1,170 @@
+'''Transposition tables: caches of information about positions, keyed by position hash, with a fixed maximum size.
+
+The same position can be reached by different orders of moves, so anything worked out about a position (an evaluation, how often it has been visited, the best move found) is worth keeping under the position's Zobrist hash (`board.Board.hash`) rather than the moves that led to it. A `TranspositionTable` holds at most `capacity` entries, so it can be left running for a whole session; when it is full, storing a new entry evicts an old one, chosen by the table's policy:
+
+	`LRU`
+		The least recently used entry. Suits searches like `mcts`, where the positions near the current one are the ones that matter.
+	`DEPTH`
+		The entry with the lowest depth (the least work behind it), oldest first among equals. Suits analysis where some entries are far more expensive to recompute than others.
+
+The table counts hits, misses and evictions (see `TranspositionTable.stats`).
+
+One table can be shared by several users (for example an AI player and an analysis tool) as long as their keys can't collide, e.g. by making keys tuples of the hash and something that identifies the user or the player to move, as `mcts` does. Values can be anything; `Entry` is a simple record of an evaluation, a visit count and a best move for users who don't need their own.
+'''
+import heapq
+from collections import OrderedDict
+import multilogger
+
+# Eviction policies
+LRU = 'lru'
+DEPTH = 'depth'
+
+DEFAULT_CAPACITY = 1 << 18
+
+class Entry(object):
+	'''Information about a position: an evaluation, the number of times it has been visited, and the best move found (e.g. an index, see `geometry.Topology`).'''
+
+	__slots__ = ('value', 'visits', 'best')
+
+	def __init__(self, value=None, visits=0, best=None):
+		self.value = value
+		self.visits = visits
+		self.best = best
+
+	def __repr__(self):
+		return 'Entry(%r, %r, %r)' % (self.value, self.visits, self.best)
+
+class TranspositionTable(object):
+	'''A mapping from keys to values which holds at most `capacity` entries, evicting old entries according to `policy` (`LRU` or `DEPTH`).
+
+	`get` and `table[key]` count as uses of an entry (for `LRU`) and are counted as hits or misses; `peek` and `in` are not.'''
+
+	def __init__(self, capacity=DEFAULT_CAPACITY, policy=LRU):
+		if capacity < 1:
+			raise ValueError('capacity must be at least 1')
+		if policy not in (LRU, DEPTH):
+			raise ValueError('Unknown policy %r' % (policy,))
+		self.capacity = capacity
+		self.policy = policy
+		self.clear()
+
+	def clear(self):
+		'''Remove every entry and reset the counters.'''
+		self._values = OrderedDict() if self.policy == LRU else {}
+		self._depths = {} # key -> (depth, stamp), for DEPTH
+		self._heap = [] # (depth, stamp, key), including stale items, for DEPTH
+		self._stamp = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def __len__(self):
+		return len(self._values)
+
+	def __contains__(self, key):
+		return key in self._values
+
+	def __iter__(self):
+		return iter(self._values)
+
+	def peek(self, key, default=None):
+		'''Return the value for a key, or `default`, without counting it as a use.'''
+		return self._values.get(key, default)
+
+	def get(self, key, default=None):
+		'''Return the value for a key, or `default` if it isn't in the table.'''
+		values = self._values
+		if key not in values:
+			self.misses += 1
+			return default
+		self.hits += 1
+		if self.policy == LRU:
+			value = values.pop(key)
+			values[key] = value
+			return value
+		return values[key]
+
+	def __getitem__(self, key):
+		value = self.get(key, self)
+		if value is self:
+			raise KeyError(key)
+		return value
+
+	def store(self, key, value, depth=0):
+		'''Store a value, evicting another entry if the table is full. `depth` is only used by the `DEPTH` policy; a new entry is always stored, whatever its depth.'''
+		values = self._values
+		if key in values:
+			if self.policy == LRU:
+				del values[key]
+		elif len(values) >= self.capacity:
+			self._evict()
+		values[key] = value
+
+		if self.policy == DEPTH:
+			self._stamp += 1
+			self._depths[key] = (depth, self._stamp)
+			heapq.heappush(self._heap, (depth, self._stamp, key))
+			if len(self._heap) > 2 * len(values) + 16:
+				self._compact()
+
+	def __setitem__(self, key, value):
+		self.store(key, value)
+
+	def __delitem__(self, key):
+		del self._values[key]
+		if self.policy == DEPTH:
+			del self._depths[key]
+
+	def depth(self, key):
+		'''The depth a key was stored with, for the `DEPTH` policy.'''
+		return self._depths[key][0]
+
+	def update(self, key, value, best=None, depth=0):
+		'''Record a visit to a position: store `value` and `best` (unless it is `None`) in its `Entry`, and add one to its visits. Returns the entry.'''
+		entry = self.get(key)
+		if entry is None:
+			entry = Entry()
+		entry.value = value
+		entry.visits += 1
+		if best is not None:
+			entry.best = best
+		if self.policy == DEPTH:
+			depth = max(depth, self._depths.get(key, (depth,))[0])
+		self.store(key, entry, depth)
+		return entry
+
+	def _evict(self):
+		'''Remove one entry according to the policy.'''
+		if self.policy == LRU:
+			self._values.popitem(last=False)
+		else:
+			heap = self._heap
+			depths = self._depths
+			while True:
+				depth, stamp, key = heapq.heappop(heap)
+				# Skip items left behind when an entry was stored again or deleted
+				if depths.get(key) == (depth, stamp):
+					break
+			del self._values[key]
+			del depths[key]
+		self.evictions += 1
+
+	def _compact(self):
+		'''Rebuild the heap without stale items.'''
+		self._heap = [(depth, stamp, key) for key, (depth, stamp) in self._depths.iteritems()]
+		heapq.heapify(self._heap)
+
+	def stats(self):
+		'''Return a dictionary of the size, capacity, hits, misses, evictions and hit rate.'''
+		lookups = self.hits + self.misses
+		return {
+			'size': len(self),
+			'capacity': self.capacity,
+			'hits': self.hits,
+			'misses': self.misses,
+			'evictions': self.evictions,
+			'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+		}
+
+# Get a logger for this module
+debug,info,warning,error = multilogger.logFunctions(__name__)